@@ -1,34 +1,264 @@
 #!/usr/bin/env python3
 """
 Convert the generated MIDI JSON to an actual .mid file
-Requires: pip install mido
+Uses the built-in writer by default; --engine mido requires: pip install mido
 """
 
+import io
 import json
 import sys
+import shutil
+import argparse
+import tempfile
 from pathlib import Path
 
-try:
-    from mido import Message, MidiFile, MidiTrack, MetaMessage
-except ImportError:
-    print("Error: mido library not found")
-    print("Install with: pip install mido")
-    sys.exit(1)
+sys.path.insert(0, str(Path(__file__).resolve().parent / "python-scripts" / "original-scripts"))
+from midi_writer import SmfWriter, VAR_LEN_TABLE, encode_var_len
 
+ENGINE_NATIVE = "native"
+ENGINE_MIDO = "mido"
+ENGINES = (ENGINE_NATIVE, ENGINE_MIDO)
 
-def json_to_midi(json_path, output_path):
-    """Convert MIDI JSON to .mid file"""
+LEAD_VELOCITY = 80
+BASS_VELOCITY = 70
+LEAD_PROGRAM = 0    # Acoustic Grand Piano
+BASS_PROGRAM = 32   # Acoustic Bass
+TEMPO_MICROS = 500000  # 120 BPM
+EB_MAJOR_KEY_SIGNATURE = bytes((0xFD, 0x00))  # 3 flats, major
+FOUR_FOUR = bytes((4, 2, 24, 8))
+
+MIDI_INFO_JSON = "combined-midi-info.json"
+MIDI_INFO_NDJSON = "combined-midi-info.ndjson"  # {"metadata": ...} line, then one event per line
+READ_CHUNK = 1 << 16
+BASS_SPOOL_LIMIT = 1 << 22  # bass track stays in memory up to 4 MB, then spills to a temp file
+
+
+def import_mido():
+    try:
+        import mido
+    except ImportError:
+        print("Error: mido library not found")
+        print("Install with: pip install mido")
+        sys.exit(1)
+    return mido
+
+
+def midi_track_name(metadata):
+    if 'collection' in metadata:
+        return f"Millennium Song - {metadata['collection']}"
+    elif 'seed' in metadata:
+        return f"Millennium Song - Seed {metadata['seed']}"
+    return "Millennium Song"
+
+
+class MidiInfoStream:
+    """
+    Read combined-midi-info metadata up front, then iterate the events one at a time.
+
+    .ndjson files are read line by line. For .json files only a READ_CHUNK window of the text
+    is held: the top-level object is walked key by key with raw_decode, and the events array
+    is decoded item by item, so memory does not grow with the timeline. Both generators write
+    metadata before events; a file with events first falls back to json.load.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.file = open(self.path, 'r')
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.events_pending = False
+        self.loaded_events = None
+        if self.path.suffix == '.ndjson':
+            self.metadata = json.loads(self.file.readline())['metadata']
+        else:
+            self.metadata = self.read_header()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self.file.close()
+
+    def fill(self):
+        """Drop consumed text and append the next chunk; False at end of file"""
+        chunk = self.file.read(READ_CHUNK)
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        self.eof = not chunk
+        return bool(chunk)
+
+    def peek(self):
+        """Next non-whitespace character (not consumed), '' at end of file"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"{self.path}: expected {char!r} at offset {self.file.tell()}")
+        self.pos += 1
+
+    def decode(self):
+        """Decode the next JSON value, reading more text until it is complete"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+            # A number at the end of the window may continue in the next chunk
+            if end == len(self.buffer) and not self.eof and self.fill():
+                continue
+            self.pos = end
+            return value
+
+    def read_header(self):
+        """Consume the top-level object up to the opening of the events array"""
+        header = {}
+        self.expect('{')
+        while self.peek() != '}':
+            key = self.decode()
+            self.expect(':')
+            if key == 'events':
+                if 'metadata' not in header:
+                    break
+                self.expect('[')
+                self.events_pending = True
+                return header['metadata']
+            header[key] = self.decode()
+            if self.peek() == ',':
+                self.pos += 1
+        
+        # Events before metadata (or no events at all): load the document the simple way
+        self.file.seek(0)
+        data = json.load(self.file)
+        self.loaded_events = data.get('events', [])
+        return data['metadata']
+
+    def events(self):
+        if self.loaded_events is not None:
+            yield from self.loaded_events
+        elif self.path.suffix == '.ndjson':
+            for line in self.file:
+                if line.strip():
+                    yield json.loads(line)
+        elif self.events_pending:
+            self.events_pending = False
+            while self.peek() != ']':
+                yield self.decode()
+                if self.peek() == ',':
+                    self.pos += 1
+            self.pos += 1
+
+
+def find_midi_info(output_dir):
+    """Prefer the NDJSON export when a directory has both"""
+    for name in (MIDI_INFO_NDJSON, MIDI_INFO_JSON):
+        path = Path(output_dir) / name
+        if path.exists():
+            return path
+    return None
+
+
+def read_midi_info(path):
+    """Whole file as (metadata, events list) - for the mido engine and parity checks"""
+    with MidiInfoStream(path) as stream:
+        return stream.metadata, list(stream.events())
+
+
+def encode_delta(ticks):
+    return VAR_LEN_TABLE.get(ticks) or encode_var_len(ticks)
+
+
+def write_native_midi(out, metadata, events):
+    """
+    Write the same bytes mido would for this layout, straight from the event dicts.
+
+    Mirrors mido's track encoding: rests are a zero-velocity note_on on note 0, both parts
+    use channel 0, and running status drops a repeated note_on status byte.
+    """
+    writer = SmfWriter(out, 3)
     
-    # Read the JSON file
-    with open(json_path, 'r') as f:
-        data = json.load(f)
+    # Track 0: Tempo and metadata
+    writer.begin_track()
+    writer.track_name(midi_track_name(metadata))
+    writer.meta(0, 0x59, EB_MAJOR_KEY_SIGNATURE)
+    writer.meta(0, 0x58, FOUR_FOUR)
+    writer.meta(0, 0x51, TEMPO_MICROS.to_bytes(3, "big"))
+    writer.end_track()
     
-    metadata = data['metadata']
-    events = data['events']
+    # Tracks 1 and 2 are written from the same event stream, so the bass bytes are staged in a
+    # second writer (track data only, spooled to disk for long timelines) and appended after the lead track
+    bass_spool = tempfile.SpooledTemporaryFile(max_size=BASS_SPOOL_LIMIT)
+    bass_writer = SmfWriter(bass_spool, 0)
+    bass_writer.begin_track()
+    bass_writer.track_name('Bass')
+    bass_writer.program_change(0, 0, BASS_PROGRAM)
     
-    print(f"Converting {len(events)} beats to MIDI...")
-    seed_info = metadata.get('seed', metadata.get('collection', 'blockchain simulation'))
-    print(f"Source: {seed_info}, Key: {metadata['key']}")
+    writer.begin_track()
+    writer.track_name('Lead')
+    writer.program_change(0, 0, LEAD_PROGRAM)
+    
+    lead_messages = {}
+    bass_messages = {}
+    after_note_on = False  # running status: previous lead message was a note_on
+    count = 0
+    for event in events:
+        lead = event['lead']
+        bass = event['bass']
+        pitch, duration = lead['pitch'], lead['duration']
+        
+        key = (after_note_on, pitch, duration)
+        message = lead_messages.get(key)
+        if message is None:
+            status = b"" if after_note_on else b"\x90"
+            if pitch >= 0:
+                # Note on, then note off after the duration (480 ticks = quarter note)
+                message = (b"\x00" + status + bytes((pitch, LEAD_VELOCITY))
+                           + encode_delta(duration) + bytes((0x80, pitch, 0)))
+            else:
+                # Rest: just advance time
+                message = encode_delta(duration) + status + b"\x00\x00"
+            lead_messages[key] = message
+        writer.put(message)
+        after_note_on = pitch < 0
+        
+        # Bass note (no rests in bass)
+        key = (bass['pitch'], bass['duration'])
+        message = bass_messages.get(key)
+        if message is None:
+            if bass['pitch'] < 0:
+                raise ValueError(f"Bass rest at beat {event.get('beat')}: the bass part has no rests")
+            message = (b"\x00\x90" + bytes((bass['pitch'], BASS_VELOCITY))
+                       + encode_delta(bass['duration']) + bytes((0x80, bass['pitch'], 0)))
+            bass_messages[key] = message
+        bass_writer.put(message)
+        count += 1
+    
+    writer.end_track()
+    bass_writer.end_track()
+    writer.bytes_written += bass_spool.tell() - 14
+    bass_spool.seek(14)
+    shutil.copyfileobj(bass_spool, out, READ_CHUNK)
+    bass_spool.close()
+    return count
+
+
+def mido_midi_file(metadata, events):
+    """Build the MidiFile with mido (one Message object per note on/off)"""
+    mido = import_mido()
+    Message, MidiFile, MidiTrack, MetaMessage = mido.Message, mido.MidiFile, mido.MidiTrack, mido.MetaMessage
     
     # Create MIDI file
     mid = MidiFile(type=1)  # Type 1: multiple tracks, synchronous
@@ -37,12 +267,7 @@ def json_to_midi(json_path, output_path):
     meta_track = MidiTrack()
     mid.tracks.append(meta_track)
     
-    if 'collection' in metadata:
-        track_name = f"Millennium Song - {metadata['collection']}"
-    elif 'seed' in metadata:
-        track_name = f"Millennium Song - Seed {metadata['seed']}"
-    else:
-        track_name = "Millennium Song"
+    track_name = midi_track_name(metadata)
     meta_track.append(MetaMessage('track_name', name=track_name, time=0))
     meta_track.append(MetaMessage('key_signature', key='Eb', time=0))
     meta_track.append(MetaMessage('time_signature', numerator=4, denominator=4, time=0))
@@ -84,34 +309,84 @@ def json_to_midi(json_path, output_path):
     lead_track.append(MetaMessage('end_of_track', time=0))
     bass_track.append(MetaMessage('end_of_track', time=0))
     meta_track.append(MetaMessage('end_of_track', time=0))
+    return mid
+
+
+def midi_bytes(metadata, events, engine=ENGINE_NATIVE):
+    """Complete .mid file contents from either engine"""
+    out = io.BytesIO()
+    if engine == ENGINE_MIDO:
+        mido_midi_file(metadata, events).save(file=out)
+    else:
+        write_native_midi(out, metadata, events)
+    return out.getvalue()
+
+
+def check_parity(json_path):
+    """Compare native and mido output byte for byte; returns True if identical"""
+    metadata, events = read_midi_info(json_path)
+    
+    native = midi_bytes(metadata, events, ENGINE_NATIVE)
+    reference = midi_bytes(metadata, events, ENGINE_MIDO)
+    if native == reference:
+        print(f"✓ Engines agree: {len(native):,} identical bytes for {len(events)} beats")
+        return True
     
-    # Save MIDI file
-    mid.save(output_path)
+    offset = next((i for i, (a, b) in enumerate(zip(native, reference)) if a != b), min(len(native), len(reference)))
+    print(f"❌ Engines differ at byte {offset} (native {len(native):,} bytes, mido {len(reference):,} bytes)")
+    print(f"  native: {native[offset:offset + 16].hex(' ')}")
+    print(f"  mido:   {reference[offset:offset + 16].hex(' ')}")
+    return False
+
+
+def json_to_midi(json_path, output_path, engine=ENGINE_NATIVE):
+    """Convert MIDI JSON (or NDJSON) to .mid file, streaming events into the native writer"""
+    
+    with MidiInfoStream(json_path) as stream:
+        metadata = stream.metadata
+        print(f"Converting {Path(json_path).name} to MIDI ({engine} engine)...")
+        seed_info = metadata.get('seed', metadata.get('collection', 'blockchain simulation'))
+        print(f"Source: {seed_info}, Key: {metadata['key']}")
+        
+        # Save MIDI file
+        if engine == ENGINE_MIDO:
+            events = list(stream.events())
+            mido_midi_file(metadata, events).save(output_path)
+            count = len(events)
+        else:
+            with open(output_path, 'wb') as f:
+                count = write_native_midi(f, metadata, stream.events())
     print(f"✓ Saved MIDI file: {output_path}")
-    print(f"  Tracks: {len(mid.tracks)}")
-    print(f"  Length: {len(events)} beats")
+    print(f"  Tracks: 3")
+    print(f"  Length: {count} beats")
 
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python convert-to-midi.py <output-directory>")
-        print("Example: python convert-to-midi.py OUTPUTS/test-sequence-20251002-1")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Convert combined-midi-info.json (or .ndjson) to combined-sequence.mid.")
+    parser.add_argument("output_dir", help="Directory holding combined-midi-info.json/.ndjson (e.g. OUTPUTS/test-sequence-20251002-1)")
+    parser.add_argument("--engine", choices=ENGINES, default=ENGINE_NATIVE,
+                        help="native: built-in writer (default, no dependencies); mido: reference writer")
+    parser.add_argument("--check-parity", action="store_true",
+                        help="Build the file with both engines and compare bytes (requires mido)")
+    args = parser.parse_args()
     
-    output_dir = Path(sys.argv[1])
+    output_dir = Path(args.output_dir)
     
     if not output_dir.exists():
         print(f"Error: Directory not found: {output_dir}")
         sys.exit(1)
     
-    json_file = output_dir / "combined-midi-info.json"
+    json_file = find_midi_info(output_dir)
     midi_file = output_dir / "combined-sequence.mid"
     
-    if not json_file.exists():
-        print(f"Error: JSON file not found: {json_file}")
+    if json_file is None:
+        print(f"Error: JSON file not found: {output_dir / MIDI_INFO_JSON}")
         sys.exit(1)
     
-    json_to_midi(json_file, midi_file)
+    if args.check_parity:
+        sys.exit(0 if check_parity(json_file) else 1)
+    
+    json_to_midi(json_file, midi_file, args.engine)
     print(f"\n✓ Done! Play with:")
     print(f"  timidity {midi_file}")
     print(f"  or open in your DAW/sequencer")
@@ -6,6 +6,7 @@ Same structure as Solidity test output for comparison
 
 import sys
 import json
+import argparse
 from pathlib import Path
 from datetime import datetime
 
@@ -14,10 +15,26 @@ sys.path.insert(0, 'python-scripts/original-scripts')
 from full_musiclib_v3 import CompleteMusicLibV3
 
 def main():
-    # Same config as Solidity test
-    seed = 12345
-    start_beat = 0
-    num_beats = 20
+    # Defaults match the Solidity test config
+    parser = argparse.ArgumentParser(description="Generate reference output with full_musiclib_v3.py.")
+    parser.add_argument("--seed", type=int, default=12345)
+    parser.add_argument("--start-beat", type=int, default=0)
+    parser.add_argument("--beats", type=int, default=20, help="Number of beats to generate")
+    parser.add_argument("--ndjson", action="store_true",
+                        help="Stream events to combined-midi-info.ndjson (constant memory for long timelines)")
+    parser.add_argument("--combined-only", action="store_true", help="Skip the individual-beats/ files")
+    args = parser.parse_args()
+    
+    seed = args.seed
+    start_beat = args.start_beat
+    num_beats = args.beats
+    metadata = {
+        "seed": seed,
+        "startBeat": start_beat,
+        "numBeats": num_beats,
+        "key": "Eb major",
+        "algorithm": "Python full_musiclib_v3.py"
+    }
     
     print("=== GENERATING PYTHON REFERENCE ===")
     print(f"Seed: {seed}")
@@ -27,26 +44,49 @@ def main():
     timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
     base_dir = Path(f"OUTPUTS/python-reference-{timestamp}")
     beats_dir = base_dir / "individual-beats"
-    beats_dir.mkdir(parents=True, exist_ok=True)
+    (base_dir if args.combined_only else beats_dir).mkdir(parents=True, exist_ok=True)
     
     print(f"Output directory: {base_dir}")
     
     # Initialize library
     lib = CompleteMusicLibV3()
     
-    # Collect data for combined files
-    abc_beats = []
+    # Combined files are written as beats are generated; the JSON array still collects events
+    midi_info_name = "combined-midi-info.ndjson" if args.ndjson else "combined-midi-info.json"
+    combined_abc = open(base_dir / "combined-sequence.abc", "w")
+    combined_abc.write(combined_abc_header(seed, start_beat, num_beats))
     midi_events = []
+    if args.ndjson:
+        midi_info = open(base_dir / midi_info_name, "w")
+        midi_info.write(json.dumps({"metadata": metadata}) + "\n")
     
-    # Generate each beat
-    for i in range(num_beats):
+    # Generate each beat (streamed: state carries over instead of replaying history)
+    beats = lib.iter_beats(seed, start_beat, start_beat + num_beats)
+    for i, (lead, bass) in enumerate(beats):
         beat = start_beat + i
         year = 2026 + beat
         
-        # Generate events
-        lead, bass = lib.generate_beat(beat, seed)
+        # 1. Individual MIDI JSON
+        midi_json = {
+            "beat": beat,
+            "year": year,
+            "lead": {"pitch": lead.pitch, "duration": lead.duration},
+            "bass": {"pitch": bass.pitch, "duration": bass.duration}
+        }
+        
+        # Combined files
+        combined_abc.write(("\n" if i else "") + format_abc_beat(beat, year, lead, bass, lib))
+        if args.ndjson:
+            midi_info.write(json.dumps(midi_json) + "\n")
+        else:
+            midi_events.append(midi_json)
+        
+        if num_beats <= 100:
+            print(f"  Beat {beat}: Lead MIDI={lead.pitch:3d} Bass MIDI={bass.pitch:3d}")
+        if args.combined_only:
+            continue
         
-        # 1. Individual ABC file (generate manually since method name may differ)
+        # 2. Individual ABC file (generate manually since method name may differ)
         lead_abc = lib.pitch_to_abc(lead.pitch) + lib.duration_to_abc(lead.duration)
         bass_abc = lib.pitch_to_abc(bass.pitch) + lib.duration_to_abc(bass.duration)
         abc_content = f"""X:1
@@ -65,40 +105,21 @@ V:2
         abc_file = beats_dir / f"beat-{beat}-year-{year}.abc"
         abc_file.write_text(abc_content)
         
-        # 2. Individual MIDI JSON
-        midi_json = {
-            "beat": beat,
-            "year": year,
-            "lead": {"pitch": lead.pitch, "duration": lead.duration},
-            "bass": {"pitch": bass.pitch, "duration": bass.duration}
-        }
         json_file = beats_dir / f"beat-{beat}-year-{year}.json"
         json_file.write_text(json.dumps(midi_json, indent=2) + "\n")
-        
-        # Collect for combined files
-        abc_beats.append(format_abc_beat(beat, year, lead, bass, lib))
-        midi_events.append(midi_json)
-        
-        print(f"  Beat {beat}: Lead MIDI={lead.pitch:3d} Bass MIDI={bass.pitch:3d}")
     
     # 3. Combined ABC file
-    combined_abc = generate_combined_abc(seed, start_beat, num_beats, abc_beats)
-    (base_dir / "combined-sequence.abc").write_text(combined_abc)
+    combined_abc.close()
     
     # 4. Combined MIDI info
-    combined_midi = {
-        "metadata": {
-            "seed": seed,
-            "startBeat": start_beat,
-            "numBeats": num_beats,
-            "key": "Eb major",
-            "algorithm": "Python full_musiclib_v3.py"
-        },
-        "events": midi_events
-    }
-    (base_dir / "combined-midi-info.json").write_text(json.dumps(combined_midi, indent=2) + "\n")
+    if args.ndjson:
+        midi_info.close()
+    else:
+        combined_midi = {"metadata": metadata, "events": midi_events}
+        (base_dir / midi_info_name).write_text(json.dumps(combined_midi, indent=2) + "\n")
     
     # 5. Summary
+    beats_line = "" if args.combined_only else "- `individual-beats/` - Individual ABC and JSON files for each beat\n"
     summary = f"""# Python Reference Output
 
 **Generated:** {timestamp}
@@ -108,9 +129,8 @@ V:2
 
 ## Files
 
-- `individual-beats/` - Individual ABC and JSON files for each beat
-- `combined-sequence.abc` - All beats in single ABC file for playback
-- `combined-midi-info.json` - MIDI event data for all beats
+{beats_line}- `combined-sequence.abc` - All beats in single ABC file for playback
+- `{midi_info_name}` - MIDI event data for all beats
 
 ## Usage
 
@@ -135,9 +155,10 @@ Compare with Solidity output in `OUTPUTS/test-sequence-*/`
     (base_dir / "README.md").write_text(summary)
     
     print(f"\n=== OUTPUT SUMMARY ===")
-    print(f"Individual beats: {num_beats}")
+    if not args.combined_only:
+        print(f"Individual beats: {num_beats}")
     print(f"Combined ABC: {base_dir}/combined-sequence.abc")
-    print(f"Combined MIDI: {base_dir}/combined-midi-info.json")
+    print(f"Combined MIDI: {base_dir}/{midi_info_name}")
     print(f"\nTo convert to MIDI:")
     print(f"  python3 convert-to-midi.py {base_dir}")
 
@@ -154,9 +175,9 @@ def format_abc_beat(beat, year, lead, bass, lib):
 [V:2] {bass_note}{bass_dur} |"""
 
 
-def generate_combined_abc(seed, start_beat, num_beats, abc_beats):
-    """Generate combined ABC file"""
-    header = f"""X:1
+def combined_abc_header(seed, start_beat, num_beats):
+    """Header for the combined ABC file; beats are appended as they are generated"""
+    return f"""X:1
 T:Millennium Song - Python Reference
 C:Seed {seed} | Beats {start_beat}-{start_beat + num_beats - 1}
 M:4/4
@@ -165,8 +186,6 @@ K:Eb
 V:1 clef=treble name="Lead"
 V:2 clef=bass name="Bass"
 """
-    
-    return header + "\n".join(abc_beats)
 
 
 if __name__ == "__main__":
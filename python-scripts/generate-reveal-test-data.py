@@ -2,27 +2,30 @@
 """
 Generate test data for reveal system testing
 
-Creates 10 CSV files, each with 100 tokens worth of test data:
+Creates 10 CSV files (--files), each with 100 tokens (--tokens) worth of test data:
 - tokenId (1-100)
 - revealTimestamp (Jan 1 of sequential years starting 2026)
 - previousNotesHash (rolling hash simulation)
 - sevenWords (fake 7-word commitment as bytes32)
+
+Usage:
+    python3 python-scripts/generate-reveal-test-data.py --tokens 100000 --files 3
 """
 
+import argparse
 import hashlib
 import csv
 import random
 from pathlib import Path
+from typing import Iterator
 from datetime import datetime
 
-# Output directory
+# Defaults
 OUTPUT_DIR = Path("OUTPUTS/reveal-test-data")
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-
-# Constants
 START_YEAR = 2026
 NUM_TOKENS = 100
 NUM_CSV_FILES = 10
+ZERO_HASH = "0x" + "00" * 32
 
 # Word bank for generating fake seven-word phrases
 WORD_BANK = [
@@ -51,78 +54,93 @@ def generate_seven_words():
     return phrase, "0x" + hash_obj.hexdigest()
 
 
-def simulate_previous_notes_hash(token_id, run_id):
+def iter_previous_notes_hashes(num_tokens, run_id) -> Iterator[str]:
     """
-    Simulate a rolling previousNotesHash
+    Stream the rolling previousNotesHash for tokens 1..num_tokens.
     For token 1, hash is zero (no previous notes)
-    For token N, hash includes all previous reveals
+    For token N, hash is: hash(token N-1 hash + fake note data of token N)
     """
-    if token_id == 1:
-        return "0x" + "00" * 32  # Zero hash for first token
-    
-    # Simulate rolling hash by hashing: previous hash + fake note data
-    prev_hash = simulate_previous_notes_hash(token_id - 1, run_id)
-    
-    # Fake note data (just for simulation)
-    fake_lead_pitch = 60 + (token_id % 12)  # C4 to B4 range
-    fake_bass_pitch = 36 + (token_id % 12)  # C2 to B2 range
-    fake_lead_dur = 480
-    fake_bass_dur = 960
-    
-    # Hash it
-    data = f"{prev_hash}{fake_lead_pitch}{fake_lead_dur}{fake_bass_pitch}{fake_bass_dur}{run_id}"
-    hash_obj = hashlib.sha256(data.encode())
-    return "0x" + hash_obj.hexdigest()
+    prev_hash = ZERO_HASH  # Zero hash for first token
+    for token_id in range(1, num_tokens + 1):
+        if token_id > 1:
+            # Fake note data (just for simulation)
+            fake_lead_pitch = 60 + (token_id % 12)  # C4 to B4 range
+            fake_bass_pitch = 36 + (token_id % 12)  # C2 to B2 range
+            fake_lead_dur = 480
+            fake_bass_dur = 960
+            
+            # Hash it
+            data = f"{prev_hash}{fake_lead_pitch}{fake_lead_dur}{fake_bass_pitch}{fake_bass_dur}{run_id}"
+            prev_hash = "0x" + hashlib.sha256(data.encode()).hexdigest()
+        yield prev_hash
 
 
-def generate_csv(run_id):
-    """Generate a single CSV file with 100 tokens"""
-    filename = OUTPUT_DIR / f"reveal-test-data-{run_id:02d}.csv"
-    
-    rows = []
-    for token_id in range(1, NUM_TOKENS + 1):
-        year = START_YEAR + token_id - 1  # Token 1 reveals in 2026, token 2 in 2027, etc.
-        timestamp = year_to_jan1_timestamp(year)
-        
-        # Add some randomness to timestamp (±1 hour)
-        timestamp += random.randint(-3600, 3600)
-        
-        previous_hash = simulate_previous_notes_hash(token_id, run_id)
-        seven_words_phrase, seven_words_hash = generate_seven_words()
-        
-        rows.append({
-            "tokenId": token_id,
-            "revealYear": year,
-            "revealTimestamp": timestamp,
-            "previousNotesHash": previous_hash,
-            "sevenWordsPhrase": seven_words_phrase,
-            "sevenWordsHash": seven_words_hash,
-        })
+def simulate_previous_notes_hash(token_id, run_id):
+    """Rolling previousNotesHash for a single token (walks the chain iteratively)"""
+    if token_id < 1:
+        raise ValueError(f"Token ids start at 1, got {token_id}")
+    for previous_hash in iter_previous_notes_hashes(token_id, run_id):
+        pass
+    return previous_hash
+
+
+def generate_csv(run_id, num_tokens=NUM_TOKENS, output_dir=OUTPUT_DIR):
+    """Generate a single CSV file, streaming one row per token"""
+    filename = output_dir / f"reveal-test-data-{run_id:02d}.csv"
     
-    # Write CSV
     with open(filename, 'w', newline='') as f:
         writer = csv.DictWriter(f, fieldnames=[
             "tokenId", "revealYear", "revealTimestamp", 
             "previousNotesHash", "sevenWordsPhrase", "sevenWordsHash"
         ])
         writer.writeheader()
-        writer.writerows(rows)
+        
+        hashes = iter_previous_notes_hashes(num_tokens, run_id)
+        for token_id, previous_hash in enumerate(hashes, start=1):
+            year = START_YEAR + token_id - 1  # Token 1 reveals in 2026, token 2 in 2027, etc.
+            timestamp = year_to_jan1_timestamp(year)
+            
+            # Add some randomness to timestamp (±1 hour)
+            timestamp += random.randint(-3600, 3600)
+            
+            seven_words_phrase, seven_words_hash = generate_seven_words()
+            
+            writer.writerow({
+                "tokenId": token_id,
+                "revealYear": year,
+                "revealTimestamp": timestamp,
+                "previousNotesHash": previous_hash,
+                "sevenWordsPhrase": seven_words_phrase,
+                "sevenWordsHash": seven_words_hash,
+            })
     
-    print(f"Generated: {filename} ({len(rows)} tokens)")
+    print(f"Generated: {filename} ({num_tokens} tokens)")
     return filename
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Generate reveal test data CSVs.")
+    parser.add_argument("--tokens", default=NUM_TOKENS, type=int, help="Tokens per CSV file.")
+    parser.add_argument("--files", default=NUM_CSV_FILES, type=int, help="Number of CSV files (runs).")
+    parser.add_argument("--out", default=OUTPUT_DIR, type=Path, help="Output directory.")
+    args = parser.parse_args()
+    if args.tokens < 1:
+        parser.error("--tokens must be at least 1")
+    if args.files < 1:
+        parser.error("--files must be at least 1")
+    
+    args.out.mkdir(parents=True, exist_ok=True)
+    
     print("=" * 60)
     print("GENERATING REVEAL TEST DATA")
     print("=" * 60)
-    print(f"Output directory: {OUTPUT_DIR}")
-    print(f"Generating {NUM_CSV_FILES} CSV files with {NUM_TOKENS} tokens each")
+    print(f"Output directory: {args.out}")
+    print(f"Generating {args.files} CSV files with {args.tokens} tokens each")
     print()
     
     generated_files = []
-    for run_id in range(1, NUM_CSV_FILES + 1):
-        filename = generate_csv(run_id)
+    for run_id in range(1, args.files + 1):
+        filename = generate_csv(run_id, args.tokens, args.out)
         generated_files.append(filename)
     
     print()
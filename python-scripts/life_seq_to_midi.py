@@ -7,101 +7,118 @@ Usage:
     python3 python-scripts/life_seq_to_midi.py \
         --html OUTPUTS/life_lens_tone_token_1.html \
         --out OUTPUTS/life_lens_tone_token_1.mid
+
+    # Every token HTML in a directory (one .mid per file, written to --out or alongside)
+    python3 python-scripts/life_seq_to_midi.py --dir OUTPUTS/life-tokens --out OUTPUTS/life-midi
 """
 
 import argparse
-import json
-import re
+import mmap
+import sys
+from array import array
 from pathlib import Path
-from typing import List, Tuple
-
-
-TPQ = 480  # matches durations produced by SongAlgorithm
-
-
-def read_sequences(html_path: Path) -> Tuple[List[Tuple[int, int]], List[Tuple[int, int]]]:
-    text = html_path.read_text()
-    pattern = re.compile(r"const (base(?:Lead|Bass)Seq)=\[(.*?)\];", re.DOTALL)
-    raw = {}
-    for match in pattern.finditer(text):
-        key = match.group(1)
-        body = match.group(2)
-        body = body.replace("p:", '"p":').replace("d:", '"d":')
-        raw[key] = json.loads(f"[{body}]")
-
-    if "baseLeadSeq" not in raw or "baseBassSeq" not in raw:
-        raise RuntimeError("Could not find baseLeadSeq/baseBassSeq in HTML.")
-
-    lead = [(int(evt["p"]), int(evt["d"])) for evt in raw["baseLeadSeq"]]
-    bass = [(int(evt["p"]), int(evt["d"])) for evt in raw["baseBassSeq"]]
+from typing import Iterator, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "original-scripts"))
+from midi_writer import write_lead_bass_midi
+
+
+# LifeToneScript emits `const baseLeadSeq=[{p:<int16>,d:<uint16>},...];` with no whitespace
+SEQUENCE_MARKERS = (b"const baseLeadSeq=[", b"const baseBassSeq=[")
+EVENT_PUNCTUATION = b"{}pd: \t\r\n"
+PITCH_RANGE = (-1, 127)  # -1 is a rest; anything else must be a MIDI note number
+DURATION_RANGE = (0, 0xFFFF)  # uint16 ticks, as in the contract
+
+
+class EventSeq:
+    """(pitch, duration) events held as int16 pitches / uint16 durations, as in the contract"""
+
+    def __init__(self, pitches: array, durations: array):
+        self.pitches = pitches
+        self.durations = durations
+
+    def __len__(self) -> int:
+        return len(self.pitches)
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        return zip(self.pitches, self.durations)
+
+
+def parse_event_array(body: bytes, label: str = "event sequence") -> EventSeq:
+    """`{p:60,d:480},{p:-1,d:960}` -> EventSeq without building a dict per event"""
+    values = body.translate(None, EVENT_PUNCTUATION).split(b",") if body.strip() else []
+    if len(values) % 2:
+        raise RuntimeError(f"Malformed {label}: odd number of p/d values.")
+    try:
+        numbers = array("l", map(int, values))
+    except (OverflowError, ValueError) as exc:
+        raise RuntimeError(f"Malformed {label}: {exc}") from exc
+    pitches, durations = numbers[0::2], numbers[1::2]
+    for name, column, (low, high) in (("pitch", pitches, PITCH_RANGE), ("duration", durations, DURATION_RANGE)):
+        if column and not (low <= min(column) and max(column) <= high):
+            bad = next(value for value in column if not low <= value <= high)
+            raise RuntimeError(f"Malformed {label}: {name} {bad} out of range {low}..{high}.")
+    return EventSeq(array("h", pitches), array("H", durations))
+
+
+def read_sequences(html_path: Path) -> Tuple[EventSeq, EventSeq]:
+    """Memory-map the HTML and parse only the two sequence literals (Tone.js and fonts are never decoded)"""
+    with open(html_path, "rb") as f:
+        if not f.seek(0, 2):
+            raise RuntimeError("Could not find baseLeadSeq/baseBassSeq in HTML.")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            sequences = []
+            for marker in SEQUENCE_MARKERS:
+                start = view.find(marker)
+                end = view.find(b"]", start) if start >= 0 else -1
+                if end < 0:
+                    raise RuntimeError("Could not find baseLeadSeq/baseBassSeq in HTML.")
+                label = f"{marker[6:-2].decode()} in {html_path.name}"  # e.g. baseLeadSeq in token_1.html
+                sequences.append(parse_event_array(view[start + len(marker):end], label))
+    lead, bass = sequences
     return lead, bass
 
 
-def encode_var_len(value: int) -> bytes:
-    """Standard variable-length quantity encoding (big endian, 7 bits per byte)."""
-    buffer = value & 0x7F
-    value >>= 7
-    out = bytearray([buffer])
-    while value:
-        buffer = value & 0x7F
-        value >>= 7
-        out.insert(0, buffer | 0x80)
-    return bytes(out)
-
-
-def build_track(events: List[Tuple[int, int]], channel: int) -> bytes:
-    data = bytearray()
-    rest = 0
-    for pitch, duration in events:
-        if pitch < 0:
-            rest += duration
+def convert_html(html_path: Path, midi_path: Path) -> Tuple[int, int]:
+    """Returns (lead notes, bass notes) written"""
+    lead, bass = read_sequences(html_path)
+    write_lead_bass_midi(midi_path, lead, bass)
+    return len(lead), len(bass)
+
+
+def convert_directory(html_dir: Path, out_dir: Optional[Path], pattern: str = "*.html") -> int:
+    """Convert every matching HTML file; files without sequences are reported and skipped"""
+    out_dir = out_dir or html_dir
+    out_dir.mkdir(parents=True, exist_ok=True)
+    converted = 0
+    for html_path in sorted(html_dir.glob(pattern)):
+        midi_path = out_dir / html_path.with_suffix(".mid").name
+        try:
+            lead_count, bass_count = convert_html(html_path, midi_path)
+        except RuntimeError as exc:
+            print(f"Skipping {html_path.name}: {exc}")
             continue
-
-        data.extend(encode_var_len(rest))
-        data.extend(bytes([0x90 | channel, pitch, 0x50]))
-        data.extend(encode_var_len(duration))
-        data.extend(bytes([0x80 | channel, pitch, 0x00]))
-        rest = 0
-
-    data.extend(encode_var_len(rest))
-    data.extend(b"\xFF\x2F\x00")
-    return b"MTrk" + len(data).to_bytes(4, "big") + data
-
-
-def build_header(num_tracks: int) -> bytes:
-    return (
-        b"MThd"
-        + (6).to_bytes(4, "big")
-        + (1).to_bytes(2, "big")  # format 1
-        + (num_tracks).to_bytes(2, "big")
-        + TPQ.to_bytes(2, "big")
-    )
-
-
-def build_tempo_track(bpm: int = 120) -> bytes:
-    micros = int(60_000_000 / bpm)
-    data = bytearray()
-    data.extend(b"\x00\xFF\x51\x03" + micros.to_bytes(3, "big"))  # tempo
-    data.extend(b"\x00\xFF\x58\x04\x04\x02\x18\x08")  # 4/4
-    data.extend(b"\x00\xFF\x2F\x00")
-    return b"MTrk" + len(data).to_bytes(4, "big") + data
+        converted += 1
+        print(f"{html_path.name} -> {midi_path.name} ({lead_count} lead, {bass_count} bass)")
+    return converted
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Convert Life lens sequences to MIDI.")
     parser.add_argument("--html", default="OUTPUTS/life_lens_tone_token_1.html", type=Path, help="Path to generated HTML file.")
-    parser.add_argument("--out", default="OUTPUTS/life_lens_tone_token_1.mid", type=Path, help="Destination MIDI file.")
+    parser.add_argument("--out", type=Path, help="Destination MIDI file (directory with --dir).")
+    parser.add_argument("--dir", type=Path, help="Convert every token HTML file in this directory.")
+    parser.add_argument("--pattern", default="*.html", help="Glob used with --dir.")
     args = parser.parse_args()
 
-    lead, bass = read_sequences(args.html)
-    header = build_header(3)
-    tempo = build_tempo_track()
-    lead_track = build_track(lead, channel=0)
-    bass_track = build_track(bass, channel=1)
+    if args.dir:
+        converted = convert_directory(args.dir, args.out, args.pattern)
+        print(f"Converted {converted} HTML files from {args.dir}")
+        return
 
-    midi_bytes = header + tempo + lead_track + bass_track
-    args.out.write_bytes(midi_bytes)
-    print(f"Wrote MIDI with {len(lead)} lead notes and {len(bass)} bass notes to {args.out}")
+    out = args.out or Path("OUTPUTS/life_lens_tone_token_1.mid")
+    lead_count, bass_count = convert_html(args.html, out)
+    print(f"Wrote MIDI with {lead_count} lead notes and {bass_count} bass notes to {out}")
 
 
 if __name__ == "__main__":
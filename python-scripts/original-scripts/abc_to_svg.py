@@ -4,8 +4,14 @@ ABC to SVG renderer for THE LONG SONG
 Reads ABC notation and generates staff notation SVGs.
 """
 
-import re
-from typing import List, Tuple, Dict, Optional, Union
+import os
+import hashlib
+from collections import OrderedDict
+from pathlib import Path
+from functools import lru_cache
+from typing import Iterable, Iterator, List, NamedTuple, Tuple, Dict, Optional, Union
+
+from full_musiclib_v3 import CompleteMusicLibV3, Event
 
 # Staff geometry (matches our canonical SVG layout)
 CANVAS_SIZE = 600
@@ -107,39 +113,80 @@ BASS_PITCHES = {
     'b': -1,   # B2 - space above top line
 }
 
-def parse_abc_pitch(abc_note: str) -> Tuple[str, int, bool]:
+# ABC tokenizer: one pass over each line, no per-note regex work
+ABC_NOTE_LETTERS = frozenset('ABCDEFGabcdefgz')
+ABC_ACCIDENTALS = frozenset('^=_')
+ABC_OCTAVE_MARKS = frozenset("',")
+ABC_DURATION_CHARS = frozenset('0123456789/')
+VOICE_NAMES = {'1': 'treble', '2': 'bass'}
+
+class AbcNote(NamedTuple):
+    """One note or rest token from an ABC body."""
+    text: str        # Source text, e.g. "^F,2"
+    pitch: str       # Note letter with original case ('z' for rests)
+    accidental: str  # '^', '_', '=' (or doubled), '' if none
+    octave: int      # Apostrophes minus commas
+    duration: str    # Duration suffix, e.g. '2', '/2', '' for unit length
+    is_rest: bool
+    
+    def __str__(self) -> str:
+        return self.text
+
+def scan_abc_notes(line: str) -> Iterator[AbcNote]:
+    """Yield note/rest tokens from one line of ABC music."""
+    i = 0
+    n = len(line)
+    while i < n:
+        letter = line[i]
+        if letter not in ABC_NOTE_LETTERS:
+            i += 1
+            continue
+        
+        # Accidentals sit directly in front of the note letter
+        start = i
+        while start > 0 and line[start - 1] in ABC_ACCIDENTALS:
+            start -= 1
+        accidental = line[start:i]
+        
+        i += 1
+        octave = 0
+        while i < n and line[i] in ABC_OCTAVE_MARKS:
+            octave += 1 if line[i] == "'" else -1
+            i += 1
+        
+        duration_start = i
+        while i < n and line[i] in ABC_DURATION_CHARS:
+            i += 1
+        
+        yield AbcNote(line[start:i], letter, accidental, octave, line[duration_start:i], letter == 'z')
+
+@lru_cache(maxsize=None)
+def parse_abc_note(abc_note: str) -> AbcNote:
+    """Tokenize a single ABC note string (cached - the note vocabulary is tiny)."""
+    for note in scan_abc_notes(abc_note):
+        return note
+    return AbcNote(abc_note, '', '', 0, '', False)
+
+def as_abc_note(abc_note: Union[str, AbcNote]) -> AbcNote:
+    return abc_note if isinstance(abc_note, AbcNote) else parse_abc_note(abc_note)
+
+def parse_abc_pitch(abc_note: Union[str, AbcNote]) -> Tuple[str, int, bool]:
     """
     Parse ABC pitch notation into (pitch_class, octave_adjustment, is_lowercase).
     
     Returns:
-        pitch_class: Uppercase letter (C, D, E, F, G, A, B)
+        pitch_class: Note letter, original case (accidentals don't affect staff position)
         octave_adjustment: Number of octaves to adjust (negative = lower)
         is_lowercase: Whether the original was lowercase
     """
-    # Remove duration numbers and other modifiers
-    clean_note = re.sub(r'[0-9/]+', '', abc_note)
-    
-    # Remove accidentals (^, =, _) - they don't affect staff position
-    clean_note = re.sub(r'[\^=_]+', '', clean_note)
-    
-    # Check if original was lowercase before converting
-    is_lowercase = clean_note[0].islower() if clean_note else False
-    
-    # Count octave modifiers
-    comma_count = clean_note.count(',')
-    apostrophe_count = clean_note.count("'")
-    
-    # Extract base pitch (keep original case for now)
-    base_pitch = clean_note.replace(',', '').replace("'", '')
-    
-    # Calculate octave adjustment from modifiers only
-    octave_adj = apostrophe_count - comma_count
-        
-    return base_pitch, octave_adj, is_lowercase
+    note = as_abc_note(abc_note)
+    return note.pitch, note.octave, note.pitch.islower()
 
-def pitch_to_step(staff: str, abc_note: str) -> int:
+def pitch_to_step(staff: str, abc_note: Union[str, AbcNote]) -> int:
     """Convert ABC notation to staff step position - FIXED VERSION."""
-    pitch_with_case, octave_adj, is_lowercase = parse_abc_pitch(abc_note)
+    note = as_abc_note(abc_note)
+    pitch_with_case = note.pitch
+    octave_adj = note.octave
     
     if staff == 'treble':
         # Check both uppercase and lowercase mappings
@@ -148,14 +195,8 @@ def pitch_to_step(staff: str, abc_note: str) -> int:
         elif pitch_with_case.upper() in TREBLE_PITCHES_UPPER:
             base_step = TREBLE_PITCHES_UPPER[pitch_with_case.upper()]
         else:
-            # Handle notes with apostrophes built into the mapping
-            pitch_upper = pitch_with_case.upper()
-            if pitch_with_case.lower() + "'" in TREBLE_PITCHES:
-                base_step = TREBLE_PITCHES[pitch_with_case.lower() + "'"]
-                octave_adj -= 1  # Already accounted for one apostrophe
-            else:
-                # Default mapping for unmapped notes
-                base_step = 6  # Default to G4 position
+            # Default mapping for unmapped notes
+            base_step = 6  # Default to G4 position
     else:  # bass
         # For bass clef, use the pitch with its original case
         if pitch_with_case in BASS_PITCHES:
@@ -163,9 +204,6 @@ def pitch_to_step(staff: str, abc_note: str) -> int:
         elif pitch_with_case.upper() in BASS_PITCHES:
             # If we only have uppercase but the note was uppercase, use it
             base_step = BASS_PITCHES[pitch_with_case.upper()]
-        elif pitch_with_case.lower() in BASS_PITCHES:
-            # If we only have lowercase but the note was lowercase, use it  
-            base_step = BASS_PITCHES[pitch_with_case.lower()]
         else:
             base_step = 4  # Default to D3 position
     
@@ -269,43 +307,77 @@ def generate_octave_marking(x: float, y: float, marking: str, staff: str, stem_d
     
     return '\n    '.join(elements)
 
-def get_note_duration(abc_note: str) -> Tuple[str, bool]:
-    """Extract note duration from ABC notation. Returns (base_type, is_dotted)."""
-    # Remove pitch and modifiers, keep only duration
-    duration_match = re.search(r'[0-9/]+$', abc_note)
-    if duration_match:
-        duration = duration_match.group()
-        # Map durations relative to L:1/8 unit length
-        # F2 = F × 2 × (1/8) = quarter note
-        # F3 = F × 3 × (1/8) = dotted quarter (3/8 = 1.5 × 1/4)
-        # F4 = F × 4 × (1/8) = half note  
-        # F6 = F × 6 × (1/8) = dotted half (3/4 = 1.5 × 1/2)
-        # F8 = F × 8 × (1/8) = whole note
-        # F12 = F × 12 × (1/8) = dotted whole (3/2 = 1.5 × 1)
-        if duration in ['12']:      # Dotted whole note 
-            return 'whole', True
-        elif duration in ['8']:      # Whole note
-            return 'whole', False
-        elif duration in ['6']:      # Dotted half note
-            return 'half', True
-        elif duration in ['4']:      # Half note
-            return 'half', False
-        elif duration in ['3']:      # Dotted quarter note
-            return 'quarter', True
-        elif duration in ['2']:      # Quarter note
-            return 'quarter', False
-        elif duration in ['1', '']: # Eighth note
-            return 'eighth', False
-        elif duration in ['/2', '1/2']:  # Sixteenth note
-            return 'sixteenth', False
-    else:
-        # No duration number = unit length = eighth note
-        return 'eighth', False
+class StaffPlacement(NamedTuple):
+    """Where a pitched note lands on its staff, with its pre-rendered ledger lines and 8va/8vb."""
+    y: float
+    step: int               # Final step after 8va/8vb transposition
+    stem_direction: str
+    octave_marking: Optional[str]
+    ledger_svg: str         # Ledger lines at NOTE_X ('' if none)
+    octave_svg: str         # 8va/8vb marking at NOTE_X ('' if none)
+
+def compute_staff_placement(staff: str, abc_note: Union[str, AbcNote]) -> StaffPlacement:
+    """Run the full step -> transposition -> stem -> ledger chain for one note."""
+    step = pitch_to_step(staff, abc_note)
+    y = y_for_step(staff, step)
+    
+    # Apply 8va/8vb transposition if needed
+    y, octave_marking, final_step = apply_octave_transposition(y, step, staff)
+    
+    # Determine stem direction
+    stem_direction = get_stem_direction(final_step, staff)
     
+    # Ledger lines use the final step after transposition
+    ledger_svg = generate_ledger_lines(NOTE_X, y, final_step, staff)
+    octave_svg = generate_octave_marking(NOTE_X, y, octave_marking, staff, stem_direction) if octave_marking else ''
+    
+    return StaffPlacement(y, final_step, stem_direction, octave_marking, ledger_svg, octave_svg)
+
+# Placement depends only on (staff, note letter, octave marks) - accidentals and duration don't move
+# the note head. Covers every pitch pitch_to_abc can emit (up to 4 commas / 4 apostrophes) on both staves.
+PLACEMENT_OCTAVES = range(-4, 5)
+STAFF_PLACEMENTS: Dict[Tuple[str, str, int], StaffPlacement] = {
+    (staff, letter, octave): compute_staff_placement(staff, AbcNote('', letter, '', octave, '', False))
+    for staff in ('treble', 'bass')
+    for letter in 'CDEFGABcdefgab'
+    for octave in PLACEMENT_OCTAVES
+}
+
+def staff_placement(staff: str, abc_note: Union[str, AbcNote]) -> StaffPlacement:
+    """Table lookup of a note's placement (computed and remembered if outside the table)."""
+    note = as_abc_note(abc_note)
+    key = (staff, note.pitch, note.octave)
+    placement = STAFF_PLACEMENTS.get(key)
+    if placement is None:
+        placement = STAFF_PLACEMENTS[key] = compute_staff_placement(staff, note)
+    return placement
+
+# Durations relative to L:1/8 unit length
+# F2 = F × 2 × (1/8) = quarter note
+# F3 = F × 3 × (1/8) = dotted quarter (3/8 = 1.5 × 1/4)
+# F4 = F × 4 × (1/8) = half note  
+# F6 = F × 6 × (1/8) = dotted half (3/4 = 1.5 × 1/2)
+# F8 = F × 8 × (1/8) = whole note
+# F12 = F × 12 × (1/8) = dotted whole (3/2 = 1.5 × 1)
+NOTE_DURATIONS = {
+    '12': ('whole', True),
+    '8': ('whole', False),
+    '6': ('half', True),
+    '4': ('half', False),
+    '3': ('quarter', True),
+    '2': ('quarter', False),
+    '1': ('eighth', False),
+    '': ('eighth', False),  # No duration number = unit length = eighth note
+    '/2': ('sixteenth', False),
+    '1/2': ('sixteenth', False),
+}
+
+def get_note_duration(abc_note: Union[str, AbcNote]) -> Tuple[str, bool]:
+    """Extract note duration from ABC notation. Returns (base_type, is_dotted)."""
     # Default to quarter note for unrecognized durations
-    return 'quarter', False
+    return NOTE_DURATIONS.get(as_abc_note(abc_note).duration, ('quarter', False))
 
-def generate_rest_element(x: float, y: float, abc_note: str, size: int = 60) -> str:
+def generate_rest_element(x: float, y: float, abc_note: Union[str, AbcNote], size: int = 60, glyph_source: str = '') -> str:
     """Generate rest element based on duration."""
     # Get rest type from ABC duration
     rest_type, is_dotted = get_note_duration(abc_note)
@@ -327,18 +399,45 @@ def generate_rest_element(x: float, y: float, abc_note: str, size: int = 60) ->
     display_width = int((vb_width / vb_height) * display_height)
     
     # Rest positioning - center on the staff position
-    rest_element = f'<use xlink:href="#{glyph_id}" href="#{glyph_id}" x="{x-display_width//2}" y="{y-display_height//2}" width="{display_width}" height="{display_height}"/>'
+    rest_element = f'<use xlink:href="{glyph_source}#{glyph_id}" href="{glyph_source}#{glyph_id}" x="{x-display_width//2}" y="{y-display_height//2}" width="{display_width}" height="{display_height}"/>'
     
     # Add dot for dotted rests
     if is_dotted:
         dot_x = x + 35  # Same spacing as notes for consistency
         dot_y = y - 16  # Same spacing as notes for consistency
-        dot_element = f'<use xlink:href="#dot" href="#dot" x="{dot_x}" y="{dot_y}" width="12" height="12"/>'
+        dot_element = f'<use xlink:href="{glyph_source}#dot" href="{glyph_source}#dot" x="{dot_x}" y="{dot_y}" width="12" height="12"/>'
         return rest_element + '\n    ' + dot_element
     
     return rest_element
 
-def generate_note_element(x: float, y: float, abc_note: str, stem_direction: str = "up", size: int = 60) -> str:
+# Head center coordinates in glyph space - NORMALIZED X POSITIONS
+# All note types aligned to same X coordinate for consistent horizontal positioning
+NOTE_HEAD_CENTERS = {
+    'quarter-up': (13.5, 68.46),     # Reference position
+    'quarter-down': (13.5, 15.16 - 8),   # Same X as quarter-up
+    'half-up': (14.5, 61.0 + 8 - 0.75),  # Nudged 0.5px more down for ledger alignment 
+    'half-down': (14.5, 22.0 - 12 - 0.75), # Nudged 0.5px more down for ledger alignment
+    'eighth-up': (13.5, 60.0 + 8.5),     # Nudged down 0.5px more (was 60.0 + 9)
+    'eighth-down': (13.5, 20.0 - 9.5),   # Nudged down 0.5px more (was 20.0 - 9)
+    'sixteenth-up': (13.5, 68.0),        # Estimate - similar to quarter-up
+    'sixteenth-down': (13.5, 15.0),      # Estimate - similar to quarter-down
+    'whole': (13.5, 12.02 - 2),          # Normalized to 13.5 (was 16.67)
+}
+
+# Glyph viewBox dimensions for scaling
+NOTE_VIEWBOXES = {
+    'quarter-up': (27.06, 83.62),
+    'quarter-down': (27.06, 83.62),
+    'half-up': (28.42, 83.76),
+    'half-down': (28.42, 83.76),
+    'eighth-up': (52.58, 83.76),
+    'eighth-down': (30.7, 83.68),
+    'sixteenth-up': (53.34, 83.72),
+    'sixteenth-down': (29.68, 83.72),
+    'whole': (33.34, 24.03),
+}
+
+def generate_note_element(x: float, y: float, abc_note: Union[str, AbcNote], stem_direction: str = "up", size: int = 60, glyph_source: str = '') -> str:
     """Generate simple SVG use element for note placement."""
     # Get note type from ABC duration
     note_type, is_dotted = get_note_duration(abc_note)
@@ -349,37 +448,9 @@ def generate_note_element(x: float, y: float, abc_note: str, stem_direction: str
     else:
         glyph_id = f'{note_type}-{stem_direction}'
     
-    # Head center coordinates in glyph space - NORMALIZED X POSITIONS
-    # All note types aligned to same X coordinate for consistent horizontal positioning
-    head_centers = {
-        'quarter-up': (13.5, 68.46),     # Reference position
-        'quarter-down': (13.5, 15.16 - 8),   # Same X as quarter-up
-        'half-up': (14.5, 61.0 + 8 - 0.75),  # Nudged 0.5px more down for ledger alignment 
-        'half-down': (14.5, 22.0 - 12 - 0.75), # Nudged 0.5px more down for ledger alignment
-        'eighth-up': (13.5, 60.0 + 8.5),     # Nudged down 0.5px more (was 60.0 + 9)
-        'eighth-down': (13.5, 20.0 - 9.5),   # Nudged down 0.5px more (was 20.0 - 9)
-        'sixteenth-up': (13.5, 68.0),        # Estimate - similar to quarter-up
-        'sixteenth-down': (13.5, 15.0),      # Estimate - similar to quarter-down
-        'whole': (13.5, 12.02 - 2),          # Normalized to 13.5 (was 16.67)
-    }
-    
-    # Get head center for this glyph type
-    head_center_x, head_center_y = head_centers.get(glyph_id, (13.5, 15.16))
-    
-    # Calculate viewBox dimensions for scaling
-    viewboxes = {
-        'quarter-up': (27.06, 83.62),
-        'quarter-down': (27.06, 83.62),
-        'half-up': (28.42, 83.76),
-        'half-down': (28.42, 83.76),
-        'eighth-up': (52.58, 83.76),
-        'eighth-down': (30.7, 83.68),
-        'sixteenth-up': (53.34, 83.72),
-        'sixteenth-down': (29.68, 83.72),
-        'whole': (33.34, 24.03),
-    }
-    
-    vb_width, vb_height = viewboxes.get(glyph_id, (27.06, 83.62))
+    # Get head center and viewBox dimensions for this glyph type
+    head_center_x, head_center_y = NOTE_HEAD_CENTERS.get(glyph_id, (13.5, 15.16))
+    vb_width, vb_height = NOTE_VIEWBOXES.get(glyph_id, (27.06, 83.62))
     
     # Calculate actual display size maintaining aspect ratio  
     if note_type == 'whole':
@@ -396,149 +467,65 @@ def generate_note_element(x: float, y: float, abc_note: str, stem_direction: str
     offset_x = x - (head_center_x * scale_factor)
     offset_y = y - (head_center_y * scale_factor) - 5  # Nudge up by 5px
     
-    note_element = f'<use xlink:href="#{glyph_id}" href="#{glyph_id}" x="{offset_x:.1f}" y="{offset_y:.1f}" width="{display_width}" height="{display_height}"/>'
+    note_element = f'<use xlink:href="{glyph_source}#{glyph_id}" href="{glyph_source}#{glyph_id}" x="{offset_x:.1f}" y="{offset_y:.1f}" width="{display_width}" height="{display_height}"/>'
     
     # Add dot for dotted notes
     if is_dotted:
         # Position dot to the right of note head (final positioning - bigger and further)
         dot_x = x + 35  # Much further right of note head
         dot_y = y - 16  # Much higher up from note center
-        dot_element = f'<use xlink:href="#dot" href="#dot" x="{dot_x}" y="{dot_y}" width="12" height="12"/>'
+        dot_element = f'<use xlink:href="{glyph_source}#dot" href="{glyph_source}#dot" x="{dot_x}" y="{dot_y}" width="12" height="12"/>'
         return note_element + '\n    ' + dot_element
     
     return note_element
 
-def parse_abc_file(filepath: str) -> Dict[str, List[str]]:
+def iter_abc_voice_notes(lines: Iterable[str]) -> Iterator[Tuple[str, AbcNote]]:
+    """Yield (voice, note) for every note/rest in an ABC body, in order."""
+    current_voice = None
+    
+    for line in lines:
+        line = line.strip()
+        
+        # Voice headers (can be mid-line)
+        marker = line.rfind('V:')
+        voice = VOICE_NAMES.get(line[marker + 2:marker + 3]) if marker != -1 else None
+        if voice:
+            current_voice = voice
+            # Extract any notes after the voice marker
+            line = line[marker + 3:].strip()
+            if not line or 'clef=' in line or 'name=' in line:
+                continue
+        elif line.startswith(('X:', 'T:', 'C:', 'M:', 'L:', 'Q:', 'K:', '%')) or 'clef=' in line or 'name=' in line:
+            continue
+        
+        # Skip empty lines, or if no voice is set
+        if not line or current_voice is None:
+            continue
+        
+        notes = list(scan_abc_notes(line))
+        
+        # Only process lines that look like musical notation (contain | or pitched notes)
+        if '|' not in line and all(note.is_rest for note in notes):
+            continue
+        
+        for note in notes:
+            yield current_voice, note
+
+def parse_abc_file(filepath: str) -> Dict[str, List[AbcNote]]:
     """
     Parse ABC file and extract notes by voice.
-    Returns dict like {'treble': ['F', 'G', ...], 'bass': ['G,,', 'B,,']}
+    Returns dict like {'treble': [AbcNote('F', ...), ...], 'bass': [AbcNote('G,,', ...), ...]}
     """
     voices = {'treble': [], 'bass': []}
-    current_voice = None
     
     with open(filepath, 'r') as f:
-        for line in f:
-            line = line.strip()
-            
-            # Voice headers (can be mid-line)
-            if 'V:1' in line:
-                current_voice = 'treble'
-                # Extract any notes after the voice marker
-                line = line.split('V:1')[-1].strip()
-                if not line or 'clef=' in line or 'name=' in line:
-                    continue
-            elif 'V:2' in line:
-                current_voice = 'bass'
-                # Extract any notes after the voice marker
-                line = line.split('V:2')[-1].strip()
-                if not line or 'clef=' in line or 'name=' in line:
-                    continue
-            elif line.startswith('%%score'):
-                continue
-            elif line.startswith(('X:', 'T:', 'C:', 'M:', 'L:', 'Q:', 'K:', '%')) or 'clef=' in line or 'name=' in line:
-                continue
-                
-            # Skip empty lines, non-note lines, or if no voice is set
-            if not line or current_voice is None:
-                continue
-                
-            # Only process lines that look like musical notation (contain | or notes)
-            if not ('|' in line or re.search(r'[A-Ga-g]', line)):
-                continue
-                
-            # Extract notes from the line
-            # Split by spaces and bars, extract note patterns
-            parts = re.split(r'[|\s]+', line)
-            for part in parts:
-                if not part:
-                    continue
-                    
-                # Find all note patterns (letter + optional modifiers + optional duration)
-                # Also include rests (z)
-                notes = re.findall(r"[A-Ga-gz][',]*[0-9/]*", part)
-                voices[current_voice].extend(notes)
+        for voice, note in iter_abc_voice_notes(f):
+            voices[voice].append(note)
     
     return voices
 
-def generate_svg(treble_notes: List[str], bass_notes: List[str], beat_index: int = 0) -> str:
-    """Generate SVG for specific beat (default first beat)."""
-    
-    # Get the specific beat notes (or empty if not enough notes)
-    treble_note = treble_notes[beat_index] if beat_index < len(treble_notes) else None
-    bass_note = bass_notes[beat_index] if beat_index < len(bass_notes) else None
-    
-    # Generate note elements, ledger lines, and octave markings
-    note_elements = []
-    ledger_elements = []
-    octave_elements = []
-    
-    if treble_note:
-        if treble_note.startswith('z'):
-            # Handle rest - place in middle of treble staff
-            rest_element = generate_rest_element(NOTE_X, y_for_step('treble', 4), treble_note)
-            note_elements.append(f'    {rest_element}')
-        else:
-            step = pitch_to_step('treble', treble_note)
-            y = y_for_step('treble', step)
-            
-            # Apply 8va/8vb transposition if needed
-            y, octave_marking, final_step = apply_octave_transposition(y, step, 'treble')
-            
-            # Determine stem direction
-            stem_direction = get_stem_direction(final_step, 'treble')
-            
-            note_element = generate_note_element(NOTE_X, y, treble_note, stem_direction)
-            note_elements.append(f'    {note_element}')
-            
-            # Add ledger lines if needed (use final step after transposition)
-            ledger_lines = generate_ledger_lines(NOTE_X, y, final_step, 'treble')
-            if ledger_lines:
-                ledger_elements.append(f'    {ledger_lines}')
-                
-            # Add octave marking if needed
-            if octave_marking:
-                octave_mark = generate_octave_marking(NOTE_X, y, octave_marking, 'treble', stem_direction)
-                if octave_mark:
-                    octave_elements.append(f'    {octave_mark}')
-        
-    if bass_note:
-        if bass_note.startswith('z'):
-            # Handle rest - place in middle of bass staff
-            rest_element = generate_rest_element(NOTE_X, y_for_step('bass', 4), bass_note)
-            note_elements.append(f'    {rest_element}')
-        else:
-            step = pitch_to_step('bass', bass_note)
-            y = y_for_step('bass', step)
-            
-            # Apply 8va/8vb transposition if needed
-            y, octave_marking, final_step = apply_octave_transposition(y, step, 'bass')
-            
-            # Determine stem direction
-            stem_direction = get_stem_direction(final_step, 'bass')
-            
-            note_element = generate_note_element(NOTE_X, y, bass_note, stem_direction)
-            note_elements.append(f'    {note_element}')
-            
-            # Add ledger lines if needed (use final step after transposition)
-            ledger_lines = generate_ledger_lines(NOTE_X, y, final_step, 'bass')
-            if ledger_lines:
-                ledger_elements.append(f'    {ledger_lines}')
-                
-            # Add octave marking if needed
-            if octave_marking:
-                octave_mark = generate_octave_marking(NOTE_X, y, octave_marking, 'bass', stem_direction)
-                if octave_mark:
-                    octave_elements.append(f'    {octave_mark}')
-    
-    notes_svg = '\n'.join(note_elements) if note_elements else '    <!-- No notes for this beat -->'
-    ledger_svg = '\n'.join(ledger_elements) if ledger_elements else ''
-    octave_svg = '\n'.join(octave_elements) if octave_elements else ''
-    
-    # SVG template with our canonical layout
-    svg = f'''<?xml version="1.0" encoding="UTF-8"?>
-<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" width="600" height="600" viewBox="0 0 600 600">
-  <defs>
-    <!-- Quarter notes -->
+# Glyph symbols shared by every beat (inline <defs>, external glyphs.svg sprite, or one sheet's defs)
+GLYPH_SYMBOLS = '''    <!-- Quarter notes -->
     <symbol id="quarter-up" viewBox="0 0 27.06 83.62">
       <path fill="currentColor" d="M27.06,68.46h0V.55c0-.3-.25-.55-.55-.55h-2.43c-.3,0-.55.25-.55.55v62.39c-3.59-1.78-9.07-1.46-14.24,1.23-7.18,3.73-11,10.59-8.55,15.31,2.46,4.72,10.26,5.53,17.44,1.79,5.99-3.11,8.9-8.42,8.87-12.81Z"/>
     </symbol>
@@ -594,9 +581,10 @@ def generate_svg(treble_notes: List[str], bass_notes: List[str], beat_index: int
     <symbol id="dot" viewBox="0 0 10 10">
       <circle cx="5" cy="5" r="4" fill="currentColor"/>
     </symbol>
-  </defs>
+'''
 
-  <rect x="0" y="0" width="600" height="600" fill="#fff"/>
+# White canvas, both staves and both clefs (identical on every beat)
+STAFF_SYSTEM = '''  <rect x="0" y="0" width="600" height="600" fill="#fff"/>
 
   <!-- Staves -->
   <g stroke="#000" fill="none" stroke-linecap="round">
@@ -627,8 +615,13 @@ def generate_svg(treble_notes: List[str], bass_notes: List[str], beat_index: int
     </g>
     <path d="M214.06,340.15c-8.33-9.26-18.45-14.9-29.31-17.36-2.36-.53-5.99-.96-9.15-.95-.08,0-.16,0-.25,0,0,0-.01,0-.02,0-.97,0-1.94.1-2.91.21-.01,0-.03,0-.04,0,0,0,0,0,0,0-.21.02-.43.05-.64.07-2.92.32-5.82.84-8.66,1.6-.65.17-1.3.36-1.94.56-1.68.52-3.33,1.13-4.95,1.81-12.09,5.09-24.25,15.41-28.44,34.5,0,0-1.99,10.95,6.81,19.6,5.43,5.53,13.86,7.52,21.44,4.33,9.91-4.17,14.57-15.59,10.39-25.51-3.01-7.15-9.8-11.5-17.06-11.84,3.35-3.41,7.43-6.05,11.82-7.92,3.5-1.49,7.2-2.5,10.96-3.09.39-.06.81-.08,1.22-.11,21.05,0,37.36,24.42,35.07,44.26-.49,4.23-1.27,8.42-2.3,12.55-4.34,17.33-12.38,34.28-25.13,46.93-4.35,4.32-9.46,7.23-14.9,9.79-2.49,1.17-5.08,2.22-7.44,3.64-3.23,1.95-6.16,7.86-.43,8.76,1.1.17,2.2,0,3.27-.3,6.83-1.95,13.03-5.5,18.84-9.5,1.82-1.25,3.6-2.55,5.35-3.90,20.4-15.67,36.92-38.53,39.73-64.65,1.68-15.56-.45-31.4-11.34-43.5Z"/>
   </g>
+'''
+
+SVG_OPEN = '''<?xml version="1.0" encoding="UTF-8"?>
+<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" width="{width}" height="{height}" viewBox="0 0 {width} {height}">
+'''
 
-  <!-- Ledger lines (drawn before notes so notes appear on top) -->
+BEAT_LAYERS = '''  <!-- Ledger lines (drawn before notes so notes appear on top) -->
   <g stroke="#000" fill="none">
 {ledger_svg}
   </g>
@@ -642,11 +635,253 @@ def generate_svg(treble_notes: List[str], bass_notes: List[str], beat_index: int
   <g style="color:#111; fill:currentColor">
 {notes_svg}
   </g>
-</svg>'''
+'''
+
+GLYPH_SPRITE_FILE = 'glyphs.svg'
+STAFF_SYSTEM_ID = 'staff-system'
+
+def shared_defs() -> str:
+    """<defs> block with every glyph symbol plus the staff system as one symbol."""
+    staff_symbol = '    ' + STAFF_SYSTEM.rstrip('\n').replace('\n', '\n  ') + '\n'
+    return ('  <defs>\n' + GLYPH_SYMBOLS
+            + f'    <symbol id="{STAFF_SYSTEM_ID}" viewBox="0 0 {CANVAS_SIZE} {CANVAS_SIZE}">\n'
+            + staff_symbol.replace('\n  \n', '\n\n')
+            + '    </symbol>\n  </defs>\n')
+
+def glyph_sprite_svg() -> str:
+    """Standalone glyphs.svg sprite, referenced as <use href="glyphs.svg#quarter-up">."""
+    return SVG_OPEN.format(width=CANVAS_SIZE, height=CANVAS_SIZE) + shared_defs() + '</svg>\n'
+
+def staff_system_use(glyph_source: str) -> str:
+    return (f'  <use xlink:href="{glyph_source}#{STAFF_SYSTEM_ID}" href="{glyph_source}#{STAFF_SYSTEM_ID}" '
+            f'x="0" y="0" width="{CANVAS_SIZE}" height="{CANVAS_SIZE}"/>\n')
+
+def assemble_beat_svg(ledger_svg: str, octave_svg: str, notes_svg: str, glyph_source: str = '') -> str:
+    """
+    Wrap one beat's layers in a full SVG document.
+    
+    glyph_source '' embeds the glyph <defs> (self-contained file); a sprite path such as
+    'glyphs.svg' references the shared sprite instead, which is most of each file's bytes.
+    """
+    layers = BEAT_LAYERS.format(ledger_svg=ledger_svg, octave_svg=octave_svg, notes_svg=notes_svg)
+    svg_open = SVG_OPEN.format(width=CANVAS_SIZE, height=CANVAS_SIZE)
+    if glyph_source:
+        return svg_open + staff_system_use(glyph_source) + '\n' + layers + '</svg>'
+    return svg_open + '  <defs>\n' + GLYPH_SYMBOLS + '  </defs>\n\n' + STAFF_SYSTEM + '\n' + layers + '</svg>'
+
+def render_sheet_svg(note_pairs: List[Tuple[Union[str, AbcNote, None], Union[str, AbcNote, None]]], columns: int = 8) -> str:
+    """Lay out many beats as a grid in one SVG document sharing a single <defs> block."""
+    rows = max(1, -(-len(note_pairs) // columns))
+    width = CANVAS_SIZE * min(columns, max(1, len(note_pairs)))
+    height = CANVAS_SIZE * rows
+    
+    parts = [SVG_OPEN.format(width=width, height=height), shared_defs()]
+    for index, (treble_note, bass_note) in enumerate(note_pairs):
+        x = (index % columns) * CANVAS_SIZE
+        y = (index // columns) * CANVAS_SIZE
+        ledger_svg, octave_svg, notes_svg = render_beat_layers(treble_note, bass_note)
+        parts.append(f'\n  <!-- Beat {index} -->\n  <g transform="translate({x} {y})">\n')
+        parts.append(staff_system_use(''))
+        parts.append(BEAT_LAYERS.format(ledger_svg=ledger_svg, octave_svg=octave_svg, notes_svg=notes_svg))
+        parts.append('  </g>\n')
+    parts.append('</svg>')
+    return ''.join(parts)
+
+def generate_svg(treble_notes: List[Union[str, AbcNote]], bass_notes: List[Union[str, AbcNote]], beat_index: int = 0) -> str:
+    """Generate SVG for specific beat (default first beat)."""
+    
+    # Get the specific beat notes (or empty if not enough notes)
+    treble_note = treble_notes[beat_index] if beat_index < len(treble_notes) else None
+    bass_note = bass_notes[beat_index] if beat_index < len(bass_notes) else None
+    
+    return render_note_pair(treble_note, bass_note)
+
+def render_note_pair(treble_note: Union[str, AbcNote, None], bass_note: Union[str, AbcNote, None], glyph_source: str = '') -> str:
+    """Generate the full SVG for one (treble, bass) note pair."""
+    ledger_svg, octave_svg, notes_svg = render_beat_layers(treble_note, bass_note, glyph_source)
+    return assemble_beat_svg(ledger_svg, octave_svg, notes_svg, glyph_source)
+
+def render_beat_layers(treble_note: Union[str, AbcNote, None], bass_note: Union[str, AbcNote, None], glyph_source: str = '') -> Tuple[str, str, str]:
+    """Render the (ledger, octave marking, note) layers for one beat."""
+    treble_note = as_abc_note(treble_note) if treble_note else None
+    bass_note = as_abc_note(bass_note) if bass_note else None
+    
+    # Generate note elements, ledger lines, and octave markings
+    note_elements = []
+    ledger_elements = []
+    octave_elements = []
+    
+    for staff, note in (('treble', treble_note), ('bass', bass_note)):
+        if not note:
+            continue
+        if note.is_rest:
+            # Handle rest - place in middle of the staff
+            rest_element = generate_rest_element(NOTE_X, y_for_step(staff, 4), note, glyph_source=glyph_source)
+            note_elements.append(f'    {rest_element}')
+            continue
+        
+        # Step, 8va/8vb transposition, stem direction, ledger lines and octave marking in one lookup
+        placement = staff_placement(staff, note)
+        
+        note_element = generate_note_element(NOTE_X, placement.y, note, placement.stem_direction, glyph_source=glyph_source)
+        note_elements.append(f'    {note_element}')
+        if placement.ledger_svg:
+            ledger_elements.append(f'    {placement.ledger_svg}')
+        if placement.octave_svg:
+            octave_elements.append(f'    {placement.octave_svg}')
+    
+    notes_svg = '\n'.join(note_elements) if note_elements else '    <!-- No notes for this beat -->'
+    ledger_svg = '\n'.join(ledger_elements) if ledger_elements else ''
+    octave_svg = '\n'.join(octave_elements) if octave_elements else ''
+    
+    return ledger_svg, octave_svg, notes_svg
+
+# Direct Event path: MIDI pitch + ticks straight to a note token, no ABC text to build and re-parse.
+# Spelling follows CompleteMusicLibV3.pitch_to_abc (Eb major flats).
+EVENT_PITCH_NAMES = (('C', ''), ('D', '_'), ('D', ''), ('E', '_'), ('E', ''), ('F', ''),
+                     ('G', '_'), ('G', ''), ('A', '_'), ('A', ''), ('B', '_'), ('B', ''))
+EVENT_MUSIC_LIB = CompleteMusicLibV3()
+
+@lru_cache(maxsize=None)
+def event_note(pitch: int, ticks: int) -> AbcNote:
+    """Note token for a MIDI pitch (-1 = rest) and duration in ticks."""
+    duration = EVENT_MUSIC_LIB.duration_to_abc(ticks)
+    if pitch < 0:
+        return AbcNote('z' + duration, 'z', '', 0, duration, True)
+    
+    letter, accidental = EVENT_PITCH_NAMES[pitch % 12]
+    octave = pitch // 12
+    if octave <= 3:
+        octave_marks = -(4 - octave)
+    elif octave == 4:
+        octave_marks = 0
+    else:
+        letter = letter.lower()
+        octave_marks = octave - 5
+    marks = "'" * octave_marks if octave_marks > 0 else ',' * -octave_marks
+    return AbcNote(accidental + letter + marks + duration, letter, accidental, octave_marks, duration, False)
+
+def event_to_note(event: Optional[Event]) -> Optional[AbcNote]:
+    return event_note(event.pitch, event.duration) if event else None
+
+def render_event_pair(lead_event: Optional[Event], bass_event: Optional[Event], glyph_source: str = '') -> str:
+    """Generate the full SVG for one beat straight from CompleteMusicLibV3 events (lead on treble, bass on bass)."""
+    return render_note_pair(event_to_note(lead_event), event_to_note(bass_event), glyph_source)
+
+
+# Renderer fingerprint: on-disk cache entries are only reused by the exact same renderer code
+RENDERER_FINGERPRINT = hashlib.sha256(Path(__file__).read_bytes()).hexdigest()[:16]
+ACCIDENTAL_DELETE = str.maketrans('', '', '^=_')
+
+def normalize_note_pair(treble_note: Union[str, AbcNote, None], bass_note: Union[str, AbcNote, None]) -> Tuple[Optional[str], Optional[str]]:
+    """Drop everything that doesn't change the rendered SVG (accidentals, empty notes)."""
+    def normalize(note: Union[str, AbcNote, None]) -> Optional[str]:
+        if not note:
+            return None
+        return str(note).translate(ACCIDENTAL_DELETE) or None
+    return normalize(treble_note), normalize(bass_note)
+
+def replace_file(path: Union[str, Path], text: str):
+    """
+    Write text to path through a temp file and os.replace. Output files may be hard links
+    into the render cache store, so writing in place would change every linked copy.
+    """
+    tmp_path = f'{path}.{os.getpid()}.tmp'  # Unique per worker process
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+class SvgRenderCache:
+    """
+    Content-addressed render cache keyed on the normalized (treble, bass) note pair.
+    
+    Keeps an in-memory LRU of rendered SVGs and, optionally, an on-disk store of
+    <key>.svg files. A timeline only has a few hundred distinct pairs, so batch
+    renders do one render per pair and write every other beat from cache (as a
+    hard link into the disk store when possible).
+    """
+    
+    def __init__(self, max_entries: int = 1024, cache_dir: Optional[str] = None, glyph_source: str = ''):
+        self.max_entries = max_entries
+        self.glyph_source = glyph_source
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.entries: 'OrderedDict[str, str]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
     
-    return svg
+    def key(self, treble_note: Union[str, AbcNote, None], bass_note: Union[str, AbcNote, None]) -> str:
+        treble, bass = normalize_note_pair(treble_note, bass_note)
+        return hashlib.sha256(f"{RENDERER_FINGERPRINT}|{self.glyph_source}|{treble or ''}|{bass or ''}".encode()).hexdigest()
+    
+    def store_path(self, key: str) -> Optional[Path]:
+        return self.cache_dir / f"{key}.svg" if self.cache_dir else None
+    
+    def get(self, treble_note: Union[str, AbcNote, None], bass_note: Union[str, AbcNote, None]) -> Tuple[str, str]:
+        """Return (key, svg) for a note pair, rendering at most once per distinct pair."""
+        key = self.key(treble_note, bass_note)
+        svg = self.entries.get(key)
+        if svg is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return key, svg
+        
+        store_path = self.store_path(key)
+        if store_path and store_path.exists():
+            svg = store_path.read_text()
+            self.hits += 1
+        else:
+            svg = render_note_pair(*normalize_note_pair(treble_note, bass_note), glyph_source=self.glyph_source)
+            self.misses += 1
+            if store_path:
+                replace_file(store_path, svg)
+        
+        self.entries[key] = svg
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return key, svg
+    
+    def write(self, treble_note: Union[str, AbcNote, None], bass_note: Union[str, AbcNote, None], output_file: str) -> Tuple[str, str]:
+        """Write the SVG for a note pair to output_file (hard link from the disk store if available)."""
+        key, svg = self.get(treble_note, bass_note)
+        store_path = self.store_path(key)
+        if store_path:
+            try:
+                if os.path.lexists(output_file):
+                    os.remove(output_file)
+                os.link(store_path, output_file)
+                return key, svg
+            except OSError:
+                pass  # Different filesystem / no hard links - fall back to writing bytes
+        replace_file(output_file, svg)
+        return key, svg
+
+# Per-process render cache for parallel batch renders (set by the pool initializer)
+WORKER_RENDER_CACHE = None
+RENDER_MANIFEST = 'render_manifest.json'
+
+def set_worker_render_cache(cache_dir: Optional[str], glyph_source: str):
+    global WORKER_RENDER_CACHE
+    WORKER_RENDER_CACHE = SvgRenderCache(cache_dir=cache_dir, glyph_source=glyph_source)
+
+def render_beat_chunk(chunk: List[Tuple[int, Optional[AbcNote], Optional[AbcNote], str]]) -> List[Tuple[int, str, str, int]]:
+    """Render and write a chunk of beats; returns (beat_index, render_key, sha256, bytes) per beat."""
+    results = []
+    for beat_index, treble_note, bass_note, output_file in chunk:
+        key, svg = WORKER_RENDER_CACHE.write(treble_note, bass_note, output_file)
+        data = svg.encode('utf-8')
+        results.append((beat_index, key, hashlib.sha256(data).hexdigest(), len(data)))
+    return results
 
-def parse_single_beat_file(filepath: str) -> Tuple[Optional[str], Optional[str]]:
+def file_sha256(path: str) -> Optional[str]:
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+def parse_single_beat_file(filepath: str) -> Tuple[Optional[AbcNote], Optional[AbcNote]]:
     """Parse a single beat ABC file and return (treble_note, bass_note)."""
     voices = parse_abc_file(filepath)
     treble_note = voices['treble'][0] if voices['treble'] else None
@@ -655,49 +890,97 @@ def parse_single_beat_file(filepath: str) -> Tuple[Optional[str], Optional[str]]
 
 def main():
     """Generate individual SVGs for all beats in the combined sequence."""
-    import os
+    import argparse
     import datetime
+    import json
+    import time
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from payload_archive import PayloadArchiveWriter
+    
+    parser = argparse.ArgumentParser(description="Render one SVG per beat of a combined ABC sequence.")
+    parser.add_argument("abc_file", help="Combined ABC sequence (e.g. outputs/<run>/combined_sequence.abc).")
+    parser.add_argument("--out", help="Output folder (default: outputs/abc_svg_batch_<timestamp>). "
+                                      "Re-running into the same folder only re-renders changed beats.")
+    parser.add_argument("--workers", type=int, default=1, help="Render worker processes (default: 1).")
+    parser.add_argument("--chunk-size", type=int, default=200, help="Beats per worker task (default: 200).")
+    parser.add_argument("--force", action="store_true", help="Re-render every beat even if its output is up to date.")
+    parser.add_argument("--pack", action="store_true", help="Write all beat SVGs into one .zip archive.")
+    parser.add_argument("--cache-dir", help="Persistent content-addressed SVG store (reused across runs).")
+    parser.add_argument("--sprite", action="store_true",
+                        help=f"Reference one shared {GLYPH_SPRITE_FILE} instead of embedding glyph defs in every beat.")
+    parser.add_argument("--sheet", type=int, metavar="N",
+                        help="Lay out N beats per SVG document (one defs block per sheet) instead of one file per beat.")
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+    if args.sheet is not None and args.sheet < 1:
+        parser.error("--sheet must be at least 1")
     
-    abc_file_path = '/Users/jonathanmann/SongADAO Dropbox/Jonathan Mann/projects/THE-LONG-SONG/algo-testing***/outputs/blockchain_simulation_20250927_183233/combined_sequence.abc'
+    glyph_source = GLYPH_SPRITE_FILE if args.sprite else ''
+    render_cache = SvgRenderCache(cache_dir=args.cache_dir, glyph_source=glyph_source)
     
     # Create timestamped output folder
     timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_base = 'outputs'
-    output_folder = f'{output_base}/abc_svg_batch_{timestamp}'
+    output_folder = args.out or f'outputs/abc_svg_batch_{timestamp}'
     
-    # Create directories if they don't exist
-    os.makedirs(output_folder, exist_ok=True)
+    # Create directories if they don't exist (or one archive in packed mode)
+    archive = None
+    if args.pack:
+        archive = PayloadArchiveWriter(f'{output_folder}.zip').open()
+    else:
+        os.makedirs(output_folder, exist_ok=True)
     
-    print(f"Processing ABC file: {abc_file_path}")
-    print(f"Output folder: {output_folder}")
+    print(f"Processing ABC file: {args.abc_file}")
+    print(f"Output {'archive' if archive else 'folder'}: {archive.path if archive else output_folder}")
     
     # Parse the ABC file
-    voices = parse_abc_file(abc_file_path)
+    voices = parse_abc_file(args.abc_file)
     
     print(f"\nParsed ABC file:")
     print(f"  Treble notes: {len(voices['treble'])} notes")
     print(f"  Bass notes: {len(voices['bass'])} notes")
-    print(f"  Sample treble: {voices['treble'][:5]}{'...' if len(voices['treble']) > 5 else ''}")
-    print(f"  Sample bass: {voices['bass'][:5]}{'...' if len(voices['bass']) > 5 else ''}")
+    print(f"  Sample treble: {[str(note) for note in voices['treble'][:5]]}{'...' if len(voices['treble']) > 5 else ''}")
+    print(f"  Sample bass: {[str(note) for note in voices['bass'][:5]]}{'...' if len(voices['bass']) > 5 else ''}")
     
     # Generate SVG for each beat
     max_beats = max(len(voices['treble']), len(voices['bass']))
-    print(f"\nGenerating {max_beats} individual beat SVGs...")
+    note_pairs = [
+        (voices['treble'][i] if i < len(voices['treble']) else None,
+         voices['bass'][i] if i < len(voices['bass']) else None)
+        for i in range(max_beats)
+    ]
+    started = time.perf_counter()
     
-    for beat_index in range(max_beats):
-        # Generate SVG for this beat
-        svg_content = generate_svg(voices['treble'], voices['bass'], beat_index)
-        
-        # Create descriptive filename
-        output_file = f'{output_folder}/beat_{beat_index:04d}.svg'
-        
-        with open(output_file, 'w') as f:
-            f.write(svg_content)
-        
-        # Show progress and beat info
-        treble_note = voices['treble'][beat_index] if beat_index < len(voices['treble']) else None
-        bass_note = voices['bass'][beat_index] if beat_index < len(voices['bass']) else None
-        
+    if args.sheet:
+        print(f"\nGenerating {max_beats} beats on sheets of {args.sheet}...")
+        sheet_count = 0
+        bytes_written = 0
+        for start in range(0, max_beats, args.sheet):
+            sheet_svg = render_sheet_svg(note_pairs[start:start + args.sheet])
+            sheet_name = f'sheet_{start:04d}.svg'
+            if archive:
+                archive.add(sheet_name, sheet_svg)
+            else:
+                replace_file(f'{output_folder}/{sheet_name}', sheet_svg)
+            sheet_count += 1
+            bytes_written += len(sheet_svg.encode('utf-8'))
+        if archive:
+            archive.close()
+        elapsed = time.perf_counter() - started
+        print(f"\n✓ Generated {sheet_count} sheet SVGs ({max_beats} beats) in: {archive.path if archive else output_folder}")
+        print(f"  Throughput: {max_beats / elapsed:,.0f} beats/s, {bytes_written:,} bytes written in {elapsed:.2f}s")
+        return
+    
+    if args.sprite:
+        if archive:
+            archive.add(GLYPH_SPRITE_FILE, glyph_sprite_svg())
+        else:
+            replace_file(f'{output_folder}/{GLYPH_SPRITE_FILE}', glyph_sprite_svg())
+    
+    for beat_index, (treble_note, bass_note) in enumerate(note_pairs):
+        # Show beat info
         beat_info = []
         if treble_note:
             beat_info.append(f"T:{treble_note}")
@@ -707,8 +990,73 @@ def main():
         if beat_index % 50 == 0 or beat_index < 10:  # Show first 10 and every 50th
             print(f"  Beat {beat_index:4d}: {' + '.join(beat_info) if beat_info else 'empty'}")
     
+    if archive:
+        print(f"\nPacking {max_beats} individual beat SVGs...")
+        bytes_written = 0
+        for beat_index, (treble_note, bass_note) in enumerate(note_pairs):
+            # Generate SVG for this beat (cached per distinct note pair) under a descriptive filename
+            _, svg_content = render_cache.get(treble_note, bass_note)
+            archive.add(f'beat_{beat_index:04d}.svg', svg_content)
+            bytes_written += len(svg_content.encode('utf-8'))
+        archive.close()
+        elapsed = time.perf_counter() - started
+        print(f"\n✓ Packed {max_beats} SVGs into: {archive.path}")
+        print(f"  Extract with: python3 payload_archive.py {archive.path} --out {output_folder}")
+        print(f"  Render cache: {render_cache.misses} renders, {render_cache.hits} cached beats")
+        print(f"  Throughput: {max_beats / elapsed:,.0f} beats/s, {bytes_written:,} bytes in {elapsed:.2f}s")
+        return
+    
+    # Resume: skip beats whose file is intact and was rendered from the same notes by the same renderer
+    manifest_path = f'{output_folder}/{RENDER_MANIFEST}'
+    manifest = {}
+    if os.path.exists(manifest_path) and not args.force:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    
+    pending = []
+    for beat_index, (treble_note, bass_note) in enumerate(note_pairs):
+        name = f'beat_{beat_index:04d}.svg'
+        output_file = f'{output_folder}/{name}'
+        entry = manifest.get(name)
+        if (entry and entry['key'] == render_cache.key(treble_note, bass_note)
+                and file_sha256(output_file) == entry['sha256']):
+            continue
+        pending.append((beat_index, treble_note, bass_note, output_file))
+    
+    skipped = max_beats - len(pending)
+    print(f"\nGenerating {len(pending)} individual beat SVGs ({skipped} up to date) with {args.workers} worker(s)...")
+    
+    chunks = [pending[i:i + args.chunk_size] for i in range(0, len(pending), args.chunk_size)]
+    bytes_written = 0
+    rendered = 0
+    
+    def record(results: List[Tuple[int, str, str, int]]):
+        nonlocal bytes_written, rendered
+        for beat_index, key, digest, size in results:
+            manifest[f'beat_{beat_index:04d}.svg'] = {'key': key, 'sha256': digest}
+            bytes_written += size
+        rendered += len(results)
+        print(f"  Rendered {rendered}/{len(pending)} beats")
+    
+    try:
+        if args.workers > 1 and len(chunks) > 1:
+            with ProcessPoolExecutor(max_workers=args.workers, initializer=set_worker_render_cache,
+                                     initargs=(args.cache_dir, glyph_source)) as pool:
+                for future in as_completed([pool.submit(render_beat_chunk, chunk) for chunk in chunks]):
+                    record(future.result())
+        else:
+            set_worker_render_cache(args.cache_dir, glyph_source)
+            for chunk in chunks:
+                record(render_beat_chunk(chunk))
+    finally:
+        # Keep whatever finished so an interrupted run resumes where it stopped
+        replace_file(manifest_path, json.dumps(manifest, indent=2, sort_keys=True))
+    
+    elapsed = time.perf_counter() - started
     print(f"\n✓ Generated {max_beats} SVG files in: {output_folder}")
     print(f"  Files: beat_0000.svg through beat_{max_beats-1:04d}.svg")
+    print(f"  Rendered {rendered} beats, skipped {skipped} up to date")
+    print(f"  Throughput: {rendered / elapsed:,.0f} beats/s, {bytes_written:,} bytes written in {elapsed:.2f}s")
 
 if __name__ == '__main__':
     main()
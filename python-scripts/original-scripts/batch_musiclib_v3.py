@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Vectorized multi-seed batch engine for full_musiclib_v3
+Advances thousands of token seeds through the V3 lead / V2 bass state machines together
+Requires: pip install numpy
+"""
+
+import sys
+import time
+import random
+from typing import List, Tuple, Sequence
+
+try:
+    import numpy as np
+except ImportError:
+    print("Error: numpy library not found")
+    print("Install with: pip install numpy")
+    sys.exit(1)
+
+from full_musiclib_v3 import CompleteMusicLibV3, NEIGHBORS, LEAD_PITCHES, BASS_PITCHES
+
+MASK32 = np.uint64(0xFFFFFFFF)
+
+# Every branch of the step functions only looks at the RNG state modulo a small number:
+# &3, &7, &15, %3, %4, %5, %6, %31... so outcomes are tabulated over these residues.
+HARMONY_RESIDUES = 120   # lcm(8, 3, 4, 5, 6) - covers &7, &3 and % len(neighbors/matches)
+CADENCE_RESIDUES = 60    # lcm(4, 5, 6) - covers % len(neighbors)
+DURATION_RESIDUES = 12   # lcm(6, 3, 4) - covers every get_duration_lead modulus
+BASS_WEIGHT_TOTAL = 31   # sum of choose_bass_tone preference weights
+
+class BatchMusicLibV3:
+    def __init__(self, lib: CompleteMusicLibV3 = None):
+        self.lib = lib or CompleteMusicLibV3()
+        self.build_tables()
+
+    def build_tables(self):
+        """Tabulate every state-machine decision by evaluating the scalar implementation"""
+        lib = self.lib
+        chords = lib.DIATONIC_CHORDS
+
+        # Cadence trigger: nbrs[s % len(nbrs)]
+        self.cadence = np.zeros((len(NEIGHBORS), CADENCE_RESIDUES), dtype=np.int64)
+        for chord in chords:
+            nbrs = NEIGHBORS[chord]
+            self.cadence[chord] = [nbrs[r % len(nbrs)] for r in range(CADENCE_RESIDUES)]
+
+        # Harmonic movement: rng=0 and seed=(r - 1013904223) makes the internal LCG land on r
+        self.harmony = np.zeros((4, len(NEIGHBORS), HARMONY_RESIDUES), dtype=np.int64)
+        for pt in range(4):
+            for chord in chords:
+                self.harmony[pt, chord] = [
+                    lib.choose_harmonic_movement(chord, pt, 0, (r - 1013904223) & 0xFFFFFFFF)[0]
+                    for r in range(HARMONY_RESIDUES)
+                ]
+
+        # Lead rest decision once notes_since_rest is in [min_len, max_len): rng & (chance-1) == 0
+        self.lead_rest = np.zeros((4, lib.PHRASE_LEN, 16), dtype=bool)
+        for pt in range(4):
+            for pos in range(lib.PHRASE_LEN):
+                self.lead_rest[pt, pos] = [lib.should_rest_lead(pt, pos, 4, r) for r in range(16)]
+        self.rest_duration = np.array(
+            [[lib.get_rest_duration(pt, r) for r in range(4)] for pt in range(4)], dtype=np.int64)
+
+        # Lead tone index (phrase B biases toward third/fifth) and duration
+        phrase_b_tones = [0, 0, 1, 1, 1, 2, 2, 2]
+        self.lead_tone = np.zeros((4, lib.PHRASE_LEN, 8), dtype=np.int64)
+        for pt in range(4):
+            for pos in range(lib.PHRASE_LEN):
+                if pt == 2:
+                    self.lead_tone[pt, pos] = phrase_b_tones
+                else:
+                    self.lead_tone[pt, pos] = [lib.choose_chord_tone_improved(pos, r) for r in range(8)]
+        self.lead_duration = np.array(
+            [[lib.get_duration_lead(pt, r) for r in range(DURATION_RESIDUES)] for pt in range(4)],
+            dtype=np.int64)
+
+        # Chord pitches per phrase type (octave depends on phrase type only)
+        self.lead_pitches = np.array(LEAD_PITCHES, dtype=np.int64)
+        self.bass_pitches = np.array(BASS_PITCHES, dtype=np.int64)
+
+        # Bass weighted tone choice: r=15 never repeats, so the weight bucket decides alone
+        self.bass_tone = np.array(
+            [lib.choose_bass_tone(0, (w << 4) | 15, -1, list(range(8))) for w in range(BASS_WEIGHT_TOTAL)],
+            dtype=np.int64)
+
+    def lcg_advance(self, state: np.ndarray, seed_mod: np.ndarray) -> np.ndarray:
+        """LCG RNG on uint64 arrays holding 32-bit values (exact mod 2^32 wraparound)"""
+        return (state * np.uint64(1664525) + np.uint64(1013904223) + seed_mod) & MASK32
+
+    def mix_seeds(self, a: np.ndarray, b: int) -> np.ndarray:
+        """Vectorized _mix; b * 0x9E3779B9 is not masked in the scalar version, so keep 64 bits"""
+        s = a ^ np.uint64(b * 0x9E3779B9)
+        s ^= (s << np.uint64(13)) & MASK32
+        s ^= (s >> np.uint64(17))
+        s ^= (s << np.uint64(5)) & MASK32
+        return s & MASK32
+
+    def move_chords(self, position: int, chord: np.ndarray, rng: np.ndarray, seed: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Structural reset / cadence trigger shared by lead and bass"""
+        if position % 50 == 0:
+            rng = self.lcg_advance(rng, seed ^ np.uint64(0x5050))
+            chord = np.full_like(chord, 6)
+        elif position % self.lib.PHRASE_LEN == 0 or (position % 4 == 0):
+            rng = self.lcg_advance(rng, seed ^ np.uint64(0x1234))
+            chord = self.cadence[chord, rng % np.uint64(CADENCE_RESIDUES)]
+        return chord, rng
+
+    def generate_beats(self, token_seeds: Sequence[int], start: int, stop: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Generate beats start..stop-1 for every token seed at once.
+
+        Returns (lead, bass) arrays of shape (n_seeds, n_beats, 2) holding (pitch, duration),
+        pitch -1 for rests. Matches CompleteMusicLibV3.generate_beat exactly.
+        """
+        lib = self.lib
+        seeds = np.array([int(seed) for seed in token_seeds], dtype=np.uint64)
+        n = len(seeds)
+        rows = np.arange(n)
+
+        lead = np.zeros((n, max(stop - start, 0), 2), dtype=np.int32)
+        bass = np.zeros((n, max(stop - start, 0), 2), dtype=np.int32)
+
+        lead_state, bass_state = lib.initial_states()
+        lead_chord = np.full(n, lead_state.chord, dtype=np.int64)
+        lead_rng = np.full(n, lead_state.rng, dtype=np.uint64)
+        notes_since_rest = np.full(n, lead_state.notes_since_rest, dtype=np.int64)
+        bass_chord = np.full(n, bass_state.chord, dtype=np.int64)
+        bass_rng = np.full(n, bass_state.rng, dtype=np.uint64)
+        previous_pitch = np.full(n, bass_state.previous_pitch, dtype=np.int64)
+
+        for beat in range(stop):
+            pt = lib.phrase_type(beat)
+            pos = beat % lib.PHRASE_LEN
+            seed = self.mix_seeds(seeds, beat)
+
+            # LEAD: rest decision (masked), then the note path for everyone else
+            rest = (notes_since_rest >= 8) | (
+                (notes_since_rest >= 4) & self.lead_rest[pt, pos][lead_rng & np.uint64(15)])
+            play = ~rest
+
+            chord, rng = self.move_chords(beat, lead_chord, lead_rng, seed)
+            rng = self.lcg_advance(rng, seed)
+            chord = self.harmony[pt, chord, rng % np.uint64(HARMONY_RESIDUES)]
+            rng = self.lcg_advance(rng, (seed * np.uint64(2)) & MASK32)
+            tone = self.lead_tone[pt, pos][rng & np.uint64(7)]
+            pitch = self.lead_pitches[pt, chord, tone]
+            duration = self.lead_duration[pt][rng % np.uint64(DURATION_RESIDUES)]
+
+            if beat >= start:
+                lead[:, beat - start, 0] = np.where(play, pitch, -1)
+                lead[:, beat - start, 1] = np.where(
+                    play, duration, self.rest_duration[pt][lead_rng & np.uint64(3)])
+
+            lead_chord = np.where(play, chord, lead_chord)
+            lead_rng = np.where(play, rng, lead_rng)
+            notes_since_rest = np.where(play, notes_since_rest + 1, 0)
+
+            # BASS: no rests
+            bass_seed = seed ^ np.uint64(0x7777)
+            chord, rng = self.move_chords(beat, bass_chord, bass_rng, bass_seed)
+            rng = self.lcg_advance(rng, bass_seed)
+            chord = self.harmony[pt, chord, rng % np.uint64(HARMONY_RESIDUES)]
+            rng = self.lcg_advance(rng, (bass_seed * np.uint64(2)) & MASK32)
+
+            pitches = self.bass_pitches[pt, chord]
+            repeat = ((previous_pitch != -1)
+                      & (pitches == previous_pitch[:, None]).any(axis=1)
+                      & ((rng & np.uint64(15)) < np.uint64(12)))
+            weighted = pitches[rows, self.bass_tone[(rng >> np.uint64(4)) % np.uint64(BASS_WEIGHT_TOTAL)]]
+            chosen = np.where(repeat, previous_pitch, weighted)
+
+            if beat >= start:
+                bass[:, beat - start, 0] = chosen
+                bass[:, beat - start, 1] = lib.get_duration_bass(beat)
+
+            bass_chord = chord
+            bass_rng = rng
+            previous_pitch = chosen
+
+        return lead, bass
+
+def check_against_scalar(batch: BatchMusicLibV3, token_seeds: List[int], num_beats: int) -> int:
+    """Compare batch output with the scalar generate_lead_step/generate_bass_step path"""
+    lead, bass = batch.generate_beats(token_seeds, 0, num_beats)
+    mismatches = 0
+    for row, seed in enumerate(token_seeds):
+        for beat, (lead_event, bass_event) in enumerate(batch.lib.iter_beats(seed, 0, num_beats)):
+            if (tuple(lead[row, beat]) != (lead_event.pitch, lead_event.duration)
+                    or tuple(bass[row, beat]) != (bass_event.pitch, bass_event.duration)):
+                mismatches += 1
+    return mismatches
+
+def main():
+    num_seeds = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    num_beats = int(sys.argv[2]) if len(sys.argv) > 2 else 365
+
+    print("🎼 BATCH MUSICLIB V3 - MULTI-SEED ENGINE")
+    print("=" * 60)
+
+    batch = BatchMusicLibV3()
+    rng = random.Random(12345)
+    token_seeds = [rng.getrandbits(32) for _ in range(num_seeds)]
+
+    started = time.perf_counter()
+    lead, bass = batch.generate_beats(token_seeds, 0, num_beats)
+    elapsed = time.perf_counter() - started
+    print(f"Generated {num_seeds} seeds x {num_beats} beats in {elapsed:.2f}s "
+          f"({num_seeds * num_beats / elapsed:,.0f} beats/s)")
+
+    sample = token_seeds[:20] + [0, 12345, 0xFFFFFFFF]
+    mismatches = check_against_scalar(batch, sample, num_beats)
+    if mismatches:
+        print(f"❌ {mismatches} beats differ from the scalar path")
+        sys.exit(1)
+    print(f"✅ {len(sample)} sampled seeds match the scalar path beat for beat")
+
+if __name__ == "__main__":
+    main()
@@ -10,10 +10,14 @@ import json
 import csv
 import hashlib
 import random
+import argparse
+import textwrap
 from datetime import datetime
 from dataclasses import dataclass
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Dict, Iterable, Iterator
 from full_musiclib_v3 import CompleteMusicLibV3, Event
+from keccak import keccak256
+from payload_archive import PayloadArchiveWriter
 
 @dataclass 
 class TokenData:
@@ -28,12 +32,31 @@ class TokenData:
     lead_event: Event
     bass_event: Event
 
+ZERO_HASH = "0000000000000000000000000000000000000000000000000000000000000000"
+
+# previousNotesHash chaining schemes
+NOTES_HASH_HISTORY = "history"    # sha256("_".join(every earlier pitch)) - original simulation
+NOTES_HASH_CONTRACT = "contract"  # keccak256(abi.encodePacked(prev, lead.pitch, lead.duration, bass.pitch, bass.duration))
+NOTES_HASH_MODES = (NOTES_HASH_HISTORY, NOTES_HASH_CONTRACT)
+
+# Metadata output formats
+JSON_ARRAY = "json"      # full_metadata.json - one indented array, emitted item by item
+JSON_LINES = "ndjson"    # full_metadata.ndjson - one compact object per line
+JSON_FORMATS = (JSON_ARRAY, JSON_LINES)
+WRITE_BUFFER = 1 << 16
+
 class BlockchainSimulator:
-    def __init__(self, collection_phrase: str, start_year: int = 2026):
+    def __init__(self, collection_phrase: str, start_year: int = 2026, notes_hash_mode: str = NOTES_HASH_HISTORY):
+        if notes_hash_mode not in NOTES_HASH_MODES:
+            raise ValueError(f"Unknown notes hash mode: {notes_hash_mode}")
         self.collection_phrase = collection_phrase
         self.start_year = start_year
+        self.notes_hash_mode = notes_hash_mode
         self.music_generator = CompleteMusicLibV3()
         
+        # Rolling previousNotesHash state: number of reveals absorbed + running hash
+        self.reset_notes_hash()
+        
         # Collection salt from phrase
         self.collection_salt = hashlib.sha256(collection_phrase.encode('utf-8')).hexdigest()
         print(f"🎵 Collection Phrase: '{collection_phrase}'")
@@ -68,23 +91,50 @@ class BlockchainSimulator:
         combined = "_".join(str(c) for c in components)
         return hashlib.sha256(combined.encode()).hexdigest()
     
+    def reset_notes_hash(self):
+        """Start a fresh previousNotesHash chain (no reveals absorbed)"""
+        self.notes_absorbed = 0
+        self.notes_sha256 = hashlib.sha256()  # history mode: running sha256 over the joined pitches
+        self.notes_has_pitch = False
+        self.notes_chain = bytes(32)          # contract mode: bytes32 previousNotesHash
+
+    def absorb_revealed_notes(self, token: TokenData):
+        """Extend the rolling previousNotesHash with one revealed token (O(1))"""
+        lead, bass = token.lead_event, token.bass_event
+        if self.notes_hash_mode == NOTES_HASH_CONTRACT:
+            # abi.encodePacked(bytes32, int16, uint16, int16, uint16)
+            packed = (self.notes_chain
+                      + lead.pitch.to_bytes(2, 'big', signed=True) + lead.duration.to_bytes(2, 'big')
+                      + bass.pitch.to_bytes(2, 'big', signed=True) + bass.duration.to_bytes(2, 'big'))
+            self.notes_chain = keccak256(packed)
+        else:
+            notes = [str(lead.pitch)] if lead.pitch != -1 else []
+            notes.append(str(bass.pitch))
+            for note in notes:
+                self.notes_sha256.update(("_" + note if self.notes_has_pitch else note).encode())
+                self.notes_has_pitch = True
+        self.notes_absorbed += 1
+
     def generate_previous_notes_hash(self, reveal_index: int, all_tokens: List[TokenData]) -> str:
-        """Generate hash of previous notes for this reveal index"""
-        if reveal_index == 0:
-            return "0000000000000000000000000000000000000000000000000000000000000000"
+        """
+        Generate hash of previous notes for this reveal index.
         
-        # Hash of all previously revealed notes
-        previous_notes = []
-        for token in all_tokens[:reveal_index]:  # Only previously revealed
-            if token.lead_event.pitch != -1:
-                previous_notes.append(str(token.lead_event.pitch))
-            previous_notes.append(str(token.bass_event.pitch))
+        Keeps a rolling hash over all_tokens, so each reveal absorbs only the tokens
+        revealed since the last call. A reveal_index behind the chain (e.g. a new
+        collection run) restarts it from token 0.
+        """
+        if reveal_index == 0 or reveal_index < self.notes_absorbed:
+            self.reset_notes_hash()
+        for token in all_tokens[self.notes_absorbed:reveal_index]:  # Only previously revealed
+            self.absorb_revealed_notes(token)
         
-        if not previous_notes:
-            return "0000000000000000000000000000000000000000000000000000000000000000"
-            
-        combined = "_".join(previous_notes)
-        return hashlib.sha256(combined.encode()).hexdigest()
+        if self.notes_hash_mode == NOTES_HASH_CONTRACT:
+            return self.notes_chain.hex()
+        
+        # Hash of all previously revealed notes
+        if not self.notes_has_pitch:
+            return ZERO_HASH
+        return self.notes_sha256.copy().hexdigest()
     
     def generate_global_state_hash(self, reveal_index: int, year: int) -> str:
         """Generate global blockchain state hash"""
@@ -123,16 +173,24 @@ class BlockchainSimulator:
             reveal_year=reveal_year,
             seven_words=seven_words,
             previous_notes_hash="",
-            global_state_hash="",
+            global_state_hash=self.generate_global_state_hash(reveal_index, reveal_year),
             final_seed="",
             abc_content="",
             lead_event=Event(0, 0),
             bass_event=Event(0, 0)
         )
         
+        self.reveal_token(token_data, all_tokens)
+        
+        # Generate ABC content
+        token_data.abc_content = self.generate_abc_content(token_id, token_data.lead_event, token_data.bass_event)
+        
+        return token_data
+
+    def reveal_token(self, token_data: TokenData, all_tokens: List[TokenData]):
+        """Chained part of a reveal: previous notes hash -> final seed -> beat"""
         # Generate blockchain-like hashes
-        token_data.previous_notes_hash = self.generate_previous_notes_hash(reveal_index, all_tokens)
-        token_data.global_state_hash = self.generate_global_state_hash(reveal_index, reveal_year)
+        token_data.previous_notes_hash = self.generate_previous_notes_hash(token_data.reveal_index, all_tokens)
         token_data.final_seed = self.generate_final_seed(token_data)
         
         # Convert seed to integer for music generation
@@ -140,16 +198,17 @@ class BlockchainSimulator:
         
         # CRITICAL: Use reveal_index as beat parameter, not 0!
         # This gives us the progressive complexity over centuries
-        lead_event, bass_event = self.music_generator.generate_beat(reveal_index, seed_int)
+        lead_event, bass_event = self.music_generator.generate_beat(token_data.reveal_index, seed_int)
         
         token_data.lead_event = lead_event
         token_data.bass_event = bass_event
-        
-        # Generate ABC content
+
+    def generate_abc_content(self, token_id: int, lead_event: Event, bass_event: Event) -> str:
+        """Single-token ABC file content"""
         lead_abc = self.music_generator.pitch_to_abc(lead_event.pitch) + self.music_generator.duration_to_abc(lead_event.duration)
         bass_abc = self.music_generator.pitch_to_abc(bass_event.pitch) + self.music_generator.duration_to_abc(bass_event.duration)
         
-        token_data.abc_content = f"""X:1
+        return f"""X:1
 T:Millennium Song - Token {token_id}
 C:Blockchain Composition
 M:4/4
@@ -160,103 +219,64 @@ V:2 clef=bass name="Bass"
 [V:1] {lead_abc} |
 [V:2] {bass_abc} |
 """
-        
-        return token_data
 
-    def generate_token_collection(self, num_tokens: int) -> List[TokenData]:
-        """Generate a collection of tokens in reveal order"""
+    def token_id_for(self, reveal_index: int) -> int:
+        """Simulate different token IDs (not sequential reveal)"""
+        # In real blockchain, token IDs would be from auction winners
+        return 1000 + reveal_index * 7  # Simulate non-sequential IDs
+
+    def log_token_progress(self, token: TokenData):
+        reveal_index = token.reveal_index
+        if reveal_index % 50 == 0 or reveal_index < 10:
+            print(f"   Token {token.token_id} (reveal #{reveal_index}): {token.reveal_year} - Beat complexity level {reveal_index}")
+        elif reveal_index % 10 == 0:
+            print(f"   ...Token {token.token_id} (reveal #{reveal_index}): {token.reveal_year}")
+
+    def iter_token_collection(self, num_tokens: int) -> Iterator[TokenData]:
+        """Yield tokens in reveal order without holding the collection in memory"""
         print(f"\n🎼 Generating {num_tokens} tokens with blockchain simulation...")
         print(f"📅 Reveal timeline: {self.start_year} - {self.start_year + num_tokens - 1}")
         
-        tokens = []
-        
+        self.reset_notes_hash()
         for reveal_index in range(num_tokens):
-            # Simulate different token IDs (not sequential reveal)
-            # In real blockchain, token IDs would be from auction winners
-            token_id = 1000 + reveal_index * 7  # Simulate non-sequential IDs
-            
-            token = self.generate_single_token(token_id, reveal_index, tokens)
-            tokens.append(token)
-            
-            if reveal_index % 50 == 0 or reveal_index < 10:
-                print(f"   Token {token_id} (reveal #{reveal_index}): {token.reveal_year} - Beat complexity level {reveal_index}")
-            elif reveal_index % 10 == 0:
-                print(f"   ...Token {token_id} (reveal #{reveal_index}): {token.reveal_year}")
-        
-        return tokens
-    
-    def save_individual_files(self, tokens: List[TokenData], output_dir: str):
-        """Save individual ABC files and create summary data"""
-        os.makedirs(output_dir, exist_ok=True)
-        os.makedirs(os.path.join(output_dir, "individual_abc"), exist_ok=True)
-        
-        # Save individual ABC files
-        for token in tokens:
-            abc_filename = f"token_{token.token_id}_beat_{token.reveal_index}.abc"
-            abc_path = os.path.join(output_dir, "individual_abc", abc_filename)
+            token_id = self.token_id_for(reveal_index)
             
-            with open(abc_path, 'w') as f:
-                f.write(token.abc_content)
-        
-        # Create CSV summary
-        csv_path = os.path.join(output_dir, "token_metadata.csv")
-        with open(csv_path, 'w', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow([
-                'token_id', 'reveal_index', 'reveal_year', 'seven_words', 
-                'lead_pitch', 'lead_duration', 'bass_pitch', 'bass_duration',
-                'final_seed_preview', 'abc_file'
-            ])
+            # Rolling notes hash has absorbed every earlier reveal, so no history is passed
+            token = self.generate_single_token(token_id, reveal_index, [])
+            self.absorb_revealed_notes(token)
             
-            for token in tokens:
-                writer.writerow([
-                    token.token_id,
-                    token.reveal_index, 
-                    token.reveal_year,
-                    ' | '.join(token.seven_words),
-                    token.lead_event.pitch,
-                    token.lead_event.duration,
-                    token.bass_event.pitch,
-                    token.bass_event.duration,
-                    token.final_seed[:16] + "...",
-                    f"token_{token.token_id}_beat_{token.reveal_index}.abc"
-                ])
-        
-        # Create detailed JSON metadata
-        json_path = os.path.join(output_dir, "full_metadata.json")
-        json_data = []
-        for token in tokens:
-            json_data.append({
-                'token_id': token.token_id,
-                'reveal_index': token.reveal_index,
-                'reveal_year': token.reveal_year,
-                'seven_words': token.seven_words,
-                'lead_event': {
-                    'pitch': token.lead_event.pitch,
-                    'duration': token.lead_event.duration
-                },
-                'bass_event': {
-                    'pitch': token.bass_event.pitch,
-                    'duration': token.bass_event.duration
-                },
-                'blockchain_data': {
-                    'collection_salt': self.collection_salt,
-                    'previous_notes_hash': token.previous_notes_hash,
-                    'global_state_hash': token.global_state_hash,
-                    'final_seed': token.final_seed
-                }
-            })
-        
-        with open(json_path, 'w') as f:
-            json.dump(json_data, f, indent=2)
-        
-        print(f"✅ Saved {len(tokens)} individual ABC files to {output_dir}/individual_abc/")
-        print(f"✅ Created CSV metadata: {csv_path}")
-        print(f"✅ Created JSON metadata: {json_path}")
+            self.log_token_progress(token)
+            yield token
+
+    def generate_token_collection(self, num_tokens: int) -> List[TokenData]:
+        """Generate a collection of tokens in reveal order"""
+        return list(self.iter_token_collection(num_tokens))
     
-    def create_combined_abc(self, tokens: List[TokenData], output_dir: str):
-        """Create combined ABC file for MIDI conversion"""
-        combined_abc = f"""X:1
+    def token_json(self, token: TokenData) -> dict:
+        """Detailed JSON metadata for one token"""
+        return {
+            'token_id': token.token_id,
+            'reveal_index': token.reveal_index,
+            'reveal_year': token.reveal_year,
+            'seven_words': token.seven_words,
+            'lead_event': {
+                'pitch': token.lead_event.pitch,
+                'duration': token.lead_event.duration
+            },
+            'bass_event': {
+                'pitch': token.bass_event.pitch,
+                'duration': token.bass_event.duration
+            },
+            'blockchain_data': {
+                'collection_salt': self.collection_salt,
+                'previous_notes_hash': token.previous_notes_hash,
+                'global_state_hash': token.global_state_hash,
+                'final_seed': token.final_seed
+            }
+        }
+
+    def combined_abc_header(self) -> str:
+        return f"""X:1
 T:Millennium Song - Blockchain Simulation
 C:Collection: "{self.collection_phrase}"
 M:4/4
@@ -265,23 +285,138 @@ K:Eb
 V:1 clef=treble name="Lead"
 V:2 clef=bass name="Bass"
 """
+
+    def combined_abc_entry(self, token: TokenData) -> str:
+        """One token as a measure of the combined ABC file"""
+        lead_abc = self.music_generator.pitch_to_abc(token.lead_event.pitch) + self.music_generator.duration_to_abc(token.lead_event.duration)
+        bass_abc = self.music_generator.pitch_to_abc(token.bass_event.pitch) + self.music_generator.duration_to_abc(token.bass_event.duration)
         
-        # Add each token as a measure
-        for i, token in enumerate(tokens):
-            lead_abc = self.music_generator.pitch_to_abc(token.lead_event.pitch) + self.music_generator.duration_to_abc(token.lead_event.duration)
-            bass_abc = self.music_generator.pitch_to_abc(token.bass_event.pitch) + self.music_generator.duration_to_abc(token.bass_event.duration)
-            
-            combined_abc += f"% Token {token.token_id} - Year {token.reveal_year} - Beat {token.reveal_index}\n"
-            combined_abc += f"[V:1] {lead_abc} |\n"
-            combined_abc += f"[V:2] {bass_abc} |\n"
-        
+        return (f"% Token {token.token_id} - Year {token.reveal_year} - Beat {token.reveal_index}\n"
+                f"[V:1] {lead_abc} |\n"
+                f"[V:2] {bass_abc} |\n")
+
+    def save_individual_files(self, tokens: Iterable[TokenData], output_dir: str, json_format: str = JSON_ARRAY,
+                              pack_abc: bool = False):
+        """Save individual ABC files (or one packed archive) and create summary data"""
+        with SimulationWriter(self, output_dir, json_format=json_format, combined_abc=False, pack_abc=pack_abc) as writer:
+            for token in tokens:
+                writer.write_token(token)
+    
+    def create_combined_abc(self, tokens: Iterable[TokenData], output_dir: str):
+        """Create combined ABC file for MIDI conversion"""
         combined_path = os.path.join(output_dir, "combined_sequence.abc")
-        with open(combined_path, 'w') as f:
-            f.write(combined_abc)
+        with open(combined_path, 'w', buffering=WRITE_BUFFER) as f:
+            f.write(self.combined_abc_header())
+            
+            # Add each token as a measure
+            for token in tokens:
+                f.write(self.combined_abc_entry(token))
         
         print(f"✅ Created combined ABC: {combined_path}")
         return combined_path
 
+class SimulationWriter:
+    """
+    Streams simulator output to disk one token at a time.
+    
+    Individual ABC files, CSV rows, JSON metadata and (optionally) the combined
+    ABC file are written as tokens arrive, so memory stays flat however many
+    tokens are simulated. The JSON array form is byte-identical to
+    json.dump(indent=2) of the whole list. With pack_abc the per-token ABC files
+    go into individual_abc.zip instead of one file each (see payload_archive.py).
+    """
+    
+    def __init__(self, simulator: BlockchainSimulator, output_dir: str,
+                 json_format: str = JSON_ARRAY, combined_abc: bool = True, pack_abc: bool = False):
+        if json_format not in JSON_FORMATS:
+            raise ValueError(f"Unknown JSON format: {json_format}")
+        self.simulator = simulator
+        self.output_dir = output_dir
+        self.json_format = json_format
+        self.abc_dir = os.path.join(output_dir, "individual_abc")
+        self.abc_archive_path = os.path.join(output_dir, "individual_abc.zip") if pack_abc else None
+        self.csv_path = os.path.join(output_dir, "token_metadata.csv")
+        self.json_path = os.path.join(output_dir, "full_metadata.json" if json_format == JSON_ARRAY else "full_metadata.ndjson")
+        self.combined_path = os.path.join(output_dir, "combined_sequence.abc") if combined_abc else None
+        self.count = 0
+    
+    def __enter__(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.abc_archive = None
+        if self.abc_archive_path:
+            self.abc_archive = PayloadArchiveWriter(self.abc_archive_path).open()
+        else:
+            os.makedirs(self.abc_dir, exist_ok=True)
+        
+        self.csv_file = open(self.csv_path, 'w', newline='', buffering=WRITE_BUFFER)
+        self.csv_writer = csv.writer(self.csv_file)
+        self.csv_writer.writerow([
+            'token_id', 'reveal_index', 'reveal_year', 'seven_words', 
+            'lead_pitch', 'lead_duration', 'bass_pitch', 'bass_duration',
+            'final_seed_preview', 'abc_file'
+        ])
+        
+        self.json_file = open(self.json_path, 'w', buffering=WRITE_BUFFER)
+        
+        self.combined_file = None
+        if self.combined_path:
+            self.combined_file = open(self.combined_path, 'w', buffering=WRITE_BUFFER)
+            self.combined_file.write(self.simulator.combined_abc_header())
+        return self
+    
+    def write_token(self, token: TokenData):
+        abc_filename = f"token_{token.token_id}_beat_{token.reveal_index}.abc"
+        if self.abc_archive:
+            self.abc_archive.add(abc_filename, token.abc_content)
+        else:
+            with open(os.path.join(self.abc_dir, abc_filename), 'w') as f:
+                f.write(token.abc_content)
+        
+        self.csv_writer.writerow([
+            token.token_id,
+            token.reveal_index, 
+            token.reveal_year,
+            ' | '.join(token.seven_words),
+            token.lead_event.pitch,
+            token.lead_event.duration,
+            token.bass_event.pitch,
+            token.bass_event.duration,
+            token.final_seed[:16] + "...",
+            abc_filename
+        ])
+        
+        item = self.simulator.token_json(token)
+        if self.json_format == JSON_LINES:
+            self.json_file.write(json.dumps(item) + "\n")
+        else:
+            self.json_file.write("[\n" if self.count == 0 else ",\n")
+            self.json_file.write(textwrap.indent(json.dumps(item, indent=2), "  "))
+        
+        if self.combined_file:
+            self.combined_file.write(self.simulator.combined_abc_entry(token))
+        
+        self.count += 1
+    
+    def __exit__(self, exc_type, exc, tb):
+        if self.json_format == JSON_ARRAY:
+            self.json_file.write("\n]" if self.count else "[]")
+        self.csv_file.close()
+        self.json_file.close()
+        if self.combined_file:
+            self.combined_file.close()
+        if self.abc_archive:
+            self.abc_archive.close()
+        
+        if exc_type is None:
+            if self.abc_archive:
+                print(f"✅ Packed {self.count} individual ABC files into {self.abc_archive_path}")
+            else:
+                print(f"✅ Saved {self.count} individual ABC files to {self.abc_dir}/")
+            print(f"✅ Created CSV metadata: {self.csv_path}")
+            print(f"✅ Created JSON metadata: {self.json_path}")
+            if self.combined_path:
+                print(f"✅ Created combined ABC: {self.combined_path}")
+
 def main():
     print("🌟 BLOCKCHAIN SIMULATION GENERATOR")
     print("=" * 60)
@@ -291,34 +426,53 @@ def main():
     print("=" * 60)
     
     # Configuration
-    collection_phrase = "half the battle's just gettin outta bed"
-    num_tokens = 500  # Generate 500 tokens with corrected Eb major notation
+    parser = argparse.ArgumentParser(description="Simulate on-chain reveals for a token collection.")
+    parser.add_argument("--phrase", default="half the battle's just gettin outta bed", help="Collection phrase (salt).")
+    parser.add_argument("--num-tokens", default=500, type=int, help="Number of tokens to reveal.")
+    parser.add_argument("--json-format", default=JSON_ARRAY, choices=JSON_FORMATS,
+                        help="Metadata as one JSON array or as NDJSON lines.")
+    parser.add_argument("--pack", action="store_true",
+                        help="Write per-token ABC files into one individual_abc.zip archive.")
+    parser.add_argument("--notes-hash", default=NOTES_HASH_HISTORY, choices=NOTES_HASH_MODES,
+                        help="previousNotesHash scheme: sha256 of the pitch history, or the contract's keccak chain.")
+    args = parser.parse_args()
     
-    # Create simulator
-    simulator = BlockchainSimulator(collection_phrase)
+    collection_phrase = args.phrase
+    num_tokens = args.num_tokens
     
-    # Generate token collection
-    tokens = simulator.generate_token_collection(num_tokens)
+    # Create simulator
+    simulator = BlockchainSimulator(collection_phrase, notes_hash_mode=args.notes_hash)
     
     # Create output directory
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     output_dir = f"outputs/blockchain_simulation_{timestamp}"
     
-    # Save all files
-    simulator.save_individual_files(tokens, output_dir)
-    combined_abc_path = simulator.create_combined_abc(tokens, output_dir)
+    # Generate token collection, streaming every output file as tokens are revealed
+    tokens = simulator.iter_token_collection(num_tokens)
+    
+    # Keep only the tokens the analysis prints
+    mid = num_tokens // 2
+    sample_indices = set(range(10)) | set(range(max(mid - 2, 0), mid + 3)) | set(range(max(num_tokens - 10, 0), num_tokens))
+    sampled = {}
+    
+    with SimulationWriter(simulator, output_dir, json_format=args.json_format, pack_abc=args.pack) as writer:
+        for token in tokens:
+            writer.write_token(token)
+            if token.reveal_index in sample_indices:
+                sampled[token.reveal_index] = token
+    combined_abc_path = writer.combined_path
     
     # Analysis
     print(f"\n📊 BLOCKCHAIN SIMULATION ANALYSIS")
     print(f"Collection phrase: '{collection_phrase}'")
-    print(f"Tokens generated: {len(tokens)}")
-    print(f"Year range: {tokens[0].reveal_year} - {tokens[-1].reveal_year}")
+    print(f"Tokens generated: {writer.count}")
+    print(f"Year range: {sampled[0].reveal_year} - {sampled[num_tokens - 1].reveal_year}")
     
     # Show progression of complexity
     print(f"\n🎼 MILLENNIUM-SCALE MUSICAL ARC:")
-    early_tokens = tokens[:10]
-    mid_tokens = tokens[len(tokens)//2-2:len(tokens)//2+3]
-    later_tokens = tokens[-10:]
+    early_tokens = [sampled[i] for i in range(min(10, num_tokens))]
+    mid_tokens = [sampled[i] for i in range(max(mid - 2, 0), min(mid + 3, num_tokens))]
+    later_tokens = [sampled[i] for i in range(max(num_tokens - 10, 0), num_tokens)]
     
     print(f"Early reveals (2026-2035):")
     for token in early_tokens:
@@ -335,7 +489,7 @@ def main():
         beat_type = "fully sophisticated"
         print(f"   Year {token.reveal_year}: Beat {token.reveal_index} ({beat_type})")
     
-    print(f"\nLater reveals ({tokens[-10].reveal_year}s):")
+    print(f"\nLater reveals ({later_tokens[0].reveal_year}s):")
     for token in later_tokens:
         beat_type = "peak complexity"
         print(f"   Year {token.reveal_year}: Beat {token.reveal_index} ({beat_type})")
@@ -343,18 +497,12 @@ def main():
     print(f"\n🎯 Ready for ABC → SVG testing and MIDI audition!")
     print(f"📁 Output directory: {output_dir}")
     
-    # Try to create MIDI if combine script exists
+    # Create MIDI in-process from the combined ABC
     try:
-        import subprocess
+        from combine_to_midi import ABCToMidiCombiner
         midi_output = os.path.join(output_dir, "combined_sequence.mid")
-        result = subprocess.run([
-            "python3", "combine_to_midi.py", combined_abc_path, midi_output
-        ], capture_output=True, text=True)
-        
-        if result.returncode == 0:
+        if ABCToMidiCombiner(output_dir).convert_to_midi(combined_abc_path, midi_output):
             print(f"🎵 Created MIDI file: {midi_output}")
-        else:
-            print(f"⚠️  MIDI conversion failed: {result.stderr}")
     except Exception as e:
         print(f"⚠️  Could not create MIDI automatically: {e}")
 
@@ -6,14 +6,70 @@ Takes individual ABC notes and creates a complete musical sequence
 
 import os
 import re
+import sys
 import json
-import subprocess
+import argparse
 from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
 import glob
 
+from abc_to_svg import AbcNote, iter_abc_voice_notes
+from midi_writer import TPQ, write_lead_bass_midi
+
+# Same octave convention as CompleteMusicLibV3.pitch_to_abc: uppercase C is MIDI 48 and lowercase c
+# is MIDI 60, so ABC written by the generator converts back to exactly the pitches it came from.
+ABC_BASE_OCTAVE = {True: 5, False: 4}  # keyed by is-lowercase
+PITCH_CLASSES = {'C': 0, 'D': 2, 'E': 4, 'F': 5, 'G': 7, 'A': 9, 'B': 11}
+
+def abc_duration_ticks(duration: str, unit_ticks: int) -> int:
+    """Ticks for an ABC duration suffix ('', '2', '/2', '3/2', '//') at the given unit length"""
+    if '/' not in duration:
+        return unit_ticks * int(duration or 1)
+    numerator, _, denominator = duration.partition('/')
+    if denominator.startswith('/') or not denominator:
+        divisor = 2 ** (duration.count('/'))
+    else:
+        divisor = int(denominator)
+    return unit_ticks * int(numerator or 1) // divisor
+
+def abc_note_to_event(note: AbcNote, unit_ticks: int) -> Tuple[int, int]:
+    """(MIDI pitch, ticks) for one note token; pitch -1 for rests"""
+    ticks = abc_duration_ticks(note.duration, unit_ticks)
+    if note.is_rest:
+        return -1, ticks
+    
+    letter = note.pitch.upper()
+    offset = note.accidental.count('^') - note.accidental.count('_')  # '=' is natural
+    octave = ABC_BASE_OCTAVE[note.pitch.islower()] + note.octave
+    return 12 * octave + PITCH_CLASSES[letter] + offset, ticks
+
+def read_abc_events(lines: Iterable[str]) -> Tuple[List[Tuple[int, int]], List[Tuple[int, int]], int]:
+    """
+    Parse ABC text into lead (V:1) and bass (V:2) (pitch, ticks) events plus the Q: tempo.
+    
+    Notes are read the way pitch_to_abc spells them - every flat is explicit and a bare
+    letter is natural - so the K:Eb field is not applied on top (abc2midi did, which turned
+    the generator's A/B/E naturals into flats).
+    """
+    lines = list(lines)
+    unit_ticks = TPQ // 2  # L:1/8 default
+    bpm = 120
+    for line in lines:
+        line = line.strip()
+        if line.startswith('L:'):
+            numerator, _, denominator = line[2:].strip().partition('/')
+            unit_ticks = TPQ * 4 * int(numerator) // int(denominator or 1)
+        elif line.startswith('Q:') and '=' in line:
+            bpm = int(line.split('=')[-1])
+    
+    events = {'treble': [], 'bass': []}
+    for voice, note in iter_abc_voice_notes(lines):
+        events[voice].append(abc_note_to_event(note, unit_ticks))
+    return events['treble'], events['bass'], bpm
+
 class ABCToMidiCombiner:
-    def __init__(self):
-        self.midi_output_dir = "midi-output"
+    def __init__(self, midi_output_dir: str = "midi-output"):
+        self.midi_output_dir = midi_output_dir
         os.makedirs(self.midi_output_dir, exist_ok=True)
         
     def parse_abc_file(self, filepath: str) -> dict:
@@ -49,23 +105,12 @@ class ABCToMidiCombiner:
             beat = 0
             revealed = 0
             
-        # Extract musical content (V:1 and V:2 lines)
-        lead_line = ""
-        bass_line = ""
-        
-        lines = content.split('\n')
-        current_voice = None
-        
-        for line in lines:
-            line = line.strip()
-            if line.startswith('V:1'):
-                current_voice = 'lead'
-            elif line.startswith('V:2'):
-                current_voice = 'bass'
-            elif current_voice == 'lead' and '|' in line:
-                lead_line = line.replace('|', '').strip()
-            elif current_voice == 'bass' and '|' in line:
-                bass_line = line.replace('|', '').strip()
+        # Extract musical content (V:1 and V:2 notes, including inline [V:1] markers)
+        voice_notes = {'treble': [], 'bass': []}
+        for voice, note in iter_abc_voice_notes(content.split('\n')):
+            voice_notes[voice].append(str(note))
+        lead_line = " ".join(voice_notes['treble'])
+        bass_line = " ".join(voice_notes['bass'])
                 
         return {
             'filename': filename,
@@ -157,23 +202,19 @@ V:1
         print(f"   📝 Created: {output_filename}")
         return output_path
     
-    def convert_to_midi(self, abc_path: str) -> bool:
-        """Convert ABC to MIDI using abc2midi"""
+    def convert_to_midi(self, abc_path: str, midi_path: Optional[str] = None) -> bool:
+        """Convert ABC to MIDI in-process (no abc2midi needed)"""
+        midi_path = midi_path or os.path.splitext(abc_path)[0] + '.mid'
         try:
-            result = subprocess.run(['abc2midi', abc_path], 
-                                  cwd=self.midi_output_dir, 
-                                  capture_output=True, 
-                                  text=True)
-            if result.returncode == 0:
-                midi_name = os.path.basename(abc_path).replace('.abc', '.mid')
-                print(f"   🎼 Created: {midi_name}")
-                return True
-            else:
-                print(f"   ❌ abc2midi error: {result.stderr}")
-                return False
-        except FileNotFoundError:
-            print(f"   ⚠️  abc2midi not found - ABC file ready for manual conversion")
+            with open(abc_path, 'r') as f:
+                lead, bass, bpm = read_abc_events(f)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"   ❌ Could not convert {abc_path}: {e}")
             return False
+        
+        write_lead_bass_midi(midi_path, lead, bass, bpm)
+        print(f"   🎼 Created: {os.path.basename(midi_path)} ({len(lead)} lead / {len(bass)} bass events)")
+        return True
     
     def combine_experiment(self, experiment_dir: str) -> str:
         """Combine all ABC files from an experiment into MIDI files"""
@@ -206,6 +247,15 @@ V:1
         return self.midi_output_dir
 
 def main():
+    parser = argparse.ArgumentParser(description="Combine ABC experiment files into MIDI, or convert one ABC file.")
+    parser.add_argument("abc_file", nargs="?", help="Convert this ABC file directly (default: combine the newest outputs/ experiment).")
+    parser.add_argument("midi_file", nargs="?", help="Output .mid path (default: next to the ABC file).")
+    args = parser.parse_args()
+    
+    if args.abc_file:
+        combiner = ABCToMidiCombiner(os.path.dirname(args.midi_file or args.abc_file) or ".")
+        sys.exit(0 if combiner.convert_to_midi(args.abc_file, args.midi_file) else 1)
+    
     print("🎼 ABC TO MIDI COMBINER")
     print("=" * 60)
     print("Combine individual ABC experiment files into playable MIDI sequences")
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Era-aware MusicLib V3: beat generation mirroring src/core/SongAlgorithm.sol
+Plus a parity harness against exported Solidity beats
+
+SongAlgorithm.generateBeat differs from CompleteMusicLibV3.generate_beat in several ways:
+   • 365-beat eras - effectiveBeat = beat % 365, state machines restart every era
+   • Chord state is a diatonic index 0-6 (start = 0), not a chord id (start = 6)
+   • Lead applies the 50-beat reset / cadence nudge BEFORE the rest decision
+   • _diatonicNeighbors is a fixed 6-slot array (duplicates kept, padded with the tonic)
+   • Pitches are built from Eb major scale degrees and clamped (lead 48..70, bass 24..46)
+   • B/C rests with (rng & 3) == 3 last a half note
+   • _mix wraps b * 0x9E3779B9 to 32 bits before the xorshifts (mix_seeds keeps the full product)
+
+Every beat of an era is one step of the same forward pass, so each token seed gets a
+365-entry event cache filled on demand: the first lookup costs (beat % 365) + 1 steps
+like the contract, later lookups in any era are O(1).
+
+usage: era_musiclib_v3.py <export.json> [...]              # compare exported Solidity beats
+       era_musiclib_v3.py --seed S [--start B] [--beats N]  # print beats as NDJSON
+Exports: {"beats": [{"beat", "finalSeed", "lead", "bass"}]} (script/dev/ExportSongAlgoParity.s.sol,
+TestSongAlgoWithRealSeeds.s.sol) or blockchain_simulation_generator token lists (reveal_index,
+lead_event, bass_event, blockchain_data.final_seed -> uint32 of its top 4 bytes).
+"""
+
+import sys
+import json
+import argparse
+from array import array
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from full_musiclib_v3 import (
+    CompleteMusicLibV3, Event, LeadState, BassState,
+    DIATONIC_CHORDS, PREFERRED_AREAS, STRONG_CHORDS, LEAD_OCTAVES, BASS_OCTAVES,
+)
+
+ERA_LENGTH = 365  # SongAlgorithm annual cycle
+DEFAULT_CACHE_SEEDS = 4096
+MAX_REPORTED = 20
+
+DIATONIC_INDEX = {chord: i for i, chord in enumerate(DIATONIC_CHORDS)}
+EB_MAJOR_SCALE = (3, 5, 7, 8, 10, 0, 2)  # pitch class per scale degree (= diatonic index)
+FUNCTIONAL_PULLS = {6: (9, 16), 20: (6, 1), 16: (6, 20)}  # I -> ii, IV; V -> I, vi; IV -> I, V
+BASS_DEGREE_STEPS = (0, 3, 4, 5, 1, 3, 2, 6)  # root, 4th, 5th, 6th, 2nd, 4th again, 3rd, 7th
+LEAD_REGISTER = (48, 70)
+BASS_REGISTER = (24, 46)
+
+def build_neighbor_slots(index: int) -> Tuple[int, ...]:
+    """_diatonicNeighbors as chord ids: steps -2, -1, +1, +2, functional pulls, tonic padding"""
+    slots = [DIATONIC_CHORDS[(index + offset) % 7] for offset in (-2, -1, 1, 2)]
+    slots.extend(FUNCTIONAL_PULLS.get(DIATONIC_CHORDS[index], ()))
+    slots.extend([DIATONIC_CHORDS[0]] * (6 - len(slots)))
+    return tuple(slots)
+
+def clamp_register(pitch: int, register: Tuple[int, int]) -> int:
+    low, high = register
+    while pitch < low: pitch += 12
+    while pitch > high: pitch -= 12
+    return pitch
+
+def build_lead_tones(degree: int, octave: int) -> Tuple[int, int, int]:
+    """_chordToPitches: diatonic root, third, fifth stacked upward, clamped to the lead register"""
+    base = octave * 12
+    tones = [base + EB_MAJOR_SCALE[(degree + step) % 7] for step in (0, 2, 4)]
+    if tones[1] < tones[0]: tones[1] += 12
+    if tones[2] < tones[1]: tones[2] += 12
+    return tuple(clamp_register(t, LEAD_REGISTER) for t in tones)
+
+def build_bass_tones(degree: int, octave: int) -> Tuple[int, ...]:
+    """_bassChordToPitches: eight diatonic tones above the root, clamped to the bass register"""
+    base = octave * 12
+    tones = [base + EB_MAJOR_SCALE[(degree + step) % 7] for step in BASS_DEGREE_STEPS]
+    tones = tones[:1] + [t + 12 if t < tones[0] else t for t in tones[1:]]
+    return tuple(clamp_register(t, BASS_REGISTER) for t in tones)
+
+# COMPILED LOOKUP TABLES - indexed by diatonic index (and phrase type), values are diatonic indices
+NEIGHBOR_SLOTS = tuple(tuple(DIATONIC_INDEX[c] for c in build_neighbor_slots(i)) for i in range(7))
+PREFERRED_SLOTS = tuple(
+    tuple(tuple(DIATONIC_INDEX[c] for c in build_neighbor_slots(i) if c in PREFERRED_AREAS[pt]) for i in range(7))
+    for pt in range(4)
+)
+STRONG_SLOTS = tuple(tuple(DIATONIC_INDEX[c] for c in build_neighbor_slots(i) if c in STRONG_CHORDS) for i in range(7))
+LEAD_TONES = tuple(tuple(build_lead_tones(i, LEAD_OCTAVES[pt]) for i in range(7)) for pt in range(4))
+BASS_TONES = tuple(tuple(build_bass_tones(i, BASS_OCTAVES[pt]) for i in range(7)) for pt in range(4))
+
+class EraCache:
+    """One era of (lead, bass) events for a token seed, filled forward on demand"""
+
+    def __init__(self, lead_state: LeadState, bass_state: BassState):
+        self.lead_state = lead_state
+        self.bass_state = bass_state
+        self.events = array("h")  # lead pitch, lead duration, bass pitch, bass duration per day
+
+    def __len__(self) -> int:
+        return len(self.events) // 4
+
+    def event_pair(self, day: int) -> Tuple[Event, Event]:
+        e = self.events
+        i = day * 4
+        return Event(e[i], e[i + 1]), Event(e[i + 2], e[i + 3])
+
+class EraMusicLibV3(CompleteMusicLibV3):
+    """
+    CompleteMusicLibV3 with SongAlgorithm's step functions and 365-beat eras.
+
+    States hold diatonic indices (LeadState.chord / BassState.chord in 0..6). generate_beat
+    and iter_beats read a per-seed era cache; at most cache_seeds seeds are kept (least
+    recently used evicted first, 0 = no caching).
+    """
+
+    def __init__(self, checkpoint_stride: int = 0, cache_seeds: int = DEFAULT_CACHE_SEEDS):
+        super().__init__(checkpoint_stride)
+        self.ERA_LENGTH = ERA_LENGTH
+        self.cache_seeds = cache_seeds
+        self.era_cache: "OrderedDict[int, EraCache]" = OrderedDict()
+
+    def era_position(self, beat: int) -> Tuple[int, int]:
+        """(era, effectiveBeat) - generateAbcBeat titles these Era era+1, Day effectiveBeat+1"""
+        return divmod(beat, self.ERA_LENGTH)
+
+    def mix_seeds(self, a: int, b: int) -> int:
+        """_mix: uint32 arithmetic throughout"""
+        s = a ^ ((b * 0x9E3779B9) & 0xFFFFFFFF)
+        s ^= (s << 13) & 0xFFFFFFFF
+        s ^= (s >> 17)
+        s ^= (s << 5) & 0xFFFFFFFF
+        return s
+
+    def choose_harmonic_index(self, current: int, phrase_type: int, rng_state: int, seed: int) -> Tuple[int, int]:
+        """_chooseHarmonicMovement on diatonic indices"""
+        nbrs = NEIGHBOR_SLOTS[current]
+        new_state = self.lcg_advance(rng_state, seed)
+
+        if phrase_type == 0:  # stable: 1/8 chance to move, prefer tonic-area neighbors
+            if (new_state & 7) != 0:
+                return current, new_state
+            matches = PREFERRED_SLOTS[0][current]
+            pool = matches if matches else nbrs
+        elif phrase_type == 1:  # ornate: 1/4 chance to move
+            if (new_state & 3) != 0:
+                return current, new_state
+            pool = nbrs
+        elif phrase_type == 2:  # exploratory: always move
+            pool = nbrs
+        else:  # conclusive: prefer I, IV, V
+            pool = STRONG_SLOTS[current] or nbrs
+        return pool[new_state % len(pool)], new_state
+
+    def get_rest_duration(self, phrase_type: int, rng_state: int) -> int:
+        """_getRestDuration: B/C map r = 2 and r = 3 to a half note"""
+        r = rng_state & 3
+        if phrase_type in [2, 3]:  # B or C
+            return (self.QUARTER, self.DOTTED_QUART, self.HALF_NOTE, self.HALF_NOTE)[r]
+        return self.QUARTER if (r & 1) == 0 else self.DOTTED_QUART
+
+    def cadence_step(self, position: int, token_seed: int, chord: int, rng: int) -> Tuple[int, int]:
+        """Hard reset every 50 beats, otherwise a neighbor nudge on the quarter grid"""
+        if position % 50 == 0:
+            return 0, self.lcg_advance(rng, token_seed ^ 0x5050)
+        if position % self.PHRASE_LEN == 0 or position % 4 == 0:
+            rng = self.lcg_advance(rng, token_seed ^ 0x1234)
+            return NEIGHBOR_SLOTS[chord][rng % 6], rng
+        return chord, rng
+
+    def generate_lead_step(self, position: int, token_seed: int, state: LeadState) -> Tuple[Event, LeadState]:
+        """_leadGenerateStep"""
+        phrase_type = self.phrase_type(position)
+        pos_in_phrase = position % self.PHRASE_LEN
+        state.chord, state.rng = self.cadence_step(position, token_seed, state.chord, state.rng)
+
+        if self.should_rest_lead(phrase_type, pos_in_phrase, state.notes_since_rest, state.rng):
+            state.notes_since_rest = 0
+            return Event(-1, self.get_rest_duration(phrase_type, state.rng)), state
+
+        state.chord, state.rng = self.choose_harmonic_index(state.chord, phrase_type, state.rng, token_seed)
+        tones = LEAD_TONES[phrase_type][state.chord]
+
+        s = self.lcg_advance(state.rng, (token_seed * 2) & 0xFFFFFFFF)
+        state.rng = s
+        if phrase_type == 2:  # B: bias toward third and fifth
+            r = s & 7
+            idx = 0 if r < 2 else 1 if r < 5 else 2
+        else:
+            idx = self.choose_chord_tone_improved(pos_in_phrase, s)
+
+        event = Event(tones[idx], self.get_duration_lead(phrase_type, state.rng))
+        state.notes_since_rest += 1
+        return event, state
+
+    def generate_bass_step(self, position: int, token_seed: int, state: BassState) -> Tuple[Event, BassState]:
+        """_bassGenerateStep"""
+        phrase_type = self.phrase_type(position)
+        state.chord, state.rng = self.cadence_step(position, token_seed, state.chord, state.rng)
+        state.chord, state.rng = self.choose_harmonic_index(state.chord, phrase_type, state.rng, token_seed)
+        pitches = BASS_TONES[phrase_type][state.chord]
+
+        s = self.lcg_advance(state.rng, (token_seed * 2) & 0xFFFFFFFF)
+        state.rng = s
+        chosen_pitch = self.choose_bass_tone(position, s, state.previous_pitch, pitches)
+
+        state.previous_pitch = chosen_pitch
+        return Event(chosen_pitch, self.get_duration_bass(position)), state
+
+    def initial_states(self) -> Tuple[LeadState, BassState]:
+        """SongAlgorithm start: diatonic index 0 (Eb major)"""
+        return (LeadState(chord=0, rng=0xCAFEBABE, notes_since_rest=0),
+                BassState(chord=0, rng=0xDEAFBEEF, previous_pitch=-1))
+
+    def state_at(self, beat: int, token_seed: int) -> Tuple[LeadState, BassState]:
+        """Lead/bass states going into `beat` - replay never crosses the era start"""
+        return super().state_at(beat % self.ERA_LENGTH, token_seed)
+
+    def era_events(self, token_seed: int, days: int) -> EraCache:
+        """Era cache for token_seed holding at least the first `days` beats"""
+        era = self.era_cache.get(token_seed)
+        if era is None:
+            era = EraCache(*self.initial_states())
+            if self.cache_seeds > 0:
+                self.era_cache[token_seed] = era
+                if len(self.era_cache) > self.cache_seeds:
+                    self.era_cache.popitem(last=False)
+        else:
+            self.era_cache.move_to_end(token_seed)
+
+        for day in range(len(era), days):
+            seed = self.mix_seeds(token_seed, day)
+            lead, era.lead_state = self.generate_lead_step(day, seed, era.lead_state)
+            bass, era.bass_state = self.generate_bass_step(day, seed ^ 0x7777, era.bass_state)
+            era.events.extend((lead.pitch, lead.duration, bass.pitch, bass.duration))
+        return era
+
+    def clear_era_cache(self, token_seed: Optional[int] = None):
+        """Drop cached eras for one token seed (or all seeds)"""
+        if token_seed is None:
+            self.era_cache.clear()
+        else:
+            self.era_cache.pop(token_seed, None)
+
+    def generate_beat(self, beat: int, token_seed: int) -> Tuple[Event, Event]:
+        """SongAlgorithm.generateBeat(beat, tokenSeed)"""
+        day = beat % self.ERA_LENGTH
+        return self.era_events(token_seed, day + 1).event_pair(day)
+
+    def iter_beats(self, token_seed: int, start: int = 0, stop: Optional[int] = None) -> Iterator[Tuple[Event, Event]]:
+        """Stream (lead, bass) events for beats start..stop-1, restarting the song every era"""
+        era = self.era_events(token_seed, self.ERA_LENGTH)
+        beat = start
+        while stop is None or beat < stop:
+            yield era.event_pair(beat % self.ERA_LENGTH)
+            beat += 1
+
+def read_export(path: str) -> Iterator[Tuple[int, int, Event, Event]]:
+    """(beat, tokenSeed, lead, bass) per exported Solidity beat"""
+    with open(path) as f:
+        data = json.load(f)
+    for record in data["beats"] if isinstance(data, dict) else data:
+        if "blockchain_data" in record:
+            beat = record["reveal_index"]
+            seed = int(record["blockchain_data"]["final_seed"][:8], 16)  # uint32(uint256(finalSeed) >> 224)
+            lead, bass = record["lead_event"], record["bass_event"]
+        else:
+            beat, seed = record["beat"], int(record["finalSeed"])
+            lead, bass = record["lead"], record["bass"]
+        yield beat, seed, Event(lead["pitch"], lead["duration"]), Event(bass["pitch"], bass["duration"])
+
+def event_json(event: Event) -> Dict[str, int]:
+    return {"pitch": event.pitch, "duration": event.duration}
+
+def check_parity(generator: EraMusicLibV3, paths: List[str], max_reported: int = MAX_REPORTED) -> Tuple[int, int]:
+    """Compare exported beats with the Python mirror; prints the first mismatches, returns (matched, total)"""
+    matched = total = 0
+    for path in paths:
+        for beat, seed, lead, bass in read_export(path):
+            total += 1
+            got_lead, got_bass = generator.generate_beat(beat, seed)
+            if (got_lead, got_bass) == (lead, bass):
+                matched += 1
+            elif total - matched <= max_reported:
+                print(json.dumps({"file": path, "beat": beat, "seed": seed,
+                                  "expected": {"lead": event_json(lead), "bass": event_json(bass)},
+                                  "python": {"lead": event_json(got_lead), "bass": event_json(got_bass)}},
+                                 separators=(',', ':')))
+    return matched, total
+
+def main():
+    parser = argparse.ArgumentParser(description="SongAlgorithm mirror with 365-beat eras and Solidity parity check.")
+    parser.add_argument("exports", nargs="*", help="exported Solidity beats (JSON)")
+    parser.add_argument("--seed", type=lambda s: int(s, 0), help="token seed (uint32) to print beats for")
+    parser.add_argument("--start", type=int, default=0, help="first beat")
+    parser.add_argument("--beats", type=int, default=ERA_LENGTH, help="number of beats to print")
+    args = parser.parse_args()
+
+    generator = EraMusicLibV3()
+    if args.seed is not None:
+        for beat, (lead, bass) in enumerate(generator.iter_beats(args.seed, args.start, args.start + args.beats), args.start):
+            era, day = generator.era_position(beat)
+            print(json.dumps({"beat": beat, "era": era, "day": day, "lead": event_json(lead),
+                              "bass": event_json(bass)}, separators=(',', ':')))
+        return
+    if not args.exports:
+        parser.error("give export files to check, or --seed to print beats")
+
+    matched, total = check_parity(generator, args.exports)
+    print(f"{matched}/{total} beats match SongAlgorithm", file=sys.stderr)
+    sys.exit(0 if total and matched == total else 1)
+
+if __name__ == "__main__":
+    main()
@@ -9,8 +9,8 @@ import json
 import csv
 import hashlib
 import random
-from dataclasses import dataclass
-from typing import List, Tuple, Dict
+from dataclasses import dataclass, replace
+from typing import List, Tuple, Dict, Iterator, Optional
 
 @dataclass
 class Event:
@@ -29,8 +29,99 @@ class BassState:
     rng: int           # RNG state
     previous_pitch: int # previous bass note for repetition logic
 
+# DIATONIC ONLY: Seven chords in Eb major - chord id = (root << 1) | is_minor
+DIATONIC_CHORDS = (
+    6,   # Eb major (I)   - (3 << 1) | 0 = 6
+    9,   # F minor (ii)   - (4 << 1) | 1 = 9  
+    11,  # G minor (iii)  - (5 << 1) | 1 = 11
+    16,  # Ab major (IV)  - (8 << 1) | 0 = 16
+    20,  # Bb major (V)   - (10 << 1) | 0 = 20
+    1,   # C minor (vi)   - (0 << 1) | 1 = 1
+    5    # D diminished (vii°) - treat as D minor for now - (2 << 1) | 1 = 5
+)
+NUM_CHORD_IDS = 24  # 12 roots x major/minor
+
+# DIATONIC ONLY: Preferred harmonic areas by phrase type (0=A, 1=A', 2=B, 3=C)
+PREFERRED_AREAS = (
+    (6, 20, 16),  # A: I, V, IV - Eb major, Bb major, Ab major
+    (6, 1, 11),   # A': I, vi, iii - Eb major, C minor, G minor
+    (9, 20, 1),   # B: ii, V, vi - F minor, Bb major, C minor
+    (16, 6, 20),  # C: IV, I, V - Ab major, Eb major, Bb major
+)
+STRONG_CHORDS = (6, 16, 20)  # Eb major (I), Ab major (IV), Bb major (V)
+
+# VARIED OCTAVES BY PHRASE TYPE for better register coverage
+# Lead: A low-middle, A' high, B middle (fills the missing middle register!), C middle-high
+# (shifted up 1 octave for proper playback range)
+LEAD_OCTAVES = (5, 6, 5, 6)
+# Bass: A' one octave up (shifted up 2 octaves for proper playback range)
+BASS_OCTAVES = (4, 5, 4, 4)
+
+def build_diatonic_neighbors(chord_idx: int) -> Tuple[int, ...]:
+    """DIATONIC ONLY: Find neighboring chords that stay in Eb major"""
+    # Simple diatonic movement: step up/down in the diatonic sequence
+    current_pos = DIATONIC_CHORDS.index(chord_idx) if chord_idx in DIATONIC_CHORDS else 0
+    
+    neighbors = []
+    # Add adjacent diatonic chords (wrap around)
+    for offset in [-2, -1, 1, 2]:
+        neighbor_pos = (current_pos + offset) % len(DIATONIC_CHORDS)
+        neighbors.append(DIATONIC_CHORDS[neighbor_pos])
+    
+    # Add some functional harmony relationships
+    if chord_idx == 6:  # Eb major (I) - go to ii, IV, V, vi
+        neighbors.extend([9, 16, 20, 1])  # Fm, Ab, Bb, Cm
+    elif chord_idx == 20:  # Bb major (V) - strong pull to I
+        neighbors.extend([6, 1])  # Eb, Cm
+    elif chord_idx == 16:  # Ab major (IV) - go to I, V
+        neighbors.extend([6, 20])  # Eb, Bb
+    
+    # Remove duplicates and ensure all are diatonic
+    return tuple([n for n in set(neighbors) if n in DIATONIC_CHORDS][:6])  # Limit to 6 like original
+
+def build_chord_pitch_classes(chord_idx: int) -> Tuple[int, int, int]:
+    """Triad tones (root, third, fifth) relative to the octave base"""
+    root = chord_idx >> 1
+    is_minor = (chord_idx & 1) == 1
+    third = 3 if is_minor else 4
+    fifth = 7
+    return (root, (root + third) % 12, (root + fifth) % 12)
+
+def build_bass_pitch_classes(chord_idx: int) -> Tuple[int, ...]:
+    """Extended bass chord tones: root, fourth, fifth, sixth, second, minor fourth, third, 7th"""
+    root = chord_idx >> 1
+    is_minor = (chord_idx & 1) == 1
+    return (
+        root,                                # 1. root
+        (root + 5) % 12,                     # 2. fourth (perfect fourth)
+        (root + 7) % 12,                     # 3. fifth
+        (root + 9) % 12,                     # 4. sixth (major sixth)
+        (root + 2) % 12,                     # 5. second (major second)
+        (root + 6) % 12,                     # 6. minor fourth (tritone)
+        (root + (3 if is_minor else 4)) % 12,  # 7. third
+        (root + 10) % 12,                    # 8. 7th (minor seventh)
+    )
+
+# COMPILED LOOKUP TABLES - built once at import, indexed by chord id (and phrase type)
+NEIGHBORS = tuple(build_diatonic_neighbors(c) for c in range(NUM_CHORD_IDS))
+PREFERRED_NEIGHBORS = tuple(
+    tuple(tuple(n for n in NEIGHBORS[c] if n in PREFERRED_AREAS[pt]) for c in range(NUM_CHORD_IDS))
+    for pt in range(4)
+)
+STRONG_NEIGHBORS = tuple(tuple(n for n in NEIGHBORS[c] if n in STRONG_CHORDS) for c in range(NUM_CHORD_IDS))
+CHORD_PITCH_CLASSES = tuple(build_chord_pitch_classes(c) for c in range(NUM_CHORD_IDS))
+BASS_PITCH_CLASSES = tuple(build_bass_pitch_classes(c) for c in range(NUM_CHORD_IDS))
+LEAD_PITCHES = tuple(
+    tuple(tuple(LEAD_OCTAVES[pt] * 12 + pc for pc in CHORD_PITCH_CLASSES[c]) for c in range(NUM_CHORD_IDS))
+    for pt in range(4)
+)
+BASS_PITCHES = tuple(
+    tuple(tuple(BASS_OCTAVES[pt] * 12 + pc for pc in BASS_PITCH_CLASSES[c]) for c in range(NUM_CHORD_IDS))
+    for pt in range(4)
+)
+
 class CompleteMusicLibV3:
-    def __init__(self):
+    def __init__(self, checkpoint_stride: int = 0):
         # Constants
         self.QUARTER = 480
         self.DOTTED_QUART = 720
@@ -44,15 +135,12 @@ class CompleteMusicLibV3:
         self.BASE_KEY = 3  # Eb major (3 semitones up from C)
         
         # DIATONIC ONLY: Seven chords in Eb major
-        self.DIATONIC_CHORDS = [
-            6,   # Eb major (I)   - (3 << 1) | 0 = 6
-            9,   # F minor (ii)   - (4 << 1) | 1 = 9  
-            11,  # G minor (iii)  - (5 << 1) | 1 = 11
-            16,  # Ab major (IV)  - (8 << 1) | 0 = 16
-            20,  # Bb major (V)   - (10 << 1) | 0 = 20
-            1,   # C minor (vi)   - (0 << 1) | 1 = 1
-            5    # D diminished (vii°) - treat as D minor for now - (2 << 1) | 1 = 5
-        ]
+        self.DIATONIC_CHORDS = DIATONIC_CHORDS
+        
+        # CHECKPOINT INDEX: (LeadState, BassState) snapshots every K beats per token seed
+        # Entry k holds the states going into beat k * checkpoint_stride (0 = disabled)
+        self.checkpoint_stride = checkpoint_stride
+        self.checkpoints: Dict[int, List[Tuple[LeadState, BassState]]] = {}
 
     def lcg_advance(self, state: int, seed_mod: int) -> int:
         """LCG RNG: state*1664525 + 1013904223 + seed_mod (mod 2^32)"""
@@ -74,42 +162,17 @@ class CompleteMusicLibV3:
         elif m == 2: return 2        # B
         else: return 3               # C
 
-    def diatonic_neighbors(self, chord_idx: int) -> List[int]:
-        """DIATONIC ONLY: Find neighboring chords that stay in Eb major"""
-        # Simple diatonic movement: step up/down in the diatonic sequence
-        current_pos = self.DIATONIC_CHORDS.index(chord_idx) if chord_idx in self.DIATONIC_CHORDS else 0
-        
-        neighbors = []
-        # Add adjacent diatonic chords (wrap around)
-        for offset in [-2, -1, 1, 2]:
-            neighbor_pos = (current_pos + offset) % len(self.DIATONIC_CHORDS)
-            neighbors.append(self.DIATONIC_CHORDS[neighbor_pos])
-        
-        # Add some functional harmony relationships
-        if chord_idx == 6:  # Eb major (I) - go to ii, IV, V, vi
-            neighbors.extend([9, 16, 20, 1])  # Fm, Ab, Bb, Cm
-        elif chord_idx == 20:  # Bb major (V) - strong pull to I
-            neighbors.extend([6, 1])  # Eb, Cm
-        elif chord_idx == 16:  # Ab major (IV) - go to I, V
-            neighbors.extend([6, 20])  # Eb, Bb
-        
-        # Remove duplicates and ensure all are diatonic
-        return [n for n in set(neighbors) if n in self.DIATONIC_CHORDS][:6]  # Limit to 6 like original
-
-    def neighbors(self, chord_idx: int) -> List[int]:
+    def diatonic_neighbors(self, chord_idx: int) -> Tuple[int, ...]:
+        """DIATONIC ONLY: Find neighboring chords that stay in Eb major (precomputed)"""
+        return NEIGHBORS[chord_idx]
+
+    def neighbors(self, chord_idx: int) -> Tuple[int, ...]:
         """Use diatonic neighbors instead of full tonnetz"""
-        return self.diatonic_neighbors(chord_idx)
+        return NEIGHBORS[chord_idx]
 
-    def preferred_areas(self, phrase_type: int) -> List[int]:
+    def preferred_areas(self, phrase_type: int) -> Tuple[int, ...]:
         """DIATONIC ONLY: Preferred harmonic areas using only Eb major chords"""
-        if phrase_type == 0:  # A: I, V, IV
-            return [6, 20, 16]  # Eb major, Bb major, Ab major
-        elif phrase_type == 1:  # A': I, vi, iii  
-            return [6, 1, 11]   # Eb major, C minor, G minor
-        elif phrase_type == 2:  # B: ii, V, vi
-            return [9, 20, 1]   # F minor, Bb major, C minor
-        else:  # C: IV, I, V
-            return [16, 6, 20]  # Ab major, Eb major, Bb major
+        return PREFERRED_AREAS[phrase_type]
 
     def motion_style(self, phrase_type: int) -> int:
         """Motion style by phrase type: 0=stable, 1=ornate, 2=exploratory, 3=conclusive"""
@@ -117,16 +180,15 @@ class CompleteMusicLibV3:
 
     def choose_harmonic_movement(self, current_chord: int, phrase_type: int, rng_state: int, seed: int) -> Tuple[int, int]:
         """Full tonnetz harmonic movement logic (same as Solidity)"""
-        nbrs = self.neighbors(current_chord)
+        nbrs = NEIGHBORS[current_chord]
         style = self.motion_style(phrase_type)
-        pref = self.preferred_areas(phrase_type)
         
         new_state = self.lcg_advance(rng_state, seed)
         
         if style == 0:  # stable: usually stay; 1/8 chance to move
             if (new_state & 7) == 0:
                 # Prefer tonic-area neighbors if present
-                matches = [n for n in nbrs if n in pref]
+                matches = PREFERRED_NEIGHBORS[phrase_type][current_chord]
                 if matches:
                     idx = new_state % len(matches)
                     next_chord = matches[idx]
@@ -142,8 +204,7 @@ class CompleteMusicLibV3:
         elif style == 2:  # exploratory: always move
             next_chord = nbrs[new_state % len(nbrs)] if nbrs else current_chord
         else:  # conclusive: move, prefer strong diatonic chords (I, IV, V)
-            strong_chords = [6, 16, 20]  # Eb major (I), Ab major (IV), Bb major (V)
-            candidates = [n for n in nbrs if n in strong_chords]
+            candidates = STRONG_NEIGHBORS[current_chord]
             
             if candidates:
                 next_chord = candidates[new_state % len(candidates)]
@@ -152,20 +213,11 @@ class CompleteMusicLibV3:
         
         return next_chord, new_state
 
-    def chord_to_pitches(self, chord_idx: int, octave: int) -> List[int]:
+    def chord_to_pitches(self, chord_idx: int, octave: int) -> Tuple[int, int, int]:
         """Convert chord index to MIDI pitches"""
-        root = chord_idx >> 1
-        is_minor = (chord_idx & 1) == 1
-        
         base = octave * 12
-        third = 3 if is_minor else 4
-        fifth = 7
-        
-        return [
-            base + root,
-            base + (root + third) % 12,
-            base + (root + fifth) % 12
-        ]
+        root, third, fifth = CHORD_PITCH_CLASSES[chord_idx]
+        return (base + root, base + third, base + fifth)
 
     def should_rest_lead(self, phrase_type: int, pos_in_phrase: int, notes_since_rest: int, rng_state: int) -> bool:
         """Lead voice rest decision (V3 logic)"""
@@ -215,26 +267,12 @@ class CompleteMusicLibV3:
         elif pattern_position == 2: return self.HALF_NOTE # 3. half
         else: return self.EIGHTH                          # 4. eighth
 
-    def bass_chord_to_pitches(self, chord_idx: int, octave: int) -> List[int]:
+    def bass_chord_to_pitches(self, chord_idx: int, octave: int) -> Tuple[int, ...]:
         """Generate extended bass chord tones: root, fourth, fifth, sixth, second, minor fourth, third, 7th"""
-        root = chord_idx >> 1
-        is_minor = (chord_idx & 1) == 1
-        
         base = octave * 12
-        
-        # Extended chord tones for bass
-        return [
-            base + root,                    # 1. root
-            base + (root + 5) % 12,         # 2. fourth (perfect fourth)
-            base + (root + 7) % 12,         # 3. fifth
-            base + (root + 9) % 12,         # 4. sixth (major sixth)
-            base + (root + 2) % 12,         # 5. second (major second)
-            base + (root + 6) % 12,         # 6. minor fourth (tritone)
-            base + (root + (3 if is_minor else 4)) % 12,  # 7. third
-            base + (root + 10) % 12,        # 8. 7th (minor seventh)
-        ]
+        return tuple(base + pc for pc in BASS_PITCH_CLASSES[chord_idx])
 
-    def choose_bass_tone(self, position: int, rng_state: int, previous_pitch: int, current_pitches: List[int]) -> int:
+    def choose_bass_tone(self, position: int, rng_state: int, previous_pitch: int, current_pitches: Tuple[int, ...]) -> int:
         """BASS-SPECIFIC: Choose chord tone with preference order and repetition"""
         r = rng_state & 15  # More bits for variety
         
@@ -309,7 +347,7 @@ class CompleteMusicLibV3:
         elif position % self.PHRASE_LEN == 0 or (position % 4 == 0):
             s = self.lcg_advance(state.rng, token_seed ^ 0x1234)
             state.rng = s
-            nbrs = self.neighbors(state.chord)
+            nbrs = NEIGHBORS[state.chord]
             if nbrs:  # Make sure we have neighbors
                 state.chord = nbrs[s % len(nbrs)]  # Move to neighbor
         
@@ -319,18 +357,8 @@ class CompleteMusicLibV3:
         if new_chord != state.chord:
             state.chord = new_chord
         
-        # VARIED OCTAVES BY PHRASE TYPE for better register coverage
-        # Shifted up 1 octave for proper playback range
-        if phrase_type == 0:    # A: low-middle
-            octave = 5
-        elif phrase_type == 1:  # A': high  
-            octave = 6
-        elif phrase_type == 2:  # B: middle (fills the missing middle register!)
-            octave = 5
-        else:  # phrase_type == 3, C: middle-high transition
-            octave = 6
-        
-        pitches = self.chord_to_pitches(state.chord, octave)
+        # VARIED OCTAVES BY PHRASE TYPE (see LEAD_OCTAVES)
+        pitches = LEAD_PITCHES[phrase_type][state.chord]
         
         # For phrase B specifically, bias toward the higher tones in the chord
         if phrase_type == 2:
@@ -371,7 +399,7 @@ class CompleteMusicLibV3:
         elif position % self.PHRASE_LEN == 0 or (position % 4 == 0):
             s = self.lcg_advance(state.rng, token_seed ^ 0x1234)
             state.rng = s
-            nbrs = self.neighbors(state.chord)
+            nbrs = NEIGHBORS[state.chord]
             if nbrs:  # Make sure we have neighbors
                 state.chord = nbrs[s % len(nbrs)]
         
@@ -381,9 +409,8 @@ class CompleteMusicLibV3:
         if new_chord != state.chord:
             state.chord = new_chord
         
-        # Bass octaves (shifted up 2 octaves for proper playback range)
-        octave = 5 if phrase_type == 1 else 4
-        pitches = self.bass_chord_to_pitches(state.chord, octave)
+        # Bass octaves (see BASS_OCTAVES)
+        pitches = BASS_PITCHES[phrase_type][state.chord]
         
         # BASS-SPECIFIC: Tone choice with preference and repetition
         s = self.lcg_advance(state.rng, (token_seed * 2) & 0xFFFFFFFF)
@@ -399,10 +426,8 @@ class CompleteMusicLibV3:
         
         return event, state
 
-    def generate_beat(self, beat: int, token_seed: int) -> Tuple[Event, Event]:
-        """Generate dual-voice beat with FULL V3+V2 tonnetz complexity"""
-        
-        # Initial states - START IN EB MAJOR (diatonic)
+    def initial_states(self) -> Tuple[LeadState, BassState]:
+        """Fresh lead/bass states at beat 0 - START IN EB MAJOR (diatonic)"""
         lead_state = LeadState(
             chord=6,  # Eb major (diatonic chord index)
             rng=0xCAFEBABE,
@@ -413,12 +438,58 @@ class CompleteMusicLibV3:
             rng=0xDEAFBEEF,
             previous_pitch=-1  # No previous pitch initially
         )
-        
-        # Simulate history up to beat-1 (FULL STATE PROGRESSION)
-        for i in range(beat):
+        return lead_state, bass_state
+
+    def replay_states(self, start: int, stop: int, token_seed: int,
+                      lead_state: LeadState, bass_state: BassState) -> Tuple[LeadState, BassState]:
+        """Advance lead/bass states through beats start..stop-1 (FULL STATE PROGRESSION)"""
+        for i in range(start, stop):
             seed = self.mix_seeds(token_seed, i)
             _, lead_state = self.generate_lead_step(i, seed, lead_state)
             _, bass_state = self.generate_bass_step(i, seed ^ 0x7777, bass_state)
+        return lead_state, bass_state
+
+    def state_at(self, beat: int, token_seed: int) -> Tuple[LeadState, BassState]:
+        """
+        Lead/bass states going into `beat`.
+        
+        Without a checkpoint stride this replays the whole history from beat 0.
+        With one, it restores the nearest checkpoint at or below `beat` (building
+        any missing checkpoints on the way) and replays at most stride-1 steps.
+        """
+        stride = self.checkpoint_stride
+        if stride <= 0:
+            lead_state, bass_state = self.initial_states()
+            return self.replay_states(0, beat, token_seed, lead_state, bass_state)
+        
+        index = self.checkpoints.get(token_seed)
+        if index is None:
+            index = self.checkpoints[token_seed] = [self.initial_states()]
+        
+        target = beat // stride
+        while len(index) <= target:
+            lead_state, bass_state = index[-1]
+            first = (len(index) - 1) * stride
+            index.append(self.replay_states(first, first + stride, token_seed,
+                                            replace(lead_state), replace(bass_state)))
+        
+        # Copy the snapshot - the step functions mutate states in place
+        lead_state, bass_state = index[target]
+        return self.replay_states(target * stride, beat, token_seed,
+                                  replace(lead_state), replace(bass_state))
+
+    def clear_checkpoints(self, token_seed: Optional[int] = None):
+        """Drop checkpoint snapshots for one token seed (or all seeds)"""
+        if token_seed is None:
+            self.checkpoints.clear()
+        else:
+            self.checkpoints.pop(token_seed, None)
+
+    def generate_beat(self, beat: int, token_seed: int) -> Tuple[Event, Event]:
+        """Generate dual-voice beat with FULL V3+V2 tonnetz complexity"""
+        
+        # States going into this beat (replayed history, or nearest checkpoint + replay)
+        lead_state, bass_state = self.state_at(beat, token_seed)
         
         # Generate current beat
         seed_now = self.mix_seeds(token_seed, beat)
@@ -427,6 +498,24 @@ class CompleteMusicLibV3:
         
         return lead_event, bass_event
 
+    def iter_beats(self, token_seed: int, start: int = 0, stop: Optional[int] = None) -> Iterator[Tuple[Event, Event]]:
+        """
+        Stream (lead, bass) events for beats start..stop-1 (endless if stop is None).
+        
+        Keeps the lead/bass state machines alive between beats, so each yielded beat
+        costs one step instead of a full replay. Output is identical to calling
+        generate_beat(beat, token_seed) for every beat in the range.
+        """
+        lead_state, bass_state = self.state_at(start, token_seed)
+        
+        beat = start
+        while stop is None or beat < stop:
+            seed = self.mix_seeds(token_seed, beat)
+            lead_event, lead_state = self.generate_lead_step(beat, seed, lead_state)
+            bass_event, bass_state = self.generate_bass_step(beat, seed ^ 0x7777, bass_state)
+            yield lead_event, bass_event
+            beat += 1
+
     def pitch_to_abc(self, pitch: int) -> str:
         """Convert MIDI pitch to ABC notation with proper Eb major key signature"""
         if pitch < 0:
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Keccak-256 as used by Solidity's keccak256 (original Keccak padding, not NIST SHA3-256)
+Uses pycryptodome when installed, otherwise a pure-Python Keccak-f[1600]
+"""
+
+from typing import List
+
+try:
+    from Crypto.Hash import keccak as _pycryptodome_keccak
+except ImportError:
+    _pycryptodome_keccak = None
+
+RATE_BYTES = 136  # 1088-bit rate for 256-bit output
+MASK64 = 0xFFFFFFFFFFFFFFFF
+
+ROUND_CONSTANTS = [
+    0x0000000000000001, 0x0000000000008082, 0x800000000000808A, 0x8000000080008000,
+    0x000000000000808B, 0x0000000080000001, 0x8000000080008081, 0x8000000000008009,
+    0x000000000000008A, 0x0000000000000088, 0x0000000080008009, 0x000000008000000A,
+    0x000000008000808B, 0x800000000000008B, 0x8000000000008089, 0x8000000000008003,
+    0x8000000000008002, 0x8000000000000080, 0x000000000000800A, 0x800000008000000A,
+    0x8000000080008081, 0x8000000000008080, 0x0000000080000001, 0x8000000080008008,
+]
+
+# Rotation offsets indexed by lane x + 5 * y
+ROTATIONS = [
+    0, 1, 62, 28, 27,
+    36, 44, 6, 55, 20,
+    3, 10, 43, 25, 39,
+    41, 45, 15, 21, 8,
+    18, 2, 61, 56, 14,
+]
+
+# Pi step: lane x + 5 * y moves to y + 5 * ((2x + 3y) % 5)
+PI_TARGETS = [y + 5 * ((2 * x + 3 * y) % 5) for y in range(5) for x in range(5)]
+
+def keccak_f(lanes: List[int]):
+    """Keccak-f[1600] permutation on 25 little-endian 64-bit lanes (in place)"""
+    for rc in ROUND_CONSTANTS:
+        # Theta
+        c = [lanes[x] ^ lanes[x + 5] ^ lanes[x + 10] ^ lanes[x + 15] ^ lanes[x + 20] for x in range(5)]
+        for x in range(5):
+            right = c[(x + 1) % 5]
+            d = c[(x - 1) % 5] ^ (((right << 1) | (right >> 63)) & MASK64)
+            for y in range(0, 25, 5):
+                lanes[x + y] ^= d
+
+        # Rho + Pi
+        b = [0] * 25
+        for i in range(25):
+            r = ROTATIONS[i]
+            lane = lanes[i]
+            b[PI_TARGETS[i]] = ((lane << r) | (lane >> (64 - r))) & MASK64 if r else lane
+
+        # Chi
+        for y in range(0, 25, 5):
+            row = b[y:y + 5]
+            for x in range(5):
+                lanes[x + y] = row[x] ^ ((~row[(x + 1) % 5]) & row[(x + 2) % 5])
+
+        # Iota
+        lanes[0] ^= rc
+
+def keccak256(data: bytes) -> bytes:
+    """32-byte Keccak-256 digest of data"""
+    if _pycryptodome_keccak is not None:
+        return _pycryptodome_keccak.new(digest_bits=256, data=data).digest()
+
+    padded = bytearray(data)
+    padded.append(0x01)
+    padded.extend(b"\x00" * (-len(padded) % RATE_BYTES))
+    padded[-1] |= 0x80
+
+    lanes = [0] * 25
+    for offset in range(0, len(padded), RATE_BYTES):
+        block = padded[offset:offset + RATE_BYTES]
+        for i in range(RATE_BYTES // 8):
+            lanes[i] ^= int.from_bytes(block[i * 8:i * 8 + 8], "little")
+        keccak_f(lanes)
+
+    return b"".join(lane.to_bytes(8, "little") for lane in lanes[:4])
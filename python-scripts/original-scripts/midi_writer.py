@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Minimal in-process Standard MIDI File writer
+Shared by the MIDI exporters so none of them need abc2midi or mido.
+Events are (pitch, duration_ticks) pairs; pitch -1 is a rest.
+
+Track data is encoded into one preallocated buffer (through a memoryview) and streamed to the
+output file in fixed-size blocks; each track's length field is patched when the track ends.
+No Python object is created per MIDI message, so exporting very long timelines runs in
+constant memory.
+"""
+
+import io
+import os
+from pathlib import Path
+from typing import BinaryIO, Iterable, List, Tuple, Union
+
+TPQ = 480  # matches durations produced by SongAlgorithm / CompleteMusicLibV3
+WRITE_BLOCK = 1 << 16
+END_OF_TRACK = b"\xFF\x2F\x00"
+
+def encode_var_len(value: int) -> bytes:
+    """Standard variable-length quantity encoding (big endian, 7 bits per byte)."""
+    if value < 0x80:
+        return bytes((value,))
+    groups = [value & 0x7F]
+    value >>= 7
+    while value:
+        groups.append((value & 0x7F) | 0x80)
+        value >>= 7
+    return bytes(reversed(groups))
+
+# Every delta the generators emit (sixteenth through dotted whole, plus rest sums of those)
+COMMON_TICKS = (0, 120, 240, 360, 480, 720, 960, 1200, 1440, 1680, 1920, 2400, 2880, 3840)
+VAR_LEN_TABLE = {ticks: encode_var_len(ticks) for ticks in COMMON_TICKS}
+MESSAGE_CACHE_SIZE = 4096
+
+def check_data_byte(name: str, value: int):
+    """Pitches, velocities and programs are 7-bit data bytes; anything else would corrupt the SMF"""
+    if not 0 <= value <= 0x7F:
+        raise ValueError(f"MIDI {name} {value} out of range 0..127")
+
+def check_channel(channel: int):
+    if not 0 <= channel <= 0x0F:
+        raise ValueError(f"MIDI channel {channel} out of range 0..15")
+
+class SmfWriter:
+    """
+    Stream a format-1 Standard MIDI File to a seekable binary file.
+
+    Usage:
+        writer = SmfWriter(f, num_tracks=3)
+        writer.tempo_track(120)
+        writer.begin_track(); writer.note_events(lead, channel=0); writer.end_track()
+    """
+
+    def __init__(self, out: BinaryIO, num_tracks: int, tpq: int = TPQ, block_size: int = WRITE_BLOCK):
+        self.out = out
+        self.buffer = bytearray(block_size)
+        self.view = memoryview(self.buffer)
+        self.pos = 0
+        self.track_start = None
+        self.track_length = 0
+        self.bytes_written = 0
+        self.write_raw(b"MThd" + (6).to_bytes(4, "big") + (1).to_bytes(2, "big")  # format 1
+                       + num_tracks.to_bytes(2, "big") + tpq.to_bytes(2, "big"))
+
+    def write_raw(self, data: bytes):
+        self.out.write(data)
+        self.bytes_written += len(data)
+
+    def flush(self):
+        if self.pos:
+            self.out.write(self.view[:self.pos])
+            self.track_length += self.pos
+            self.bytes_written += self.pos
+            self.pos = 0
+
+    def put(self, data: bytes):
+        end = self.pos + len(data)
+        if end > len(self.buffer):
+            self.flush()
+            if len(data) > len(self.buffer):
+                self.out.write(data)
+                self.track_length += len(data)
+                self.bytes_written += len(data)
+                return
+            end = len(data)
+        self.view[self.pos:end] = data
+        self.pos = end
+
+    def put_var_len(self, ticks: int):
+        self.put(VAR_LEN_TABLE.get(ticks) or encode_var_len(ticks))
+
+    def put3(self, status: int, data1: int, data2: int):
+        pos = self.pos
+        if pos + 3 > len(self.buffer):
+            self.flush()
+            pos = 0
+        buffer = self.buffer
+        buffer[pos] = status
+        buffer[pos + 1] = data1
+        buffer[pos + 2] = data2
+        self.pos = pos + 3
+
+    def begin_track(self):
+        self.flush()
+        self.write_raw(b"MTrk")
+        self.track_start = self.out.tell()
+        self.write_raw(b"\x00\x00\x00\x00")  # Length patched in end_track
+        self.track_length = 0
+
+    def end_track(self, delta: int = 0):
+        self.put_var_len(delta)
+        self.put(END_OF_TRACK)
+        self.flush()
+        end = self.out.tell()
+        self.out.seek(self.track_start)
+        self.out.write(self.track_length.to_bytes(4, "big"))
+        self.out.seek(end)
+        self.track_start = None
+
+    def meta(self, delta: int, meta_type: int, data: bytes):
+        self.put_var_len(delta)
+        self.put(bytes((0xFF, meta_type)))
+        self.put_var_len(len(data))
+        self.put(data)
+
+    def track_name(self, name: str):
+        self.meta(0, 0x03, name.encode("latin-1", errors="replace"))  # SMF text is latin-1 (as in mido)
+
+    def program_change(self, delta: int, channel: int, program: int):
+        check_channel(channel)
+        check_data_byte("program", program)
+        self.put_var_len(delta)
+        self.put(bytes((0xC0 | channel, program)))
+
+    def note(self, delta: int, pitch: int, duration: int, channel: int, velocity: int = 0x50, off_velocity: int = 0x00):
+        """Note-on after delta ticks, note-off duration ticks later"""
+        check_channel(channel)
+        check_data_byte("pitch", pitch)
+        check_data_byte("velocity", velocity)
+        check_data_byte("note-off velocity", off_velocity)
+        self.put_var_len(delta)
+        self.put3(0x90 | channel, pitch, velocity)
+        self.put_var_len(duration)
+        self.put3(0x80 | channel, pitch, off_velocity)
+
+    def note_events(self, events: Iterable[Tuple[int, int]], channel: int, velocity: int = 0x50) -> int:
+        """
+        Write (pitch, duration) events back to back; rests become delta time. Returns the trailing rest.
+        Raises ValueError for a pitch outside 0..127 (other than a negative rest pitch).
+        """
+        check_channel(channel)
+        check_data_byte("velocity", velocity)
+        # A timeline only uses a few hundred distinct (delta, pitch, duration) messages, so each
+        # encoded note-on/note-off pair is built once and copied into the buffer from then on
+        messages = {}
+        note_on = 0x90 | channel
+        note_off = 0x80 | channel
+        view = self.view
+        size = len(self.buffer)
+        pos = self.pos
+        rest = 0
+        for pitch, duration in events:
+            if pitch < 0:
+                rest += duration
+                continue
+            key = (rest, pitch, duration)
+            message = messages.get(key)
+            if message is None:
+                check_data_byte("pitch", pitch)  # once per distinct message, before it is cached
+                message = (VAR_LEN_TABLE.get(rest) or encode_var_len(rest)) + bytes((note_on, pitch, velocity)) \
+                    + (VAR_LEN_TABLE.get(duration) or encode_var_len(duration)) + bytes((note_off, pitch, 0))
+                if len(messages) < MESSAGE_CACHE_SIZE:
+                    messages[key] = message
+            end = pos + len(message)
+            if end > size:
+                self.pos = pos
+                self.put(message)
+                pos = self.pos
+            else:
+                view[pos:end] = message
+                pos = end
+            rest = 0
+        self.pos = pos
+        return rest
+
+    def tempo_track(self, bpm: int = 120):
+        micros = int(60_000_000 / bpm)
+        self.begin_track()
+        self.meta(0, 0x51, micros.to_bytes(3, "big"))  # tempo
+        self.meta(0, 0x58, b"\x04\x02\x18\x08")  # 4/4
+        self.end_track()
+
+    def event_track(self, events: Iterable[Tuple[int, int]], channel: int, velocity: int = 0x50):
+        self.begin_track()
+        self.end_track(self.note_events(events, channel, velocity))
+
+def build_track(events: List[Tuple[int, int]], channel: int) -> bytes:
+    out = io.BytesIO()
+    SmfWriter(out, 0).event_track(events, channel)
+    return out.getvalue()[14:]
+
+def build_header(num_tracks: int) -> bytes:
+    out = io.BytesIO()
+    SmfWriter(out, num_tracks)
+    return out.getvalue()
+
+def build_tempo_track(bpm: int = 120) -> bytes:
+    out = io.BytesIO()
+    SmfWriter(out, 0).tempo_track(bpm)
+    return out.getvalue()[14:]
+
+def write_lead_bass_stream(out: BinaryIO, lead: Iterable[Tuple[int, int]], bass: Iterable[Tuple[int, int]], bpm: int = 120) -> int:
+    """Format 1 file: tempo track, lead on channel 0, bass on channel 1. Returns bytes written."""
+    writer = SmfWriter(out, 3)
+    writer.tempo_track(bpm)
+    writer.event_track(lead, channel=0)
+    writer.event_track(bass, channel=1)
+    return writer.bytes_written
+
+def build_lead_bass_midi(lead: Iterable[Tuple[int, int]], bass: Iterable[Tuple[int, int]], bpm: int = 120) -> bytes:
+    out = io.BytesIO()
+    write_lead_bass_stream(out, lead, bass, bpm)
+    return out.getvalue()
+
+def write_lead_bass_midi(path: Union[str, Path], lead: Iterable[Tuple[int, int]], bass: Iterable[Tuple[int, int]], bpm: int = 120) -> int:
+    """Written through a temp file and os.replace, so a failed export never leaves a partial .mid"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            written = write_lead_bass_stream(f, lead, bass, bpm)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return written
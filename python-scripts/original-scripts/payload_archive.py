@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Packed output for per-token ABC / per-beat SVG payloads
+Stores thousands of small files as members of one zip archive instead of one file each.
+The zip central directory is the offset table: any member is read without scanning the rest.
+
+Usage:
+    python3 payload_archive.py outputs/run/individual_abc.zip --list
+    python3 payload_archive.py outputs/run/individual_abc.zip --token 1007
+    python3 payload_archive.py outputs/run/svgs.zip --out outputs/run/svgs
+"""
+
+import os
+import re
+import sys
+import argparse
+import zipfile
+from typing import Dict, List, Optional, Union
+
+TOKEN_NAME = re.compile(r"token_(\d+)_beat_(\d+)\.")
+BEAT_NAME = re.compile(r"beat_(\d+)\.")
+
+class PayloadArchiveWriter:
+    """Write payloads as archive members (context manager)"""
+
+    def __init__(self, path: str, compression: int = zipfile.ZIP_DEFLATED):
+        self.path = path
+        self.compression = compression
+        self.count = 0
+
+    def open(self) -> "PayloadArchiveWriter":
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.zip = zipfile.ZipFile(self.path, "w", compression=self.compression)
+        return self
+
+    def add(self, name: str, payload: Union[str, bytes]):
+        self.zip.writestr(name, payload)
+        self.count += 1
+
+    def close(self):
+        self.zip.close()
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+class PayloadArchive:
+    """Random access to a packed payload archive by member name, token id or beat index"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.zip = zipfile.ZipFile(path, "r")
+        self.by_token: Dict[int, str] = {}
+        self.by_beat: Dict[int, str] = {}
+        for name in self.zip.namelist():
+            basename = os.path.basename(name)
+            token_match = TOKEN_NAME.match(basename)
+            if token_match:
+                self.by_token[int(token_match.group(1))] = name
+                self.by_beat[int(token_match.group(2))] = name
+                continue
+            beat_match = BEAT_NAME.match(basename)
+            if beat_match:
+                self.by_beat[int(beat_match.group(1))] = name
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self.zip.close()
+
+    def names(self) -> List[str]:
+        return self.zip.namelist()
+
+    def read(self, name: str) -> bytes:
+        return self.zip.read(name)
+
+    def read_token(self, token_id: int) -> bytes:
+        """Payload for a token id (token_{id}_beat_{n} members)"""
+        if token_id not in self.by_token:
+            raise KeyError(f"Token {token_id} not in {self.path}")
+        return self.zip.read(self.by_token[token_id])
+
+    def read_beat(self, beat_index: int) -> bytes:
+        """Payload for a beat / reveal index"""
+        if beat_index not in self.by_beat:
+            raise KeyError(f"Beat {beat_index} not in {self.path}")
+        return self.zip.read(self.by_beat[beat_index])
+
+    def extract(self, output_dir: str, names: Optional[List[str]] = None) -> int:
+        """Write members back out as individual files; returns the number extracted"""
+        names = names if names is not None else self.names()
+        for name in names:
+            self.zip.extract(name, output_dir)
+        return len(names)
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or extract a packed ABC/SVG payload archive.")
+    parser.add_argument("archive", help="Path to the .zip archive.")
+    parser.add_argument("--list", action="store_true", help="List members.")
+    parser.add_argument("--token", type=int, help="Print the payload for one token id.")
+    parser.add_argument("--beat", type=int, help="Print the payload for one beat index.")
+    parser.add_argument("--out", help="Extract every member into this directory.")
+    args = parser.parse_args()
+
+    with PayloadArchive(args.archive) as archive:
+        if args.list:
+            for name in archive.names():
+                print(name)
+        if args.token is not None:
+            sys.stdout.write(archive.read_token(args.token).decode())
+        if args.beat is not None:
+            sys.stdout.write(archive.read_beat(args.beat).decode())
+        if args.out:
+            count = archive.extract(args.out)
+            print(f"✅ Extracted {count} files to {args.out}/")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.20;
+
+import "forge-std/Script.sol";
+import "@openzeppelin/contracts/utils/Strings.sol";
+import "../../src/core/SongAlgorithm.sol";
+
+/// @title ExportSongAlgoParity
+/// @notice Export SongAlgorithm.generateBeat outputs for the Python parity check (era_musiclib_v3.py)
+/// @dev Samples beats around the 50-beat resets and the 365-beat era boundaries for a spread of seeds.
+///      Output format matches TestSongAlgoWithRealSeeds: {"metadata", "beats": [{beat, finalSeed, lead, bass}]}
+///      Usage: forge script script/dev/ExportSongAlgoParity.s.sol
+///             python3 python-scripts/original-scripts/era_musiclib_v3.py OUTPUTS/song-parity/beats.json
+contract ExportSongAlgoParity is Script {
+    using Strings for uint256;
+
+    string constant OUTPUT_DIR = "OUTPUTS/song-parity";
+    uint256 constant NUM_SEEDS = 16;
+
+    function run() external {
+        SongAlgorithm algo = new SongAlgorithm();
+        uint32[12] memory beats = [uint32(0), 1, 2, 49, 50, 51, 363, 364, 365, 366, 730, 3652];
+
+        string memory events = "";
+        uint256 count = 0;
+        for (uint256 s = 0; s < NUM_SEEDS; s++) {
+            // Edge seeds first, then keccak-derived ones
+            uint32 seed;
+            if (s == 0) seed = 0;
+            else if (s == 1) seed = type(uint32).max;
+            else seed = uint32(uint256(keccak256(abi.encodePacked("song-parity", s))));
+
+            for (uint256 b = 0; b < beats.length; b++) {
+                (ISongAlgorithm.Event memory lead, ISongAlgorithm.Event memory bass) = algo.generateBeat(beats[b], seed);
+                events = string(abi.encodePacked(
+                    events,
+                    count == 0 ? "" : ",\n",
+                    '    {"beat":', uint256(beats[b]).toString(),
+                    ',"finalSeed":', uint256(seed).toString(),
+                    ',"lead":{"pitch":', _int16ToString(lead.pitch),
+                    ',"duration":', uint256(lead.duration).toString(),
+                    '},"bass":{"pitch":', _int16ToString(bass.pitch),
+                    ',"duration":', uint256(bass.duration).toString(),
+                    '}}'
+                ));
+                count++;
+            }
+        }
+
+        string memory json = string(abi.encodePacked(
+            '{\n',
+            '  "metadata": {\n',
+            '    "algorithm": "SongAlgorithm.generateBeat",\n',
+            '    "numBeats": ', count.toString(), '\n',
+            '  },\n',
+            '  "beats": [\n',
+            events, '\n',
+            '  ]\n',
+            '}\n'
+        ));
+
+        vm.createDir(OUTPUT_DIR, true);
+        vm.writeFile(string(abi.encodePacked(OUTPUT_DIR, "/beats.json")), json);
+        console.log("Exported %d beats to %s/beats.json", count, OUTPUT_DIR);
+    }
+
+    function _int16ToString(int16 value) internal pure returns (string memory) {
+        if (value >= 0) {
+            return uint256(uint16(value)).toString();
+        } else {
+            return string(abi.encodePacked("-", uint256(uint16(-value)).toString()));
+        }
+    }
+}
@@ -16,6 +16,13 @@ contract IngestPermutation is Script {
         uint256 deployerKey = vm.envUint("PRIVATE_KEY");
         address msong = vm.envAddress("MSONG_ADDRESS");
 
+        // Packed chunk from `fisher_yates.py --chunks` (one file per broadcast)
+        string memory chunkPath = vm.envOr("PERMUTATION_CHUNK_FILE", string(""));
+        if (bytes(chunkPath).length != 0) {
+            _ingestChunkFile(deployerKey, msong, chunkPath);
+            return;
+        }
+
         string memory jsonPath = vm.envString("PERMUTATION_JSON");
         uint256 offset = vm.envOr("PERMUTATION_OFFSET", uint256(0));
         uint256 chunkSize = vm.envOr("PERMUTATION_CHUNK", uint256(100));
@@ -42,6 +49,43 @@ contract IngestPermutation is Script {
             permIndices[i] = permutation[offset + i];
         }
 
+        _broadcast(deployerKey, msong, offset, tokenIds, permIndices);
+    }
+
+    function _ingestChunkFile(uint256 deployerKey, address msong, string memory chunkPath) internal {
+        string memory json = vm.readFile(chunkPath);
+        uint256 offset = json.readUint(".offset");
+        uint256 width = json.readUint(".width");
+        bytes memory data = json.readBytes(".data");
+        require(width == 2 || width == 4, "Unsupported index width");
+        require(data.length > 0 && data.length % width == 0, "Malformed chunk data");
+
+        uint256 count = data.length / width;
+        require(count == json.readUint(".count"), "Chunk count mismatch");
+
+        uint256[] memory tokenIds = new uint256[](count);
+        uint256[] memory permIndices = new uint256[](count);
+
+        for (uint256 i = 0; i < count; i++) {
+            uint256 value = 0;
+            for (uint256 b = 0; b < width; b++) {
+                value = (value << 8) | uint8(data[i * width + b]); // big-endian
+            }
+            tokenIds[i] = offset + i + 1; // tokenIds are 1-indexed
+            permIndices[i] = value;
+        }
+
+        _broadcast(deployerKey, msong, offset, tokenIds, permIndices);
+    }
+
+    function _broadcast(
+        uint256 deployerKey,
+        address msong,
+        uint256 offset,
+        uint256[] memory tokenIds,
+        uint256[] memory permIndices
+    ) internal {
+        uint256 count = tokenIds.length;
         console.log("Ingesting permutation chunk");
         console.log("  address:", msong);
         console.log("  offset:", offset);
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Replay burn streams through a model of the burn collectors, PointsAggregator and PointsManager
+to choose setCheckpointLimits(maxTokens, maxDelta) with data.
+
+  L1 collector        every burn is applied at once as a one-entry applyCheckpointFromBase
+  Base / Optimism     burns accumulate per token (PendingDelta); a keeper calls checkpoint()
+                      once maxTokens tokens are pending, or early when a token's aggregate would
+                      pass maxDelta. A single burn above maxDelta would revert every checkpoint
+                      that includes its token, so the keeper leaves that token out (stuck).
+  Aggregator          skips tokenId 0, delta > maxDelta, unminted and revealed tokens, with the
+                      same SkipReason names as the contract
+  Optimism            modelled as if applyCheckpointFromOptimism applied entries like
+                      applyCheckpointFromBase. In PointsAggregator it is still a no-op placeholder,
+                      so on-chain those batches are currently dropped
+
+Per checkpoint it records entries, activations and ranks touched (queue positions shifted by each
+applied entry in the reveal_queue model, summed over the entries). Reveals take the head of the
+queue every --reveal-every events; deactivations (reveals of tokens holding points) do not belong
+to any checkpoint and are reported as a separate per-run total.
+Stats are kept per chain: collector batches (Base + Optimism, bounded by maxTokens) are reported
+apart from the L1 one-entry applies, which maxTokens does not affect.
+
+usage: checkpoint_replay.py [--events 10000 100000 1000000] [--sizes 25 50 100 200 400]
+                            [--max-delta 1000000] [--supply 10000] [--stream burns.jsonl]
+  burns.jsonl  one {"chain": "L1"|"BASE"|"OPTIMISM", "tokenId", "points", "source"} per line
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+from array import array
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from reveal_queue import RevealQueueModel
+
+CHAINS = ("L1", "BASE", "OPTIMISM")
+COLLECTOR_CHAINS = ("BASE", "OPTIMISM")  # batched through PendingDelta + checkpoint()
+CHAIN_WEIGHTS = (0.2, 0.6, 0.2)
+SKIP_REASONS = ("InvalidTokenId", "DeltaTooLarge", "TokenNotMinted", "TooManyEntries", "PointsManagerRejected")
+MONTH_WEIGHTS = (100, 95, 92, 88, 85, 82, 78, 75, 72, 68, 65, 60)  # L1BurnCollector defaults
+# (asset kind, base value, largest multiplier) - ERC721=100k, ERC1155=10k per copy, ERC20=1 per unit
+ASSETS = (("ERC721", 100_000, 1), ("ERC1155", 10_000, 300), ("ERC20", 1, 50_000_000))
+SONG_A_DAY_MULTIPLIERS = (10000, 10000, 10000, 11000, 15000, 20000, 40000)
+
+
+class Burn(NamedTuple):
+    chain: str
+    token_id: int
+    points: int
+    source: str
+
+
+class CheckpointStats:
+    """Work per applied checkpoint, kept in compact arrays so 1M-event replays stay small"""
+
+    def __init__(self):
+        self.entries = array("l")
+        self.activations = array("l")
+        self.ranks_touched = array("q")
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def record(self, entries: int, activations: int, ranks_touched: int):
+        self.entries.append(entries)
+        self.activations.append(activations)
+        self.ranks_touched.append(ranks_touched)
+
+    def extend(self, other: "CheckpointStats"):
+        self.entries.extend(other.entries)
+        self.activations.extend(other.activations)
+        self.ranks_touched.extend(other.ranks_touched)
+
+
+def synthetic_burns(count: int, supply: int, seed: int = 12345) -> Iterator[Burn]:
+    """Burns skewed toward a hot 1% of tokens, priced like calculatePoints"""
+    rng = random.Random(seed)
+    hot = max(1, supply // 100)
+    for _ in range(count):
+        chain = rng.choices(CHAINS, CHAIN_WEIGHTS)[0]
+        token_id = rng.randint(1, hot) if rng.random() < 0.5 else rng.randint(1, supply)
+        kind, base_value, max_multiplier = rng.choice(ASSETS)
+        multiplier = rng.randint(1, max_multiplier)
+        points = (base_value * multiplier * rng.choice(MONTH_WEIGHTS) * rng.choice(SONG_A_DAY_MULTIPLIERS)
+                  // 10000 // 10000)
+        source = kind if chain == "L1" else f"{chain}_{kind}"
+        yield Burn(chain, token_id, points, source)
+
+
+def read_burns(path: str) -> Iterator[Burn]:
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                item = json.loads(line)
+                yield Burn(item["chain"].upper(), int(item["tokenId"]), int(item["points"]),
+                           item.get("source", item["chain"].upper()))
+
+
+def write_burns(path: str, burns: Iterable[Burn]) -> int:
+    count = 0
+    with open(path, "w") as f:
+        for burn in burns:
+            f.write(json.dumps({"chain": burn.chain, "tokenId": burn.token_id, "points": burn.points,
+                                "source": burn.source}, separators=(',', ':')) + "\n")
+            count += 1
+    return count
+
+
+class CheckpointReplay:
+    """Collectors + aggregator + manager for one (maxTokens, maxDelta) setting"""
+
+    def __init__(self, permutation: List[int], max_tokens: int, max_delta: int,
+                 minted: Optional[int] = None, reveal_every: int = 0):
+        self.queue = RevealQueueModel(permutation)
+        self.max_tokens = max_tokens
+        self.max_delta = max_delta
+        self.minted = len(permutation) if minted is None else minted
+        self.reveal_every = reveal_every
+        self.pending: Dict[str, Dict[int, List]] = {chain: {} for chain in COLLECTOR_CHAINS}
+        self.stuck: Dict[Tuple[str, int], int] = {}  # (chain, tokenId) => points held on the collector
+        self.skipped = dict.fromkeys(SKIP_REASONS, 0)
+        self.stats: Dict[str, CheckpointStats] = {chain: CheckpointStats() for chain in CHAINS}
+        self.deactivations = 0  # reveals of tokens holding points, over the whole run
+        self.events = 0
+        self.applied_points = 0
+
+    def apply_checkpoint(self, chain: str, entries: List[tuple]):
+        """PointsAggregator.applyCheckpointFromBase on (tokenId, delta, source) entries from one chain"""
+        queue = self.queue
+        activations = 0
+        touched = 0
+        for processed, (token_id, delta, _) in enumerate(entries, start=1):
+            if processed > self.max_tokens:
+                self.skipped["TooManyEntries"] += 1
+                break
+            if token_id == 0:
+                self.skipped["InvalidTokenId"] += 1
+                continue
+            if delta > self.max_delta:
+                self.skipped["DeltaTooLarge"] += 1
+                continue
+            if token_id > self.minted:
+                self.skipped["TokenNotMinted"] += 1
+                continue
+            if token_id > queue.size or queue.revealed[token_id]:
+                self.skipped["PointsManagerRejected"] += 1
+                continue
+            if delta == 0:
+                continue
+            # Tokens between the new and old rank each move back one place
+            old_rank = queue.rank_of(token_id)
+            activations += not queue.points[token_id]
+            queue.add_points(token_id, delta)
+            touched += old_rank - queue.rank_of(token_id) + 1
+            self.applied_points += delta
+        self.stats[chain].record(len(entries), activations, touched)
+
+    def checkpoint(self, chain: str):
+        """Keeper call on a Base-style collector: aggregate and clear the pending tokens"""
+        pending = self.pending[chain]
+        if not pending:
+            return
+        entries = [(token_id, aggregate, source) for token_id, (aggregate, source) in pending.items()]
+        pending.clear()
+        self.apply_checkpoint(chain, entries)
+
+    def queue_burn(self, burn: Burn):
+        key = (burn.chain, burn.token_id)
+        pending = self.pending[burn.chain]
+        if key in self.stuck:
+            self.stuck[key] += burn.points
+            return
+        if burn.points > self.max_delta:
+            # checkpoint() reverts with CheckpointDeltaTooLarge while this token is included
+            self.stuck[key] = burn.points + pending.pop(burn.token_id, [0])[0]
+            return
+        item = pending.get(burn.token_id)
+        if item is not None and item[0] + burn.points > self.max_delta:
+            # Keeper sends early rather than let the aggregate cross maxDelta
+            self.checkpoint(burn.chain)
+            item = None
+        if item is None:
+            item = pending[burn.token_id] = [0, burn.source]
+        item[0] += burn.points
+        item[1] = burn.source
+        if len(pending) >= self.max_tokens:
+            self.checkpoint(burn.chain)
+
+    def reveal_head(self):
+        queue = self.queue
+        if len(queue):
+            token_id = queue.token_at_rank(0)
+            self.deactivations += queue.points[token_id] > 0
+            queue.reveal(token_id)
+
+    def replay(self, burns: Iterable[Burn]):
+        for burn in burns:
+            self.events += 1
+            if burn.chain == "L1":
+                self.apply_checkpoint(burn.chain, [(burn.token_id, burn.points, burn.source)])
+            else:
+                self.queue_burn(burn)
+            if self.reveal_every and self.events % self.reveal_every == 0:
+                self.reveal_head()
+        for chain in self.pending:
+            self.checkpoint(chain)
+
+
+def percentile(values: array, fraction: float) -> int:
+    if not values:
+        return 0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def summarize_stats(stats: CheckpointStats) -> dict:
+    count = len(stats) or 1
+    return {
+        "checkpoints": len(stats),
+        "entriesMean": round(sum(stats.entries) / count, 2),
+        "entriesMax": max(stats.entries, default=0),
+        "activations": sum(stats.activations),
+        "ranksTouchedMean": round(sum(stats.ranks_touched) / count, 2),
+        "ranksTouchedP95": percentile(stats.ranks_touched, 0.95),
+        "ranksTouchedMax": max(stats.ranks_touched, default=0),
+    }
+
+
+def summarize(replay: CheckpointReplay, elapsed: float) -> dict:
+    """Run summary; "collector" merges the Base / Optimism batches that maxTokens bounds"""
+    collector = CheckpointStats()
+    for chain in COLLECTOR_CHAINS:
+        collector.extend(replay.stats[chain])
+    return {
+        "maxTokens": replay.max_tokens,
+        "maxDelta": replay.max_delta,
+        "events": replay.events,
+        "collector": summarize_stats(collector),
+        "chains": {chain: summarize_stats(replay.stats[chain]) for chain in CHAINS},
+        "deactivations": replay.deactivations,
+        "activeTokens": len(replay.queue.active),
+        "skipped": dict(replay.skipped),
+        "stuckTokens": len(replay.stuck),
+        "stuckPoints": sum(replay.stuck.values()),
+        "appliedPoints": replay.applied_points,
+        "seconds": round(elapsed, 3),
+        "eventsPerSecond": round(replay.events / elapsed) if elapsed else 0,
+    }
+
+
+def print_table(rows: List[dict]):
+    """Two lines per run: collector batches and L1 one-entry applies (deact, skipped, stuck are per run)"""
+    print(f"{'events':>9} {'maxTok':>6} {'source':>9} {'ckpts':>8} {'ent/ck':>7} {'act':>7} {'deact':>6} "
+          f"{'touch avg':>10} {'p95':>7} {'max':>7} {'skipped':>8} {'stuck':>6} {'sec':>7} {'ev/s':>9}")
+    for row in rows:
+        for label, stats in (("collector", row["collector"]), ("L1", row["chains"]["L1"])):
+            print(f"{row['events']:>9} {row['maxTokens']:>6} {label:>9} {stats['checkpoints']:>8} "
+                  f"{stats['entriesMean']:>7} {stats['activations']:>7} {row['deactivations']:>6} "
+                  f"{stats['ranksTouchedMean']:>10} {stats['ranksTouchedP95']:>7} {stats['ranksTouchedMax']:>7} "
+                  f"{sum(row['skipped'].values()):>8} {row['stuckTokens']:>6} {row['seconds']:>7} "
+                  f"{row['eventsPerSecond']:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep checkpoint limits over replayed burn streams.")
+    parser.add_argument("--events", type=int, nargs="+", default=[10_000, 100_000],
+                        help="Synthetic stream lengths (ignored with --stream)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[25, 50, 100, 200, 400],
+                        help="maxTokensPerCheckpoint values to sweep")
+    parser.add_argument("--max-delta", type=int, nargs="+", default=[1_000_000],
+                        help="maxDeltaPerToken values to sweep")
+    parser.add_argument("--supply", type=int, default=10_000, help="Minted tokens")
+    parser.add_argument("--permutation", help="fisher_yates.py output (default: shuffled with --seed)")
+    parser.add_argument("--stream", help="Recorded burns (JSON lines) instead of a synthetic stream")
+    parser.add_argument("--write-stream", help="Save the first synthetic stream as JSON lines and exit")
+    parser.add_argument("--reveal-every", type=int, default=100, help="Reveal the queue head every N events (0: never)")
+    parser.add_argument("--seed", type=int, default=12345)
+    parser.add_argument("--json", action="store_true", help="Print one JSON summary per run instead of a table")
+    args = parser.parse_args()
+    if min(args.sizes) < 1:
+        parser.error("--sizes must be at least 1")  # setCheckpointLimits requires maxTokens > 0
+    if min(args.max_delta) < 1:
+        parser.error("--max-delta must be at least 1")
+
+    if args.write_stream:
+        count = write_burns(args.write_stream, synthetic_burns(args.events[0], args.supply, args.seed))
+        print(f"Wrote {count} burns to {args.write_stream}", file=sys.stderr)
+        return
+
+    if args.permutation:
+        with open(args.permutation) as f:
+            permutation = json.load(f)["permutation"]
+    else:
+        permutation = list(range(args.supply))
+        random.Random(args.seed).shuffle(permutation)
+
+    rows = []
+    lengths = [None] if args.stream else args.events
+    for length in lengths:
+        for max_delta in args.max_delta:
+            for size in args.sizes:
+                burns = read_burns(args.stream) if args.stream else synthetic_burns(length, args.supply, args.seed)
+                replay = CheckpointReplay(permutation, size, max_delta, minted=args.supply,
+                                          reveal_every=args.reveal_every)
+                started = time.perf_counter()
+                replay.replay(burns)
+                row = summarize(replay, time.perf_counter() - started)
+                if args.json:
+                    print(json.dumps(row, separators=(',', ':')))
+                rows.append(row)
+
+    if not args.json:
+        print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
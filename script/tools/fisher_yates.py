@@ -1,16 +1,170 @@
 #!/usr/bin/env python3
-import sys, random, json
+"""
+Fisher-Yates permutation of 0..n-1 from a hex seed (Python's Mersenne Twister).
 
-if len(sys.argv) != 3:
-    print("usage: fisher_yates.py <hex-seed> <total-supply>", file=sys.stderr)
-    sys.exit(1)
+usage: fisher_yates.py <hex-seed> <total-supply>                       # one JSON document
+       fisher_yates.py <hex-seed> <total-supply> --chunks DIR [--chunk-size 100]
+       fisher_yates.py --verify DIR/manifest.json
 
-seed = int(sys.argv[1], 16)
-n = int(sys.argv[2])
-perm = list(range(n))
-rng = random.Random(seed)
-for i in range(n - 1, 0, -1):
-    j = rng.randrange(i + 1)
-    perm[i], perm[j] = perm[j], perm[i]
+--chunks writes chunk-NNNNN.json files for IngestPermutation.s.sol (PERMUTATION_CHUNK_FILE):
+{"offset", "count", "width", "data"} where data is the chunk's indices packed big-endian,
+uint16 when the supply fits, else uint32. manifest.json lists every chunk with its sha256
+and the sha256 of the whole packed permutation.
+"""
 
-print(json.dumps({"seed": sys.argv[1], "total": n, "permutation": perm}, separators=(',', ':')))
+import os
+import sys
+import json
+import hashlib
+import argparse
+import random
+from array import array
+
+MANIFEST = "manifest.json"
+DEFAULT_CHUNK = 100  # IngestPermutation PERMUTATION_CHUNK default
+ALGORITHM = "mt19937"
+
+
+def shuffle(seed, n):
+    """Same permutation as rng.randrange swaps; getrandbits is what randrange draws internally"""
+    perm = array("I", range(n))
+    getrandbits = random.Random(seed).getrandbits
+    for i in range(n - 1, 0, -1):
+        bound = i + 1
+        k = bound.bit_length()
+        j = getrandbits(k)
+        while j >= bound:
+            j = getrandbits(k)
+        perm[i], perm[j] = perm[j], perm[i]
+    return perm
+
+
+def index_width(n):
+    return 2 if n <= 1 << 16 else 4
+
+
+def pack(values, width):
+    """Big-endian uint16/uint32 bytes"""
+    packed = array("H" if width == 2 else "I", values)
+    if sys.byteorder == "little":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def unpack(data, width):
+    values = array("H" if width == 2 else "I")
+    values.frombytes(data)
+    if sys.byteorder == "little":
+        values.byteswap()
+    return values
+
+
+def write_chunks(perm, seed_hex, out_dir, chunk_size, algorithm=ALGORITHM):
+    if chunk_size < 1:
+        raise ValueError(f"chunk size must be at least 1, got {chunk_size}")
+    os.makedirs(out_dir, exist_ok=True)
+    width = index_width(len(perm))
+    total_hash = hashlib.sha256()
+    chunks = []
+    for number, offset in enumerate(range(0, len(perm), chunk_size)):
+        data = pack(perm[offset:offset + chunk_size], width)
+        total_hash.update(data)
+        name = f"chunk-{number:05d}.json"
+        with open(os.path.join(out_dir, name), "w") as f:
+            json.dump({"offset": offset, "count": len(data) // width, "width": width, "data": "0x" + data.hex()},
+                      f, separators=(',', ':'))
+        chunks.append({"file": name, "offset": offset, "count": len(data) // width,
+                       "sha256": hashlib.sha256(data).hexdigest()})
+
+    manifest = {"algorithm": algorithm, "seed": seed_hex, "total": len(perm), "width": width, "chunkSize": chunk_size,
+                "sha256": total_hash.hexdigest(), "chunks": chunks}
+    with open(os.path.join(out_dir, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def read_manifest(manifest_path):
+    with open(manifest_path) as f:
+        return json.load(f)
+
+
+def verify(manifest_path, expected=None):
+    """
+    Check chunk hashes and offsets and compare each chunk with the expected permutation as it
+    is read (default: a fresh shuffle of the manifest seed). Returns a list of errors.
+    """
+    try:
+        manifest = read_manifest(manifest_path)
+    except (OSError, ValueError) as exc:
+        return [f"{manifest_path}: {exc}"]
+    if expected is None:
+        algorithm = manifest.get("algorithm", ALGORITHM)
+        if algorithm != ALGORITHM:
+            return [f"{algorithm} manifest: verify with the matching generator"]
+        expected = shuffle(int(manifest["seed"], 16), manifest["total"])
+    out_dir = os.path.dirname(manifest_path)
+    width = manifest["width"]
+    total_hash = hashlib.sha256()
+    position = 0
+    errors = []
+    for chunk in manifest["chunks"]:
+        try:
+            with open(os.path.join(out_dir, chunk["file"])) as f:
+                body = json.load(f)
+            offset, data = body["offset"], bytes.fromhex(body["data"][2:])
+        except (OSError, ValueError, KeyError) as exc:
+            # Missing or unreadable chunk: report it and keep checking the rest at the manifest offsets
+            errors.append(f"{chunk['file']}: unreadable ({type(exc).__name__}: {exc})")
+            position += chunk.get("count", 0)
+            continue
+        if offset != position or chunk["offset"] != position:
+            errors.append(f"{chunk['file']}: offset {offset}, expected {position}")
+        if hashlib.sha256(data).hexdigest() != chunk["sha256"]:
+            errors.append(f"{chunk['file']}: sha256 mismatch")
+        total_hash.update(data)
+        values = unpack(data, width)
+        if array("I", values) != expected[position:position + len(values)]:
+            errors.append(f"{chunk['file']}: entries differ from the permutation of the seed")
+        position += len(values)
+
+    if total_hash.hexdigest() != manifest["sha256"]:
+        errors.append("manifest sha256 mismatch")
+    if position != manifest["total"] or position != len(expected):
+        errors.append(f"{position} entries, expected {len(expected)}")
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fisher-Yates permutation for IngestPermutation.")
+    parser.add_argument("seed", nargs="?", help="hex seed (permutationSeed)")
+    parser.add_argument("total", nargs="?", type=int, help="total supply")
+    parser.add_argument("--chunks", metavar="DIR", help="write packed chunk files and manifest.json")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK)
+    parser.add_argument("--verify", metavar="MANIFEST", help="verify a chunk manifest against its seed")
+    args = parser.parse_args()
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+
+    if args.verify:
+        errors = verify(args.verify)
+        for error in errors:
+            print(error, file=sys.stderr)
+        print("FAILED" if errors else "ok")
+        sys.exit(1 if errors else 0)
+
+    if args.seed is None or args.total is None:
+        print("usage: fisher_yates.py <hex-seed> <total-supply>", file=sys.stderr)
+        sys.exit(1)
+
+    perm = shuffle(int(args.seed, 16), args.total)
+    if args.chunks:
+        manifest = write_chunks(perm, args.seed, args.chunks, args.chunk_size)
+        print(f"{len(manifest['chunks'])} chunks of {args.chunk_size} (uint{manifest['width'] * 8}) "
+              f"in {args.chunks}, sha256 {manifest['sha256']}", file=sys.stderr)
+        return
+
+    print(json.dumps({"seed": args.seed, "total": args.total, "permutation": perm.tolist()}, separators=(',', ':')))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Keccak-counter Fisher-Yates: a permutation any EVM or JS verifier can recompute from the VRF seed.
+
+    seed = keccak256(abi.encodePacked(randomWords))                 // EveryTwoMillionBlocks.permutationSeed
+    for (uint256 i = n - 1; i > 0; i--) {
+        uint256 j = uint256(keccak256(abi.encode(seed, i))) % (i + 1);
+        (perm[i], perm[j]) = (perm[j], perm[i]);
+    }
+
+Every draw depends only on (seed, i), so the batch path hashes whole ranges of counters at once
+with a NumPy Keccak-f[1600] and only the swaps run in a Python loop. Without NumPy each draw is
+one scalar keccak256 (python-scripts/original-scripts/keccak.py).
+
+usage: keccak_shuffle.py <seed-hex> <total-supply> [--chunks DIR] [--chunk-size 100]
+       keccak_shuffle.py --random-words W [W ...] --total N [--chunks DIR]
+       keccak_shuffle.py --verify DIR/manifest.json [<seed-hex> | --random-words W [W ...]]
+"""
+
+import sys
+import json
+import argparse
+from array import array
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "python-scripts" / "original-scripts"))
+from keccak import keccak256, ROUND_CONSTANTS, ROTATIONS, PI_TARGETS
+from fisher_yates import DEFAULT_CHUNK, read_manifest, verify as verify_chunks, write_chunks
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+ALGORITHM = "keccak-counter"
+BATCH = 1 << 14
+MAX_TOTAL = 1 << 32  # perm entries are uint32; also keeps the limb-wise modulo inside uint64
+
+
+def seed_from_random_words(words):
+    """keccak256(abi.encodePacked(uint256[] randomWords))"""
+    return keccak256(b"".join(int(word).to_bytes(32, "big") for word in words))
+
+
+def parse_seed(seed_hex):
+    return int(seed_hex, 16).to_bytes(32, "big")
+
+
+def seed_hex(seed):
+    return "0x" + seed.hex()
+
+
+def draw(seed, i):
+    """Scalar reference: uint256(keccak256(abi.encode(seed, i))) % (i + 1)"""
+    return int.from_bytes(keccak256(seed + i.to_bytes(32, "big")), "big") % (i + 1)
+
+
+def keccak_f_batch(state):
+    """Keccak-f[1600] on a (25, n) uint64 array, one column per message (in place, no per-round allocation)"""
+    n = state.shape[1]
+    one, sixty_three = np.uint64(1), np.uint64(63)
+    a = [state[i] for i in range(25)]
+    b = [np.empty(n, dtype=np.uint64) for _ in range(25)]
+    c = [np.empty(n, dtype=np.uint64) for _ in range(5)]
+    d = np.empty(n, dtype=np.uint64)
+    tmp = np.empty(n, dtype=np.uint64)
+    for rc in ROUND_CONSTANTS:
+        # Theta
+        for x in range(5):
+            np.bitwise_xor(a[x], a[x + 5], out=c[x])
+            c[x] ^= a[x + 10]
+            c[x] ^= a[x + 15]
+            c[x] ^= a[x + 20]
+        for x in range(5):
+            right = c[(x + 1) % 5]
+            np.left_shift(right, one, out=d)
+            np.right_shift(right, sixty_three, out=tmp)
+            d |= tmp
+            d ^= c[(x - 1) % 5]
+            for y in range(0, 25, 5):
+                a[x + y] ^= d
+
+        # Rho + Pi
+        for i in range(25):
+            target = b[PI_TARGETS[i]]
+            r = ROTATIONS[i]
+            if r:
+                np.left_shift(a[i], np.uint64(r), out=target)
+                np.right_shift(a[i], np.uint64(64 - r), out=tmp)
+                target |= tmp
+            else:
+                target[:] = a[i]
+
+        # Chi
+        for y in range(0, 25, 5):
+            for x in range(5):
+                np.invert(b[y + (x + 1) % 5], out=tmp)
+                tmp &= b[y + (x + 2) % 5]
+                np.bitwise_xor(b[y + x], tmp, out=a[y + x])
+
+        # Iota
+        a[0] ^= np.uint64(rc)
+
+
+def draws_batch(seed, counters):
+    """draw(seed, i) for a uint64 array of counters i, without per-draw Python work"""
+    n = len(counters)
+    state = np.zeros((25, n), dtype=np.uint64)
+    # 64-byte message seed || uint256(i) in one rate block: lanes 0-3 seed, lane 7 the counter
+    # (big-endian bytes read as a little-endian lane), then 0x01 padding and the final 0x80 bit
+    for lane in range(4):
+        state[lane] = np.uint64(int.from_bytes(seed[lane * 8:lane * 8 + 8], "little"))
+    state[7] = counters.astype(np.uint64).byteswap()
+    state[8] = np.uint64(0x01)
+    state[16] = np.uint64(0x80 << 56)
+    keccak_f_batch(state)
+
+    # uint256 of the digest: lanes 0-3 are its big-endian 64-bit limbs once byte-swapped.
+    # Reduce limb by limb: acc * 2^64 + limb (mod m) stays below 2^64 for m <= 2^32.
+    m = counters.astype(np.uint64) + np.uint64(1)
+    two64 = (np.uint64(0xFFFFFFFFFFFFFFFF) % m + np.uint64(1)) % m
+    acc = state[0].byteswap() % m
+    for lane in range(1, 4):
+        acc = (acc * two64 + state[lane].byteswap() % m) % m
+    return acc
+
+
+def shuffle(seed, n, batch=BATCH):
+    if n > MAX_TOTAL:
+        raise ValueError(f"Supply {n} exceeds {MAX_TOTAL}")
+    perm = array("I", range(n))
+    for hi in range(n - 1, 0, -batch):
+        lo = max(hi - batch, 0)
+        counters = range(hi, lo, -1)
+        if np is not None:
+            draws = draws_batch(seed, np.arange(hi, lo, -1, dtype=np.uint64)).tolist()
+        else:
+            draws = [draw(seed, i) for i in counters]
+        for i, j in zip(counters, draws):
+            perm[i], perm[j] = perm[j], perm[i]
+    return perm
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keccak-counter Fisher-Yates permutation and verifier.")
+    parser.add_argument("seed", nargs="?", help="permutationSeed (bytes32 hex)")
+    parser.add_argument("total", nargs="?", type=int, help="total supply")
+    parser.add_argument("--total", dest="total_flag", type=int, help="total supply (with --random-words)")
+    parser.add_argument("--random-words", nargs="+", help="VRF randomWords (decimal or 0x hex); the seed is derived")
+    parser.add_argument("--chunks", metavar="DIR", help="write packed chunk files and manifest.json")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK)
+    parser.add_argument("--verify", metavar="MANIFEST", help="check chunk files against the seed in one pass")
+    args = parser.parse_args()
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+
+    if args.random_words:
+        seed = seed_from_random_words([int(word, 0) for word in args.random_words])
+    elif args.seed:
+        seed = parse_seed(args.seed)
+    else:
+        seed = None
+
+    if args.verify:
+        try:
+            manifest = read_manifest(args.verify)
+        except (OSError, ValueError) as exc:
+            print(f"{args.verify}: {exc}", file=sys.stderr)
+            print("FAILED")
+            sys.exit(1)
+        errors = []
+        if manifest.get("algorithm") != ALGORITHM:
+            errors.append(f"manifest algorithm {manifest.get('algorithm')!r}, expected {ALGORITHM!r}")
+        if seed is None:
+            seed = parse_seed(manifest["seed"])
+        elif parse_seed(manifest["seed"]) != seed:
+            errors.append(f"manifest seed {manifest['seed']} != {seed_hex(seed)}")
+        if not errors:
+            errors = verify_chunks(args.verify, expected=shuffle(seed, manifest["total"]))
+        for error in errors:
+            print(error, file=sys.stderr)
+        print("FAILED" if errors else f"ok {seed_hex(seed)}")
+        sys.exit(1 if errors else 0)
+
+    total = args.total if args.total is not None else args.total_flag
+    if seed is None or total is None:
+        print("usage: keccak_shuffle.py <seed-hex> <total-supply>", file=sys.stderr)
+        sys.exit(1)
+
+    perm = shuffle(seed, total)
+    if args.chunks:
+        manifest = write_chunks(perm, seed_hex(seed), args.chunks, args.chunk_size, algorithm=ALGORITHM)
+        print(f"{len(manifest['chunks'])} chunks of {args.chunk_size} (uint{manifest['width'] * 8}) "
+              f"in {args.chunks}, sha256 {manifest['sha256']}", file=sys.stderr)
+        return
+
+    print(json.dumps({"seed": seed_hex(seed), "total": total, "algorithm": ALGORITHM,
+                      "permutation": perm.tolist()}, separators=(',', ':')))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Reference model of the PointsManager reveal queue (points overlay on the base permutation)
+
+Queue order: points desc, then base permutation index, then tokenId; tokens with zero points
+form the tail in base permutation order. Revealed tokens leave the queue.
+
+Active tokens are kept in a sorted list keyed (-points, baseIndex, tokenId) and the zero-point
+tail / revealed set in Fenwick trees over the base index, so rank_of and token_at_rank are
+O(log n) instead of PointsManager's scans over activeTokens and revealedTokens.
+Uses sortedcontainers when installed, otherwise a bucketed sorted list.
+
+usage: reveal_queue.py <permutation.json> [<burns.json>] [--one-indexed] [--contract-ranks] [--all-ranks]
+  permutation.json  output of fisher_yates.py ({"total", "permutation"})
+  burns.json        [[tokenId, points], ...] or [{"tokenId", "points"}, ...], applied in order;
+                    points <= 0 marks a reveal
+"""
+
+import json
+import argparse
+from bisect import bisect_left, insort
+from typing import Iterator, List, Optional, Tuple
+
+try:
+    from sortedcontainers import SortedList
+except ImportError:
+    SortedList = None
+
+BUCKET_LOAD = 512
+
+
+class FenwickTree:
+    """Prefix sums over 0..n-1 with point updates"""
+
+    def __init__(self, size: int, fill: int = 0):
+        self.size = size
+        self.tree = [0] * (size + 1)
+        if fill:
+            for i in range(1, size + 1):
+                self.tree[i] += fill
+                parent = i + (i & -i)
+                if parent <= size:
+                    self.tree[parent] += self.tree[i]
+
+    def add(self, index: int, delta: int):
+        i = index + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix(self, index: int) -> int:
+        """Sum of entries 0..index-1"""
+        total = 0
+        i = index
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def find(self, k: int) -> int:
+        """Smallest index whose prefix sum (inclusive) exceeds k, i.e. the k-th set entry (0-based)"""
+        pos = 0
+        step = 1 << self.size.bit_length()
+        while step:
+            nxt = pos + step
+            if nxt <= self.size and self.tree[nxt] <= k:
+                pos = nxt
+                k -= self.tree[nxt]
+            step >>= 1
+        return pos
+
+
+class BucketSortedList:
+    """Minimal stand-in for sortedcontainers.SortedList: sorted buckets + Fenwick over bucket sizes"""
+
+    def __init__(self):
+        self.buckets: List[list] = []
+        self.maxes: list = []
+        self.index: Optional[FenwickTree] = None
+        self.length = 0
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __iter__(self) -> Iterator:
+        for bucket in self.buckets:
+            yield from bucket
+
+    def rebuild_index(self) -> FenwickTree:
+        self.index = FenwickTree(len(self.buckets))
+        for i, bucket in enumerate(self.buckets):
+            self.index.add(i, len(bucket))
+        return self.index
+
+    def add(self, value):
+        self.length += 1
+        if not self.buckets:
+            self.buckets.append([value])
+            self.maxes.append(value)
+            self.index = None
+            return
+        i = bisect_left(self.maxes, value)
+        if i == len(self.maxes):
+            i -= 1
+            self.maxes[i] = value
+        bucket = self.buckets[i]
+        insort(bucket, value)
+        if len(bucket) > 2 * BUCKET_LOAD:
+            self.buckets[i:i + 1] = [bucket[:BUCKET_LOAD], bucket[BUCKET_LOAD:]]
+            self.maxes[i:i + 1] = [bucket[BUCKET_LOAD - 1], bucket[-1]]
+            self.index = None
+        elif self.index is not None:
+            self.index.add(i, 1)
+
+    def remove(self, value):
+        i = bisect_left(self.maxes, value)
+        bucket = self.buckets[i] if i < len(self.buckets) else []
+        j = bisect_left(bucket, value)
+        if j == len(bucket) or bucket[j] != value:
+            raise ValueError(f"{value!r} not in list")
+        del bucket[j]
+        self.length -= 1
+        if not bucket:
+            del self.buckets[i]
+            del self.maxes[i]
+            self.index = None
+            return
+        self.maxes[i] = bucket[-1]
+        if self.index is not None:
+            self.index.add(i, -1)
+
+    def bisect_left(self, value) -> int:
+        i = bisect_left(self.maxes, value)
+        if i == len(self.maxes):
+            return self.length
+        index = self.index or self.rebuild_index()
+        return index.prefix(i) + bisect_left(self.buckets[i], value)
+
+    def __getitem__(self, position: int):
+        if position < 0:
+            position += self.length
+        if not 0 <= position < self.length:
+            raise IndexError("list index out of range")
+        index = self.index or self.rebuild_index()
+        i = index.find(position)
+        return self.buckets[i][position - index.prefix(i)]
+
+
+class RevealQueueModel:
+    """
+    Mirror of PointsManager state for tokens 1..n (tokenId i has basePermutation permutation[i-1]).
+
+    rank_of / token_at_rank follow the queue order described above. contract_rank_of reproduces
+    currentRankOf exactly: for zero-point tokens it returns 2 * activeCount + baseIndex - revealedBefore,
+    which also counts active tokens (twice) and active tokens with a lower base index.
+    """
+
+    def __init__(self, permutation: List[int], zero_indexed: bool = True):
+        self.size = len(permutation)
+        self.base_index = [0] * (self.size + 1)
+        self.token_at_base = [0] * self.size
+        for token_id, idx in enumerate(permutation, start=1):
+            base = idx if zero_indexed or idx == 0 else idx - 1  # PointsManager._baseIndex
+            if not 0 <= base < self.size or self.token_at_base[base]:
+                raise ValueError(f"Permutation is not a bijection onto 0..{self.size - 1} (token {token_id})")
+            self.base_index[token_id] = base
+            self.token_at_base[base] = token_id
+        self.points = [0] * (self.size + 1)
+        self.revealed = bytearray(self.size + 1)
+        self.active = SortedList() if SortedList is not None else BucketSortedList()
+        self.zero_tail = FenwickTree(self.size, fill=1)
+        self.revealed_bases = FenwickTree(self.size)
+
+    def check_token(self, token_id: int):
+        if not 1 <= token_id <= self.size:
+            raise ValueError(f"Invalid token {token_id}")
+
+    def key(self, token_id: int) -> Tuple[int, int, int]:
+        return (-self.points[token_id], self.base_index[token_id], token_id)
+
+    def add_points(self, token_id: int, amount: int):
+        """PointsManager.addPoints"""
+        self.check_token(token_id)
+        if self.revealed[token_id]:
+            raise ValueError(f"Token {token_id} revealed")
+        if amount <= 0:
+            return
+        if self.points[token_id]:
+            self.active.remove(self.key(token_id))
+        else:
+            self.zero_tail.add(self.base_index[token_id], -1)
+        self.points[token_id] += amount
+        self.active.add(self.key(token_id))
+
+    def reveal(self, token_id: int):
+        """PointsManager.handleReveal"""
+        self.check_token(token_id)
+        if self.revealed[token_id]:
+            return
+        self.revealed[token_id] = 1
+        if self.points[token_id]:
+            self.active.remove(self.key(token_id))
+        else:
+            self.zero_tail.add(self.base_index[token_id], -1)
+        self.revealed_bases.add(self.base_index[token_id], 1)
+
+    def __len__(self) -> int:
+        """Tokens still in the queue"""
+        return self.size - self.revealed_bases.prefix(self.size)
+
+    def rank_of(self, token_id: int) -> int:
+        self.check_token(token_id)
+        if self.revealed[token_id]:
+            raise ValueError(f"Token {token_id} revealed")
+        if self.points[token_id]:
+            return self.active.bisect_left(self.key(token_id))
+        return len(self.active) + self.zero_tail.prefix(self.base_index[token_id])
+
+    def contract_rank_of(self, token_id: int) -> int:
+        """Value PointsManager.currentRankOf returns"""
+        rank = self.rank_of(token_id)
+        if self.points[token_id]:
+            return rank
+        base = self.base_index[token_id]
+        return 2 * len(self.active) + base - self.revealed_bases.prefix(base)
+
+    def token_at_rank(self, rank: int) -> int:
+        if not 0 <= rank < len(self):
+            raise IndexError(f"Rank {rank} out of range")
+        if rank < len(self.active):
+            return self.active[rank][2]
+        return self.token_at_base[self.zero_tail.find(rank - len(self.active))]
+
+    def order(self) -> Iterator[int]:
+        """Every unrevealed token in queue order (O(n))"""
+        for _, _, token_id in self.active:
+            yield token_id
+        for token_id in self.token_at_base:
+            if not self.points[token_id] and not self.revealed[token_id]:
+                yield token_id
+
+    def ranks(self) -> List[int]:
+        """Rank per tokenId (index 0 unused, -1 for revealed tokens) in one O(n) pass"""
+        ranks = [-1] * (self.size + 1)
+        for rank, token_id in enumerate(self.order()):
+            ranks[token_id] = rank
+        return ranks
+
+
+def read_burns(path: str) -> List[Tuple[int, int]]:
+    with open(path) as f:
+        burns = json.load(f)
+    return [(int(b["tokenId"]), int(b["points"])) if isinstance(b, dict) else (int(b[0]), int(b[1])) for b in burns]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Forecast PointsManager reveal order.")
+    parser.add_argument("permutation", help="fisher_yates.py output")
+    parser.add_argument("burns", nargs="?", help="JSON list of [tokenId, points] burns (points <= 0 reveals)")
+    parser.add_argument("--one-indexed", action="store_true", help="Permutation values are 1-based (permutationZeroIndexed=false)")
+    parser.add_argument("--contract-ranks", action="store_true", help="Report currentRankOf values instead of queue positions")
+    parser.add_argument("--all-ranks", action="store_true",
+                        help="Add every token's queue position to each step (\"ranks\" indexed by tokenId, -1 when revealed)")
+    args = parser.parse_args()
+
+    with open(args.permutation) as f:
+        permutation = json.load(f)["permutation"]
+    queue = RevealQueueModel(permutation, zero_indexed=not args.one_indexed)
+    rank_of = queue.contract_rank_of if args.contract_ranks else queue.rank_of
+
+    for step, (token_id, amount) in enumerate(read_burns(args.burns) if args.burns else []):
+        if amount > 0:
+            try:
+                queue.add_points(token_id, amount)
+                line = {"step": step, "tokenId": token_id, "points": queue.points[token_id], "rank": rank_of(token_id)}
+            except ValueError as exc:  # addPoints would revert; the burn is dropped
+                line = {"step": step, "tokenId": token_id, "error": str(exc)}
+        else:
+            queue.reveal(token_id)
+            line = {"step": step, "tokenId": token_id, "revealed": True}
+        if args.all_ranks:
+            line["ranks"] = queue.ranks()  # index 0 unused
+        print(json.dumps(line, separators=(',', ':')))
+
+    print(json.dumps({"total": queue.size, "remaining": len(queue), "order": list(queue.order())}, separators=(',', ':')))
+
+
+if __name__ == "__main__":
+    main()